@@ -0,0 +1,623 @@
+# Local stand-in for the subset of the Airtable REST API that pyairtable uses:
+# listing with pagination, filterByFormula, fields and sort, fetching, creating,
+# updating, upserting and deleting records. Point the sync scripts at it with
+# AIRTABLE_ENDPOINT_URL=http://127.0.0.1:8766 to measure push/pull throughput
+# and check batching and backoff without touching the real base. Requests over
+# the per-base rate limit get a 429 like Airtable's, every request can be
+# delayed to model the network, and /_stats reports what the scripts sent.
+# Tables are created on first use and kept in memory; --seed loads a data tree.
+import os
+import re
+import json
+import glob
+import time
+import uuid
+import random
+import argparse
+import threading
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Airtable's documented limits
+RATE_LIMIT = 5
+MAX_PAGE_SIZE = 100
+MAX_BATCH = 10
+
+
+class AirtableError(Exception):
+    def __init__(self, status, error_type, message):
+        super().__init__(message)
+        self.status = status
+        self.error_type = error_type
+        self.message = message
+
+    def body(self):
+        return {'error': {'type': self.error_type, 'message': self.message}}
+
+
+def invalid(message, error_type='INVALID_REQUEST_UNKNOWN'):
+    return AirtableError(422, error_type, message)
+
+
+# filterByFormula: a recursive descent parser compiling a formula to a
+# function of the record. Covers the operators and the functions pyairtable's
+# formula helpers emit plus the common text ones; anything else is a 422.
+
+TOKEN = re.compile(r"""\s*(?:
+    (?P<field>\{[^}]*\})
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<op>!=|<=|>=|=|<|>|&|\+|-|\*|/|\(|\)|,)
+  | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+)""", re.VERBOSE)
+
+
+def _tokenize(formula):
+    tokens = []
+    position = 0
+    formula = formula.rstrip()
+    while position < len(formula):
+        match = TOKEN.match(formula, position)
+        if not match:
+            raise invalid(f"Invalid formula at {formula[position:position + 20]!r}", 'INVALID_FILTER_BY_FORMULA')
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'field':
+            tokens.append(('field', text[1:-1]))
+        elif kind == 'string':
+            tokens.append(('value', re.sub(r'\\(.)', r'\1', text[1:-1])))
+        elif kind == 'number':
+            tokens.append(('value', float(text) if '.' in text else int(text)))
+        else:
+            tokens.append((kind, text.upper() if kind == 'name' else text))
+        position = match.end()
+    return tokens
+
+
+def _blank(value):
+    return value is None or value == '' or value == [] or value is False
+
+
+def _true(value):
+    """Formula truthiness: blanks and zero are false"""
+    return not _blank(value) and value != 0
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, list):
+        return ', '.join(_text(v) for v in value)
+    return str(value)
+
+
+def _compare(op, a, b):
+    if op in ('=', '!='):
+        if _blank(a) or _blank(b):
+            equal = _blank(a) and _blank(b) or a == 0 or b == 0
+        elif _number(a) and _number(b):
+            equal = a == b
+        else:
+            equal = _text(a) == _text(b)
+        return equal if op == '=' else not equal
+    if _number(a) or _number(b):
+        a, b = a or 0, b or 0
+        if not (_number(a) and _number(b)):
+            return False
+    else:
+        a, b = _text(a), _text(b)
+    return {'<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b}[op]
+
+
+def _find(needle, haystack, start=0):
+    return _text(haystack).find(_text(needle), max(int(start or 1) - 1, 0)) + 1
+
+
+FUNCTIONS = {
+    'AND': lambda *args: all(_true(a) for a in args),
+    'OR': lambda *args: any(_true(a) for a in args),
+    'NOT': lambda a: not _true(a),
+    'IF': lambda condition, a, b=None: a if _true(condition) else b,
+    'BLANK': lambda: None,
+    'TRUE': lambda: True,
+    'FALSE': lambda: False,
+    'LOWER': lambda a: _text(a).lower(),
+    'UPPER': lambda a: _text(a).upper(),
+    'TRIM': lambda a: _text(a).strip(),
+    'LEN': lambda a: len(_text(a)),
+    'CONCATENATE': lambda *args: ''.join(_text(a) for a in args),
+    'FIND': _find,
+    'SEARCH': lambda needle, haystack, start=0: _find(needle, haystack, start) or None,
+}
+
+
+class FormulaParser:
+    def __init__(self, formula):
+        self.tokens = _tokenize(formula)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, text=None):
+        token = self.peek()
+        if token[0] is None or (text is not None and token[1] != text):
+            raise invalid(f"Invalid formula: expected {text or 'a value'}", 'INVALID_FILTER_BY_FORMULA')
+        self.position += 1
+        return token
+
+    def parse(self):
+        expression = self.comparison()
+        if self.peek()[0] is not None:
+            raise invalid(f"Invalid formula: unexpected {self.peek()[1]!r}", 'INVALID_FILTER_BY_FORMULA')
+        return expression
+
+    def binary(self, operand, operators, apply):
+        left = operand()
+        while self.peek()[0] == 'op' and self.peek()[1] in operators:
+            op = self.take()[1]
+            right = operand()
+            left = (lambda l, r, op: lambda record: apply(op, l(record), r(record)))(left, right, op)
+        return left
+
+    def comparison(self):
+        return self.binary(self.concatenation, ('=', '!=', '<', '>', '<=', '>='), _compare)
+
+    def concatenation(self):
+        return self.binary(self.additive, ('&',), lambda op, a, b: _text(a) + _text(b))
+
+    def additive(self):
+        return self.binary(self.term, ('+', '-'),
+                           lambda op, a, b: (a or 0) + (b or 0) if op == '+' else (a or 0) - (b or 0))
+
+    def term(self):
+        return self.binary(self.unary, ('*', '/'),
+                           lambda op, a, b: (a or 0) * (b or 0) if op == '*' else (a or 0) / b if b else None)
+
+    def unary(self):
+        if self.peek() == ('op', '-'):
+            self.take()
+            operand = self.unary()
+            return lambda record: -(operand(record) or 0)
+        return self.primary()
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == 'value':
+            return lambda record: text
+        if kind == 'field':
+            return lambda record: record['fields'].get(text)
+        if kind == 'op' and text == '(':
+            expression = self.comparison()
+            self.take(')')
+            return expression
+        if kind == 'name':
+            args = []
+            if self.peek() == ('op', '('):
+                self.take()
+                while self.peek() != ('op', ')'):
+                    args.append(self.comparison())
+                    if self.peek() != ('op', ')'):
+                        self.take(',')
+                self.take(')')
+            if text == 'RECORD_ID':
+                return lambda record: record['id']
+            if text not in FUNCTIONS:
+                raise invalid(f"Unknown function {text}", 'INVALID_FILTER_BY_FORMULA')
+            function = FUNCTIONS[text]
+            return lambda record: function(*(arg(record) for arg in args))
+        raise invalid(f"Invalid formula: unexpected {text!r}", 'INVALID_FILTER_BY_FORMULA')
+
+
+@lru_cache(maxsize=256)
+def compile_formula(formula):
+    """Predicate on {id, fields} records for a filterByFormula string"""
+    expression = FormulaParser(formula).parse()
+    return lambda record: _true(expression(record))
+
+
+def _sort_key(value):
+    if _blank(value):
+        return (0, 0)
+    if _number(value):
+        return (1, value)
+    return (2, _text(value))
+
+
+class Table:
+    """Records of one table in creation order, with indexes for upsert matching"""
+
+    def __init__(self, name):
+        self.name = name
+        self.records = {}  # record id -> {id, createdTime, fields}
+        self.indexes = {}  # key fields -> {values: set of record ids}
+
+    def _index_key(self, fields, key_fields):
+        return tuple(_text(fields.get(field)) for field in key_fields)
+
+    def _reindex(self, record_id, old_fields, new_fields):
+        for key_fields, index in self.indexes.items():
+            if old_fields is not None:
+                ids = index.get(self._index_key(old_fields, key_fields))
+                if ids:
+                    ids.discard(record_id)
+            if new_fields is not None:
+                index[self._index_key(new_fields, key_fields)].add(record_id)
+
+    def matching(self, key_fields, fields):
+        """Ids of records whose key_fields equal those in fields"""
+        key_fields = tuple(key_fields)
+        if key_fields not in self.indexes:
+            index = self.indexes[key_fields] = defaultdict(set)
+            for record_id, record in self.records.items():
+                index[self._index_key(record['fields'], key_fields)].add(record_id)
+        return self.indexes[key_fields].get(self._index_key(fields, key_fields), set())
+
+    def write(self, record_id, fields, replace=False):
+        """Create or update a record; blank values clear a field, as in Airtable"""
+        record = self.records.get(record_id)
+        old_fields = record['fields'] if record else None
+        merged = {} if replace or record is None else dict(old_fields)
+        merged.update(fields)
+        merged = {k: v for k, v in merged.items() if not _blank(v)}
+        if record is None:
+            record = self.records[record_id] = {
+                'id': record_id,
+                'createdTime': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            }
+        record['fields'] = merged
+        self._reindex(record_id, old_fields, merged)
+        return record
+
+    def delete(self, record_id):
+        record = self.records.pop(record_id)
+        self._reindex(record_id, record['fields'], None)
+
+
+def new_record_id():
+    return 'rec' + uuid.uuid4().hex[:14]
+
+
+def view(record, fields=None):
+    if fields:
+        return {**record, 'fields': {k: v for k, v in record['fields'].items() if k in fields}}
+    return {**record, 'fields': dict(record['fields'])}
+
+
+class AirtableState:
+    def __init__(self, rate_limit=RATE_LIMIT, latency=0.0, jitter=0.0, penalty=0.0):
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.jitter = jitter
+        self.penalty = penalty
+        self.tables = {}
+        self.lock = threading.Lock()
+        self.recent = defaultdict(deque)  # base -> times of accepted requests in the last second
+        self.blocked_until = {}
+        self.stats = Counter()
+        self.started = time.time()
+
+    def table(self, name):
+        if name not in self.tables:
+            self.tables[name] = Table(name)
+        return self.tables[name]
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def throttled(self, base):
+        """Whether a request to base is over the rate limit; accepted requests are recorded"""
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            if self.blocked_until.get(base, 0) > now:
+                return True
+            recent = self.recent[base]
+            while recent and recent[0] <= now - 1:
+                recent.popleft()
+            if len(recent) >= self.rate_limit:
+                if self.penalty:
+                    self.blocked_until[base] = now + self.penalty
+                return True
+            recent.append(now)
+            return False
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def seed(self, root):
+        """Load data/<directory>/*.json into the matching tables, as pullData.py names them"""
+        counts = {}
+        for directory in sorted(os.listdir(root)):
+            paths = sorted(glob.glob(os.path.join(root, directory, '*.json')))
+            if not paths:
+                continue
+            table = self.table(directory.capitalize())
+            for path in paths:
+                with open(path, 'r', encoding='utf-8') as f:
+                    table.write(new_record_id(), json.load(f))
+            counts[table.name] = len(paths)
+        return counts
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'uptime': round(time.time() - self.started, 1),
+                'tables': {name: len(table.records) for name, table in self.tables.items()},
+                'requests': dict(self.stats),
+            }
+
+    def list_records(self, table_name, options):
+        page_size = int(options.get('pageSize') or MAX_PAGE_SIZE)
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise invalid(f"pageSize must be between 1 and {MAX_PAGE_SIZE}", 'INVALID_PAGE_SIZE')
+        formula = options.get('filterByFormula')
+        predicate = compile_formula(formula) if formula else None
+        offset = options.get('offset')
+        if offset and not re.fullmatch(r'itr\d+', offset):
+            raise invalid("Invalid offset", 'LIST_RECORDS_ITERATOR_NOT_AVAILABLE')
+        start = int(offset[3:]) if offset else 0
+
+        with self.lock:
+            table = self.tables.get(table_name)
+            records = list(table.records.values()) if table else []
+        if predicate:
+            try:
+                records = [r for r in records if predicate(r)]
+            except (TypeError, ValueError) as e:
+                raise invalid(f"Invalid formula: {e}", 'INVALID_FILTER_BY_FORMULA')
+        for spec in reversed(options.get('sort') or []):
+            records.sort(key=lambda r: _sort_key(r['fields'].get(spec['field'])),
+                         reverse=spec.get('direction') == 'desc')
+        if options.get('maxRecords'):
+            records = records[:int(options['maxRecords'])]
+
+        page = records[start:start + page_size]
+        body = {'records': [view(r, options.get('fields')) for r in page]}
+        if start + page_size < len(records):
+            body['offset'] = f"itr{start + page_size}"
+        self.count('recordsRead', len(page))
+        return body
+
+    def get_record(self, table_name, record_id):
+        with self.lock:
+            record = self.tables[table_name].records.get(record_id) if table_name in self.tables else None
+            if record is None:
+                raise AirtableError(404, 'NOT_FOUND', f"Could not find record {record_id}")
+            self.stats['recordsRead'] += 1
+            return view(record)
+
+    def _batch(self, records):
+        if not isinstance(records, list) or not records:
+            raise invalid("records must be a non-empty array", 'INVALID_RECORDS')
+        if len(records) > MAX_BATCH:
+            raise invalid(f"At most {MAX_BATCH} records per request, got {len(records)}", 'INVALID_RECORDS')
+        return records
+
+    def create(self, table_name, body):
+        with self.lock:
+            table = self.table(table_name)
+            if 'records' not in body:
+                self.stats['recordsWritten'] += 1
+                return view(table.write(new_record_id(), body.get('fields') or {}))
+            records = self._batch(body['records'])
+            self.stats['recordsWritten'] += len(records)
+            return {'records': [view(table.write(new_record_id(), r.get('fields') or {})) for r in records]}
+
+    def update(self, table_name, record_id, body, replace):
+        with self.lock:
+            table = self.table(table_name)
+            if record_id is not None:
+                if record_id not in table.records:
+                    raise AirtableError(404, 'NOT_FOUND', f"Could not find record {record_id}")
+                self.stats['recordsWritten'] += 1
+                return view(table.write(record_id, body.get('fields') or {}, replace))
+
+            records = self._batch(body.get('records'))
+            upsert = body.get('performUpsert')
+            key_fields = upsert.get('fieldsToMergeOn') if upsert else None
+            if upsert and not key_fields:
+                raise invalid("performUpsert.fieldsToMergeOn is required")
+
+            # Resolve every record before writing so a bad batch changes nothing
+            targets = []
+            for record in records:
+                fields = record.get('fields') or {}
+                if 'id' in record:
+                    if record['id'] not in table.records:
+                        raise AirtableError(404, 'NOT_FOUND', f"Could not find record {record['id']}")
+                    targets.append((record['id'], fields, False))
+                elif key_fields:
+                    missing = [f for f in key_fields if _blank(fields.get(f))]
+                    if missing:
+                        raise invalid(f"Missing fieldsToMergeOn {missing}", 'INVALID_VALUE_FOR_COLUMN')
+                    matches = table.matching(key_fields, fields)
+                    if len(matches) > 1:
+                        raise invalid(f"{len(matches)} records match {key_fields}", 'INVALID_MERGE_ON_FIELD')
+                    targets.append((next(iter(matches)), fields, False) if matches else
+                                   (new_record_id(), fields, True))
+                else:
+                    raise invalid("Each record needs an id", 'INVALID_RECORDS')
+
+            result = {'records': []}
+            if upsert:
+                result.update(createdRecords=[], updatedRecords=[])
+            for record_id, fields, created in targets:
+                result['records'].append(view(table.write(record_id, fields, replace and not created)))
+                if upsert:
+                    result['createdRecords' if created else 'updatedRecords'].append(record_id)
+            self.stats['recordsWritten'] += len(targets)
+            return result
+
+    def delete(self, table_name, record_ids):
+        with self.lock:
+            table = self.table(table_name)
+            missing = [r for r in record_ids if r not in table.records]
+            if missing:
+                raise AirtableError(404, 'NOT_FOUND', f"Could not find record {missing[0]}")
+            for record_id in record_ids:
+                table.delete(record_id)
+            self.stats['recordsDeleted'] += len(record_ids)
+        return [{'id': record_id, 'deleted': True} for record_id in record_ids]
+
+
+def query_options(query):
+    """List options from a query string, decoding fields[] and sort[n][field]"""
+    params = parse_qs(query, keep_blank_values=True)
+    options = {k: v[-1] for k, v in params.items() if '[' not in k}
+    if 'fields[]' in params:
+        options['fields'] = params['fields[]']
+    sort = {}
+    for key, values in params.items():
+        match = re.fullmatch(r'sort\[(\d+)\]\[(field|direction)\]', key)
+        if match:
+            sort.setdefault(int(match.group(1)), {})[match.group(2)] = values[-1]
+    if sort:
+        options['sort'] = [sort[i] for i in sorted(sort)]
+    return options
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, as requests.Session pools connections to the real API
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_json(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length) if length else b''
+            try:
+                return json.loads(body or b'{}')
+            except ValueError:
+                raise invalid("Request body is not valid JSON", 'INVALID_REQUEST_BODY')
+
+        def _dispatch(self, method, parts, query, body):
+            if len(parts) < 3 or parts[0] != 'v0':
+                raise AirtableError(404, 'NOT_FOUND', 'Could not find what you are looking for')
+            table, rest = parts[2], parts[3:]
+            if method == 'GET' and not rest:
+                state.count('list')
+                return state.list_records(table, query_options(query))
+            if method == 'POST' and rest == ['listRecords']:
+                state.count('list')
+                return state.list_records(table, body)
+            if method == 'GET' and len(rest) == 1:
+                state.count('get')
+                return state.get_record(table, rest[0])
+            if method == 'POST' and not rest:
+                state.count('create')
+                return state.create(table, body)
+            if method in ('PATCH', 'PUT') and len(rest) <= 1:
+                state.count('upsert' if body.get('performUpsert') else 'update')
+                return state.update(table, rest[0] if rest else None, body, method == 'PUT')
+            if method == 'DELETE' and len(rest) == 1:
+                state.count('delete')
+                return state.delete(table, rest)[0]
+            if method == 'DELETE' and not rest:
+                state.count('delete')
+                return {'records': state.delete(table, parse_qs(query).get('records[]', []))}
+            raise AirtableError(404, 'NOT_FOUND', 'Could not find what you are looking for')
+
+        def _handle(self, method):
+            url = urlsplit(self.path)
+            parts = [unquote(part) for part in url.path.strip('/').split('/')]
+            try:
+                body = self._read_json()
+                if method == 'GET' and parts == ['_stats']:
+                    self._send_json(200, state.snapshot())
+                    return
+                if not self.headers.get('Authorization', '').startswith('Bearer '):
+                    raise AirtableError(401, 'AUTHENTICATION_REQUIRED', 'Authentication required')
+                base = parts[1] if len(parts) > 1 else ''
+                state.count('requests')
+                state.delay()
+                if state.throttled(base):
+                    state.count('throttled')
+                    self._send_json(429, {'errors': [{'error': 'RATE_LIMIT_REACHED',
+                                                      'message': 'Rate limit exceeded. Please try again later'}]})
+                    return
+                self._send_json(200, self._dispatch(method, parts, url.query, body))
+            except AirtableError as e:
+                state.count(f"error{e.status}")
+                self._send_json(e.status, e.body())
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_POST(self):
+            self._handle('POST')
+
+        def do_PATCH(self):
+            self._handle('PATCH')
+
+        def do_PUT(self):
+            self._handle('PUT')
+
+        def do_DELETE(self):
+            self._handle('DELETE')
+
+    return Handler
+
+
+def start_server(host='127.0.0.1', port=8766, seed=None, **state_options):
+    """Start the stand-in in a background thread and return the server"""
+    state = AirtableState(**state_options)
+    if seed:
+        state.seed(seed)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Airtable REST API stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--rate-limit', type=int, default=RATE_LIMIT,
+                        help='Requests per second per base before a 429, 0 for no limit')
+    parser.add_argument('--penalty', type=float, default=0.0,
+                        help='Seconds a base keeps getting 429s after going over the limit (Airtable uses 30)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many more seconds, at random')
+    parser.add_argument('--seed', help='Data directory to load into the tables, e.g. data')
+    args = parser.parse_args()
+
+    state = AirtableState(args.rate_limit, args.latency, args.jitter, args.penalty)
+    if args.seed:
+        for name, count in state.seed(args.seed).items():
+            print(f"Seeded {name} with {count} records")
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    print(f"Airtable stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped stand-in\n{json.dumps(state.snapshot(), indent=2)}")
+
+
+if __name__ == '__main__':
+    main()
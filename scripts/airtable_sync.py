@@ -0,0 +1,74 @@
+import os
+import json
+import argparse
+from bootstrap import load_env, lazy_import
+
+pyairtable = lazy_import('pyairtable')
+
+load_env()
+
+_api = None
+
+
+def get_table(table_name):
+    """Airtable table handle, sharing one API client per process"""
+    global _api
+    api_key = os.getenv('AIRTABLE_API_KEY')
+    if not api_key:
+        raise ValueError("AIRTABLE_API_KEY environment variable is required")
+    base_id = os.getenv('AIRTABLE_BASE_ID')
+    if not base_id:
+        raise ValueError("AIRTABLE_BASE_ID environment variable is required")
+    if _api is None:
+        # AIRTABLE_ENDPOINT_URL points the client at another server, e.g. scripts/airtable_standin.py
+        _api = pyairtable.Api(api_key, endpoint_url=os.getenv('AIRTABLE_ENDPOINT_URL', 'https://api.airtable.com'))
+    return _api.table(base_id, table_name)
+
+
+def upsert_records(table_name, id_field, records):
+    """Create or update records matched on id_field, 10 per request
+
+    Unlike pushData.py this neither downloads the table nor touches records
+    that are not passed in. Returns (created, updated) counts.
+    """
+    records = [r for r in records if r.get(id_field)]
+    if not records:
+        return 0, 0
+    result = get_table(table_name).batch_upsert([{'fields': r} for r in records], key_fields=[id_field])
+    created = len(result.get('createdRecords', []))
+    updated = len(result.get('updatedRecords', []))
+    return created, updated
+
+
+def load_swarm_records(swarm_ids):
+    records = []
+    for swarm_id in swarm_ids:
+        try:
+            with open(f'data/swarms/{swarm_id}.json', 'r', encoding='utf-8') as f:
+                records.append(json.load(f))
+        except Exception as e:
+            print(f"Error loading swarm {swarm_id}: {str(e)}")
+    return records
+
+
+def upsert_swarms(swarm_ids):
+    """Push only the given swarms from data/swarms to the Swarms table"""
+    swarm_ids = sorted(set(swarm_ids))
+    if not swarm_ids:
+        print("No swarm changes to sync")
+        return 0, 0
+    print(f"\nSyncing {len(swarm_ids)} swarms to Airtable: {', '.join(swarm_ids)}")
+    created, updated = upsert_records('Swarms', 'swarmId', load_swarm_records(swarm_ids))
+    print(f"Airtable sync complete: {created} created, {updated} updated")
+    return created, updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Push selected swarms to Airtable')
+    parser.add_argument('swarm_ids', nargs='+')
+    args = parser.parse_args()
+    upsert_swarms(args.swarm_ids)
+
+
+if __name__ == '__main__':
+    main()
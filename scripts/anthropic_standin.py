@@ -0,0 +1,165 @@
+# Local stand-in for the Anthropic Messages and Message Batches endpoints.
+# Point the generators at it with ANTHROPIC_BASE_URL=http://127.0.0.1:8765
+# to exercise batch_generate.py without spending API credits. Responses are
+# canned text derived from the request, so runs are deterministic. Batch
+# results come back in reverse request order, as the real API does not keep
+# the order, so callers must match them by custom_id.
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def fake_message(params):
+    """Build a Messages API response for request params"""
+    last = params.get('messages', [{}])[-1].get('content', '')
+    if isinstance(last, list):
+        last = ' '.join(block.get('text', '') for block in last if isinstance(block, dict))
+    # The system prompt digest tells apart requests that share a user turn
+    digest = hashlib.sha1(str(params.get('system', '')).encode('utf-8')).hexdigest()[:8]
+    text = f"[stand-in {digest}] {str(last)[:120]}"
+    return {
+        'id': f"msg_{uuid.uuid4().hex[:24]}",
+        'type': 'message',
+        'role': 'assistant',
+        'model': params.get('model', 'stand-in'),
+        'content': [{'type': 'text', 'text': text}],
+        'stop_reason': 'end_turn',
+        'stop_sequence': None,
+        'usage': {'input_tokens': len(params.get('system', '')) // 4, 'output_tokens': len(text) // 4}
+    }
+
+
+class StandinState:
+    def __init__(self, processing_delay=2.0):
+        self.processing_delay = processing_delay
+        self.batches = {}
+        self.lock = threading.Lock()
+
+    def batch_object(self, batch, base_url):
+        ended = time.time() - batch['created'] >= self.processing_delay
+        total = len(batch['requests'])
+        return {
+            'id': batch['id'],
+            'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': {
+                'processing': 0 if ended else total,
+                'succeeded': total if ended else 0,
+                'errored': 0,
+                'canceled': 0,
+                'expired': 0
+            },
+            'created_at': _iso(batch['created']),
+            'expires_at': _iso(batch['created'] + 24 * 3600),
+            'ended_at': _iso(batch['created'] + self.processing_delay) if ended else None,
+            'cancel_initiated_at': None,
+            'archived_at': None,
+            'results_url': f"{base_url}/v1/messages/batches/{batch['id']}/results" if ended else None
+        }
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _base_url(self):
+            host, port = self.server.server_address[:2]
+            return f"http://{host}:{port}"
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_json(self):
+            length = int(self.headers.get('Content-Length', 0))
+            return json.loads(self.rfile.read(length) or b'{}')
+
+        def do_POST(self):
+            path = self.path.split('?')[0]
+            if path == '/v1/messages':
+                self._send_json(200, fake_message(self._read_json()))
+            elif path == '/v1/messages/batches':
+                body = self._read_json()
+                batch = {
+                    'id': f"msgbatch_{uuid.uuid4().hex[:24]}",
+                    'created': time.time(),
+                    'requests': body.get('requests', [])
+                }
+                with state.lock:
+                    state.batches[batch['id']] = batch
+                self._send_json(200, state.batch_object(batch, self._base_url()))
+            else:
+                self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': path}})
+
+        def do_GET(self):
+            parts = self.path.split('?')[0].strip('/').split('/')
+            if parts[:3] != ['v1', 'messages', 'batches'] or len(parts) < 4:
+                self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': self.path}})
+                return
+            with state.lock:
+                batch = state.batches.get(parts[3])
+            if not batch:
+                self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': parts[3]}})
+                return
+
+            if len(parts) == 4:
+                self._send_json(200, state.batch_object(batch, self._base_url()))
+                return
+
+            # Results are streamed as JSONL, one line per request
+            lines = []
+            for request in reversed(batch['requests']):
+                lines.append(json.dumps({
+                    'custom_id': request['custom_id'],
+                    'result': {'type': 'succeeded', 'message': fake_message(request['params'])}
+                }))
+            payload = ('\n'.join(lines) + '\n').encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/binary')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def start_server(host='127.0.0.1', port=8765, processing_delay=2.0):
+    """Start the stand-in in a background thread and return the server"""
+    state = StandinState(processing_delay)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Anthropic Messages/Batches stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=2.0, help='Seconds before a batch reports ended')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(StandinState(args.delay)))
+    print(f"Anthropic stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped stand-in")
+
+
+if __name__ == '__main__':
+    main()
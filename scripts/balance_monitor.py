@@ -0,0 +1,200 @@
+import os
+import json
+import glob
+import time
+import argparse
+from solders.pubkey import Pubkey
+from spl.token.instructions import get_associated_token_address
+from bootstrap import setup_console, load_env, lazy_import
+from distribution_engine import COMPUTE_DECIMALS, to_base_units, format_amount
+from tx_packer import (create_ata_idempotent_ix, transfer_checked_ix, fetch_accounts, token_account_amount,
+                       pack_instructions, CREATE_ATA_UNITS, TRANSFER_UNITS)
+
+# Force UTF-8 encoding
+setup_console()
+
+load_env()
+
+solana_rpc = lazy_import('solana.rpc.api')
+
+COMPUTE_TOKEN = "B1N1HcMm4RysYz4smsXwmk2UnS8NziqKCM6Ho8i62vXo"
+
+# Hot wallet limits from docs/tx-specs.md, in whole $COMPUTE
+REFILL_THRESHOLD = int(os.getenv('REFILL_THRESHOLD', 500_000))
+MAX_BALANCE = int(os.getenv('MAX_HOT_WALLET_BALANCE', 2_000_000))
+MAX_TX_AMOUNT = int(os.getenv('MAX_TX_AMOUNT', 1_000_000))
+
+# Balances are cached per token account for a short time
+BALANCE_CACHE = os.getenv('BALANCE_CACHE', 'cache/hot_wallet_balances.json')
+BALANCE_TTL = float(os.getenv('BALANCE_TTL', 30))
+
+def load_hot_wallets():
+    """Map swarm ids to their hot wallet address"""
+    wallets = {}
+    for file in glob.glob('data/swarms/*.json'):
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                swarm = json.load(f)
+            if swarm.get('hotWallet'):
+                wallets[swarm['swarmId']] = swarm['hotWallet']
+        except Exception as e:
+            print(f"Error loading {file}: {str(e)}")
+    return wallets
+
+def compute_mint():
+    return Pubkey.from_string(os.getenv('COMPUTE_TOKEN_ADDRESS') or COMPUTE_TOKEN)
+
+def load_cache():
+    try:
+        with open(BALANCE_CACHE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_cache(cache):
+    os.makedirs(os.path.dirname(BALANCE_CACHE), exist_ok=True)
+    temp_file = BALANCE_CACHE + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+    os.replace(temp_file, BALANCE_CACHE)
+
+def invalidate(token_accounts):
+    """Drop cached balances, e.g. after sending transfers to these accounts"""
+    cache = load_cache()
+    for address in token_accounts:
+        cache.pop(str(address), None)
+    save_cache(cache)
+
+def fetch_balances(client, wallets, mint=None, ttl=BALANCE_TTL):
+    """Current $COMPUTE balance of every wallet in base units
+
+    Takes {name: wallet address} and returns {name: {'wallet', 'tokenAccount',
+    'amount', 'exists', 'fetchedAt'}}. Only token accounts whose cached
+    balance is older than ttl are fetched, 100 per getMultipleAccounts call.
+    """
+    mint = mint or compute_mint()
+    token_accounts = {name: str(get_associated_token_address(Pubkey.from_string(wallet), mint))
+                      for name, wallet in wallets.items()}
+    cache = load_cache()
+    now = time.time()
+    stale = [address for address in set(token_accounts.values())
+             if now - cache.get(address, {}).get('fetchedAt', 0) > ttl]
+    if stale:
+        for address, account in fetch_accounts(client, stale).items():
+            cache[address] = {
+                'amount': token_account_amount(account) if account is not None else 0,
+                'exists': account is not None,
+                'fetchedAt': now
+            }
+        save_cache(cache)
+
+    return {name: {'wallet': wallets[name], 'tokenAccount': address, **cache[address]}
+            for name, address in token_accounts.items()}
+
+def plan_refills(balances, threshold=REFILL_THRESHOLD, max_balance=MAX_BALANCE, max_tx_amount=MAX_TX_AMOUNT):
+    """Top-ups for every wallet below threshold, bringing it back to max_balance
+
+    Each top-up is a single transfer. Those above max_tx_amount exceed the
+    autonomous per-tx cap and are held for manual approval instead of being
+    split. Returns (refills, held), lists of {'swarmId', 'wallet', 'balance',
+    'amount', 'createAccount'} in base units.
+    """
+    threshold, max_balance, max_tx = to_base_units(threshold), to_base_units(max_balance), to_base_units(max_tx_amount)
+    refills, held = [], []
+    for swarm_id, entry in sorted(balances.items()):
+        if entry['amount'] >= threshold:
+            continue
+        amount = max_balance - entry['amount']
+        (held if amount > max_tx else refills).append({
+            'swarmId': swarm_id,
+            'wallet': entry['wallet'],
+            'balance': entry['amount'],
+            'amount': amount,
+            'createAccount': not entry['exists']
+        })
+    return refills, held
+
+def refill_items(treasury_pubkey, refills, mint=None):
+    """Packer items for refill plans; each item carries its amount for the per-tx cap"""
+    mint = mint or compute_mint()
+    items = []
+    for refill in refills:
+        wallet = Pubkey.from_string(refill['wallet'])
+        instructions = [transfer_checked_ix(treasury_pubkey, wallet, mint, refill['amount'], COMPUTE_DECIMALS)]
+        units = TRANSFER_UNITS
+        if refill['createAccount']:
+            instructions.insert(0, create_ata_idempotent_ix(treasury_pubkey, wallet, mint))
+            units += CREATE_ATA_UNITS
+        items.append((instructions, units, refill['swarmId'], refill['amount']))
+    return items
+
+def execute_refills(client, refills):
+    """Send all refills from the treasury as one pipelined batch"""
+    from keystore import load_treasury_wallet
+    from tx_executor import TxExecutor
+
+    treasury = load_treasury_wallet()
+    if not treasury:
+        print("Failed to load treasury wallet")
+        return []
+
+    treasury_balance = fetch_balances(client, {'treasury': str(treasury.pubkey())}, ttl=0)['treasury']['amount']
+    needed = sum(r['amount'] for r in refills)
+    if treasury_balance < needed:
+        print(f"Error: treasury holds {format_amount(treasury_balance)} COMPUTE, {format_amount(needed)} needed")
+        return []
+
+    packed = pack_instructions(treasury.pubkey(), refill_items(treasury.pubkey(), refills),
+                               max_amount=to_base_units(MAX_TX_AMOUNT))
+    print(f"\nSending {len(packed)} refill transactions...")
+
+    def report(result):
+        if result['status'] == 'confirmed':
+            print(f"Refilled {', '.join(result['labels'])}: {result['signature']}")
+        else:
+            print(f"Error refilling {', '.join(result['labels'])}: {result['error']}")
+
+    results = TxExecutor(client, treasury).execute(packed, on_result=report)
+    invalidate(get_associated_token_address(Pubkey.from_string(r['wallet']), compute_mint()) for r in refills)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Check hot wallet $COMPUTE balances and plan refills')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached balances')
+    parser.add_argument('--output', help='Write the refill plan to this JSON file')
+    parser.add_argument('--execute', action='store_true', help='Send the refills from the treasury')
+    args = parser.parse_args()
+
+    helius_url = os.getenv('NEXT_PUBLIC_HELIUS_RPC_URL')
+    if not helius_url:
+        print("Error: NEXT_PUBLIC_HELIUS_RPC_URL not found in environment variables")
+        return
+    client = solana_rpc.Client(helius_url)
+
+    wallets = load_hot_wallets()
+    balances = fetch_balances(client, wallets, ttl=0 if args.refresh else BALANCE_TTL)
+    print(f"Hot wallet balances ({len(balances)} swarms):")
+    for swarm_id, entry in sorted(balances.items(), key=lambda item: item[1]['amount']):
+        note = '' if entry['exists'] else ' (no token account)'
+        print(f"  {swarm_id:<20} {format_amount(entry['amount']):>14} COMPUTE{note}")
+
+    refills, held = plan_refills(balances)
+    total = sum(r['amount'] for r in refills)
+    print(f"\n{len(refills) + len(held)} wallets below {REFILL_THRESHOLD:,} COMPUTE, "
+          f"{format_amount(total)} COMPUTE to refill")
+    for refill in refills:
+        print(f"  {refill['swarmId']:<20} +{format_amount(refill['amount'])}")
+    for refill in held:
+        print(f"  {refill['swarmId']:<20} +{format_amount(refill['amount'])} held: above the {MAX_TX_AMOUNT:,} "
+              f"COMPUTE per-tx cap, needs manual approval")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'decimals': COMPUTE_DECIMALS, 'refills': refills, 'held': held}, f, indent=2, ensure_ascii=False)
+        print(f"Refill plan saved to {args.output}")
+
+    if args.execute and refills:
+        execute_refills(client, refills)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import os
+import json
+import glob
+import time
+import argparse
+import subprocess
+from datetime import datetime, timedelta
+from bootstrap import load_env, lazy_import
+
+import generate_specification as spec_gen
+import generate_conversation as conv_gen
+from llm_cache import cache_enabled, make_cache_key, get_cached, put_cached
+
+anthropic = lazy_import('anthropic')
+
+load_env()
+
+# Pending batches are recorded here so an interrupted run can be resumed
+BATCH_STATE_DIR = 'cache/batches'
+
+
+def load_collaboration_ids(status=None):
+    """List collaboration IDs, optionally filtered by status"""
+    collab_ids = []
+    for file in glob.glob('data/collaborations/*.json'):
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error reading {file}: {e}")
+            continue
+        if data.get('collaborationId') and (not status or data.get('status') == status):
+            collab_ids.append(data['collaborationId'])
+    return sorted(collab_ids)
+
+
+def build_specification_jobs(collab_ids, topic):
+    """Build one specification request per collaboration using the regular prompt builder"""
+    jobs = []
+    for collab_id in collab_ids:
+        collab, messages, existing_specs = spec_gen.load_collaboration(collab_id)
+        if not collab:
+            print(f"Skipping {collab_id}: collaboration not found")
+            continue
+        jobs.append({
+            'custom_id': f"spec-{collab_id}",
+            'kind': 'specification',
+            'collaborationId': collab_id,
+            'topic': topic,
+            'params': spec_gen.build_specification_request(collab, messages, existing_specs, topic)
+        })
+    return jobs
+
+
+def build_conversation_jobs(collab_ids, prompt):
+    """Build one next-message request per collaboration using the regular prompt builder"""
+    jobs = []
+    for collab_id in collab_ids:
+        collab = conv_gen.load_collaboration(collab_id)
+        if not collab:
+            print(f"Skipping {collab_id}: collaboration not found")
+            continue
+        existing_messages = conv_gen.load_messages(collab_id)
+        specifications = conv_gen.load_specifications(collab_id)
+        jobs.append({
+            'custom_id': f"msg-{collab_id}",
+            'kind': 'message',
+            'collaborationId': collab_id,
+            'prompt': prompt,
+            'params': conv_gen.build_conversation_request(collab, prompt, existing_messages, specifications)
+        })
+    return jobs
+
+
+def cache_key_for(job):
+    params = job['params']
+    return make_cache_key(params['model'], params['system'], params['messages'], params['max_tokens'])
+
+
+def save_batch_state(batch_id, jobs):
+    os.makedirs(BATCH_STATE_DIR, exist_ok=True)
+    with open(f"{BATCH_STATE_DIR}/{batch_id}.json", 'w', encoding='utf-8') as f:
+        json.dump({'batchId': batch_id, 'jobs': jobs}, f, indent=2, ensure_ascii=False)
+
+
+def load_batch_state(batch_id):
+    with open(f"{BATCH_STATE_DIR}/{batch_id}.json", 'r', encoding='utf-8') as f:
+        return json.load(f)['jobs']
+
+
+def clear_batch_state(batch_id):
+    try:
+        os.remove(f"{BATCH_STATE_DIR}/{batch_id}.json")
+    except OSError:
+        pass
+
+
+def submit_batch(client, jobs):
+    """Submit all jobs as a single Message Batch and return its ID"""
+    batch = client.messages.batches.create(
+        requests=[{'custom_id': job['custom_id'], 'params': job['params']} for job in jobs]
+    )
+    save_batch_state(batch.id, jobs)
+    print(f"Submitted batch {batch.id} with {len(jobs)} requests")
+    return batch.id
+
+
+def wait_for_batch(client, batch_id, poll_interval=30):
+    """Poll until the batch has finished processing"""
+    while True:
+        batch = client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(f"Batch {batch_id}: {batch.processing_status} "
+              f"(processing={counts.processing}, succeeded={counts.succeeded}, errored={counts.errored})")
+        if batch.processing_status == 'ended':
+            return batch
+        time.sleep(poll_interval)
+
+
+def collect_results(client, batch_id):
+    """Map custom_id -> response text for every succeeded request"""
+    texts = {}
+    for entry in client.messages.batches.results(batch_id):
+        if entry.result.type == 'succeeded' and entry.result.message.content:
+            texts[entry.custom_id] = entry.result.message.content[0].text
+        else:
+            print(f"Request {entry.custom_id} did not succeed: {entry.result.type}")
+    return texts
+
+
+def unique_message_data(collab, content):
+    """Build message data, bumping the timestamp until the messageId is unused"""
+    message_data = conv_gen.build_message_data(collab, content)
+    timestamp = datetime.fromisoformat(message_data['timestamp'].replace('Z', '+00:00'))
+    while os.path.exists(f"data/messages/{message_data['messageId']}.json"):
+        timestamp += timedelta(seconds=1)
+        message_data['timestamp'] = timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f') + 'Z'
+        message_data['messageId'] = conv_gen.generate_message_id(message_data['senderId'], message_data['timestamp'])
+    return message_data
+
+
+def fan_out(jobs, texts):
+    """Write each result to data/specifications or data/messages, returning the written paths"""
+    written = []
+    for job in jobs:
+        text = texts.get(job['custom_id'])
+        if not text:
+            continue
+        if cache_enabled():
+            put_cached(cache_key_for(job), text, job['params']['model'])
+
+        collab_id = job['collaborationId']
+        if job['kind'] == 'specification':
+            _, _, existing_specs = spec_gen.load_collaboration(collab_id)
+            specification = spec_gen.save_specification(collab_id, job['topic'], text, existing_specs)
+            path = f"data/specifications/{specification['specificationId']}.json"
+        else:
+            collab = conv_gen.load_collaboration(collab_id)
+            message_data = unique_message_data(collab, text)
+            conv_gen.save_message(message_data)
+            path = f"data/messages/{message_data['messageId']}.json"
+        print(f"Saved {path}")
+        written.append(path)
+    return written
+
+
+def git_commit_all(paths, description):
+    """Commit and push all generated files in one commit"""
+    if not paths:
+        return
+    try:
+        subprocess.run(["git", "add"] + paths, check=True)
+        subprocess.run(["git", "commit", "-m", f"Added {len(paths)} {description} from batch"], check=True)
+        subprocess.run(["git", "push"], check=True)
+        print("\nGenerated files committed and pushed to repository")
+    except subprocess.CalledProcessError as e:
+        print(f"Error in git operations: {e}")
+
+
+def run_batch(jobs, no_cache=False, poll_interval=30, commit=True, resume_batch_id=None):
+    """Serve cached jobs locally, submit the rest as one batch and fan the results out"""
+    client = anthropic.Client(api_key=os.getenv('ANTHROPIC_API_KEY'))
+
+    texts = {}
+    if resume_batch_id:
+        jobs = load_batch_state(resume_batch_id)
+        pending = jobs
+    else:
+        pending = []
+        for job in jobs:
+            cached = get_cached(cache_key_for(job)) if cache_enabled(no_cache) else None
+            if cached is not None:
+                texts[job['custom_id']] = cached
+            else:
+                pending.append(job)
+        if texts:
+            print(f"{len(texts)} requests served from cache")
+
+    if pending:
+        batch_id = resume_batch_id or submit_batch(client, pending)
+        wait_for_batch(client, batch_id, poll_interval)
+        texts.update(collect_results(client, batch_id))
+        clear_batch_state(batch_id)
+
+    written = fan_out(jobs, texts)
+    print(f"\n{len(written)}/{len(jobs)} results written")
+
+    if commit and written:
+        description = 'specifications' if jobs[0]['kind'] == 'specification' else 'messages'
+        git_commit_all(written, description)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate specifications or messages for many collaborations in one Message Batch')
+    parser.add_argument('kind', choices=['specifications', 'conversations'])
+    parser.add_argument('text', nargs='?', help='Specification topic or conversation prompt')
+    parser.add_argument('--collabs', help='Comma-separated collaboration IDs (default: all matching --status)')
+    parser.add_argument('--status', default='active', help="Collaboration status filter, 'any' for all (default: active)")
+    parser.add_argument('--poll-interval', type=float, default=30, help='Seconds between batch status checks')
+    parser.add_argument('--resume', metavar='BATCH_ID', help='Collect results of a previously submitted batch')
+    parser.add_argument('--no-commit', action='store_true', help='Skip git add/commit/push of generated files')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore cached responses')
+    args = parser.parse_args()
+
+    if not args.resume and not args.text:
+        parser.error('a topic or prompt is required unless --resume is given')
+
+    jobs = []
+    if not args.resume:
+        if args.collabs:
+            collab_ids = list(dict.fromkeys(c.strip() for c in args.collabs.split(',') if c.strip()))
+        else:
+            collab_ids = load_collaboration_ids(None if args.status == 'any' else args.status)
+        print(f"Building {args.kind} requests for {len(collab_ids)} collaborations")
+
+        if args.kind == 'specifications':
+            jobs = build_specification_jobs(collab_ids, args.text)
+        else:
+            jobs = build_conversation_jobs(collab_ids, args.text)
+
+        if not jobs:
+            print("Nothing to generate")
+            return
+
+    run_batch(jobs, no_cache=args.no_cache, poll_interval=args.poll_interval,
+              commit=not args.no_commit, resume_batch_id=args.resume)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+import io
+import os
+import sys
+import json
+import glob
+import math
+import time
+import types
+import importlib
+import shutil
+import argparse
+import tempfile
+import contextlib
+from collections import Counter
+from datetime import datetime
+from synth_data import generate, parse_scale
+
+RESULTS_FILE = 'cache/bench_pipeline.json'
+DEFAULT_SCALES = '1x,10x'
+# Seconds one benchmark may take at one scale; larger scales are skipped once the estimate exceeds it
+TIME_BUDGET = 120
+# Typical round trip per request, used to model the network time the stubs leave out
+RTT = {'airtable': 0.25, 'anthropic': 8.0, 'telegram': 0.15}
+
+# The stubs keep every benchmark offline, whatever .env holds
+os.environ.setdefault('AIRTABLE_API_KEY', 'stub')
+os.environ.setdefault('AIRTABLE_BASE_ID', 'stub')
+os.environ.setdefault('ANTHROPIC_API_KEY', 'stub')
+os.environ.setdefault('MAIN_TELEGRAM_CHAT_ID', '-1001')
+os.environ.setdefault('KINKONG_TELEGRAM_BOT_TOKEN', 'stub')
+os.environ['LLM_CACHE'] = '0'
+
+
+class StubAirtableTable:
+    """In-memory table with the pyairtable Table methods the sync scripts use
+
+    Requests are counted the way Airtable bills them: listing returns 100
+    records per page and batch writes take 10 records per request.
+    """
+
+    def __init__(self, api, name):
+        self.api = api
+        self.name = name
+        self.records = {}  # record id -> fields
+
+    def _record(self, record_id):
+        return {'id': record_id, 'createdTime': '2025-01-01T00:00:00.000Z', 'fields': dict(self.records[record_id])}
+
+    def _new_id(self):
+        return f"rec{len(self.records):014d}"
+
+    def all(self, max_records=None, **options):
+        ids = list(self.records)[:max_records]
+        self.api.calls['airtable'] += max(1, math.ceil(len(ids) / 100))
+        return [self._record(record_id) for record_id in ids]
+
+    def first(self, **options):
+        records = self.all(max_records=1)
+        return records[0] if records else None
+
+    def create(self, fields, typecast=False):
+        self.api.calls['airtable'] += 1
+        record_id = self._new_id()
+        self.records[record_id] = dict(fields)
+        return self._record(record_id)
+
+    def update(self, record_id, fields, replace=False, typecast=False):
+        self.api.calls['airtable'] += 1
+        self.records[record_id] = dict(fields) if replace else {**self.records[record_id], **fields}
+        return self._record(record_id)
+
+    def batch_create(self, records, typecast=False):
+        self.api.calls['airtable'] += math.ceil(len(records) / 10)
+        created = []
+        for fields in records:
+            record_id = self._new_id()
+            self.records[record_id] = dict(fields)
+            created.append(self._record(record_id))
+        return created
+
+    def batch_update(self, records, replace=False, typecast=False):
+        self.api.calls['airtable'] += math.ceil(len(records) / 10)
+        for record in records:
+            self.records[record['id']] = {**self.records[record['id']], **record['fields']}
+        return [self._record(record['id']) for record in records]
+
+    def batch_upsert(self, records, key_fields, replace=False, typecast=False):
+        self.api.calls['airtable'] += math.ceil(len(records) / 10)
+        by_key = {tuple(fields.get(k) for k in key_fields): record_id for record_id, fields in self.records.items()}
+        created, updated = [], []
+        for record in records:
+            key = tuple(record['fields'].get(k) for k in key_fields)
+            if key in by_key:
+                self.records[by_key[key]].update(record['fields'])
+                updated.append(by_key[key])
+            else:
+                record_id = self._new_id()
+                self.records[record_id] = dict(record['fields'])
+                by_key[key] = record_id
+                created.append(record_id)
+        return {'createdRecords': created, 'updatedRecords': updated,
+                'records': [self._record(record_id) for record_id in created + updated]}
+
+
+class StubAirtableApi:
+    def __init__(self, api_key=None, **options):
+        self.tables = {}
+        self.calls = Counter()
+
+    def table(self, base_id, table_name):
+        if table_name not in self.tables:
+            self.tables[table_name] = StubAirtableTable(self, table_name)
+        return self.tables[table_name]
+
+    def seed(self, table_name, records):
+        """Fill a table without counting requests"""
+        table = self.table(None, table_name)
+        for fields in records:
+            table.records[table._new_id()] = dict(fields)
+        return self
+
+
+class StubAnthropic:
+    """Messages client returning a short canned reply"""
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.messages = self
+
+    def create(self, model, max_tokens, messages, system=None, **params):
+        self.calls['anthropic'] += 1
+        self.calls['anthropicInputChars'] += len(system or '') + sum(len(str(m.get('content'))) for m in messages)
+        text = types.SimpleNamespace(type='text', text=f"Stub reply after {len(messages)} messages.")
+        return types.SimpleNamespace(content=[text], usage=types.SimpleNamespace(input_tokens=0, output_tokens=0))
+
+
+class StubTelegramApp:
+    """Telegram Application whose bot records sendMessage calls"""
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.bot = self
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **options):
+        self.calls['telegram'] += 1
+        self.sent.append((chat_id, len(text)))
+
+    async def shutdown(self):
+        pass
+
+
+def install_stubs(calls):
+    """Route the Airtable, Anthropic and Telegram clients of every script to the stubs"""
+    pyairtable = types.ModuleType('pyairtable')
+    pyairtable.Api = StubAirtableApi
+    sys.modules['pyairtable'] = pyairtable
+    app = StubTelegramApp(calls)
+    anthropic = types.SimpleNamespace(Client=lambda **kwargs: StubAnthropic(calls),
+                                      Anthropic=lambda **kwargs: StubAnthropic(calls))
+    return types.SimpleNamespace(calls=calls, telegram_app=app, anthropic=anthropic)
+
+
+def load_dir(directory):
+    records = []
+    for path in sorted(glob.glob(f'data/{directory}/*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            records.append(json.load(f))
+    return records
+
+
+def busiest_collaboration():
+    counts = Counter(m.get('collaborationId') for m in load_dir('messages') if m.get('collaborationId'))
+    return counts.most_common(1)[0][0]
+
+
+# Each benchmark takes its script module, imported before output is captured,
+# and runs in the order listed; the ones that write into data/ come last
+
+def bench_relations(module, ctx):
+    module.analyze_swarm_relations()
+
+
+def bench_load_messages(module, ctx):
+    module.load_messages(ctx.collab_id)
+
+
+def bench_recap_prompt(module, ctx):
+    module.build_system_prompt(ctx.stubs.anthropic.Client(), module.DEFAULT_RECAP_SWARMS, no_cache=True)
+
+
+def bench_distributions(module, ctx):
+    module.calculate_distributions()
+
+
+def bench_watch_telegram(module, ctx):
+    module.get_telegram_app = lambda sender_id: ctx.stubs.telegram_app
+    handler = module.RepositoryChangeHandler()
+    try:
+        # Without a collaboration id the watcher scans data/messages to find it
+        handler.loop.run_until_complete(handler._send_telegram_message(ctx.message['content'], ctx.message['senderId']))
+    finally:
+        handler.loop.close()
+
+
+def bench_watch_airtable(module, ctx):
+    module.api = ctx.api = StubAirtableApi().seed('Messages', load_dir('messages'))
+    handler = module.RepositoryChangeHandler()
+    try:
+        handler.loop.run_until_complete(handler.push_to_airtable(ctx.message_path))
+    finally:
+        handler.loop.close()
+
+
+def bench_push_messages(module, ctx):
+    messages = load_dir('messages')
+    module.api = ctx.api = StubAirtableApi().seed('Messages', messages[:len(messages) // 2])
+    module.push_messages()
+
+
+def bench_upsert_messages(module, ctx):
+    messages = load_dir('messages')
+    module._api = ctx.api = StubAirtableApi().seed('Messages', messages[:len(messages) // 2])
+    module.upsert_records('Messages', 'messageId', messages)
+
+
+def bench_generate_conversation(module, ctx):
+    module.anthropic = ctx.stubs.anthropic
+    module.generate_conversation(ctx.collab_id, 'Status update on the next milestone', 1, no_cache=True)
+
+
+def bench_pull_messages(module, ctx):
+    module.api = ctx.api = StubAirtableApi().seed('Messages', load_dir('messages'))
+    module.fetch_and_save_table('Messages', 'messageId')
+
+
+# name -> (module, benchmark)
+BENCHMARKS = {
+    'relations': ('list_swarm_relations', bench_relations),
+    'load_messages': ('generate_conversation', bench_load_messages),
+    'recap_prompt': ('send_recap', bench_recap_prompt),
+    'distributions': ('calculate_distributions', bench_distributions),
+    'watch_telegram': ('watch_changes', bench_watch_telegram),
+    'watch_airtable': ('watch_changes', bench_watch_airtable),
+    'push_messages': ('pushData', bench_push_messages),
+    'upsert_messages': ('airtable_sync', bench_upsert_messages),
+    'generate_conversation': ('generate_conversation', bench_generate_conversation),
+    'pull_messages': ('pullData', bench_pull_messages),
+}
+
+
+def run_benchmark(name, ctx, repeats, budget):
+    """Time one benchmark with its output discarded
+
+    The first run sees cold caches (file indexes, summaries), later runs
+    warm ones; a run that takes a quarter of the budget is not repeated.
+    """
+    module_name, fn = BENCHMARKS[name]
+    module = importlib.import_module(module_name)
+    times = []
+    calls = Counter()
+    for _ in range(repeats):
+        ctx.stubs.calls.clear()
+        ctx.api = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn(module, ctx)
+            times.append(time.perf_counter() - start)
+        if len(times) == 1:
+            calls = Counter(ctx.stubs.calls)
+            if ctx.api is not None:
+                calls.update(ctx.api.calls)
+        if sum(times) > budget / 4:
+            break
+    network = sum(calls.get(service, 0) * rtt for service, rtt in RTT.items())
+    return {'first': round(times[0], 4), 'best': round(min(times), 4), 'runs': len(times),
+            'calls': dict(calls), 'modeledNetwork': round(network, 2)}
+
+
+def run_scale(scale, names, stubs, repeats, budget, estimates, keep=False):
+    """Generate a dataset at scale and run the benchmarks against it"""
+    root = tempfile.mkdtemp(prefix=f"kinos-bench-{scale}x-")
+    cwd = os.getcwd()
+    # Anchored at today so the recap's lookback window has messages in it
+    end = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    start = time.perf_counter()
+    counts = generate(root, scale, end=end)
+    print(f"\n{scale}x: {counts['messages']:,} messages, {counts['swarms']:,} swarms, "
+          f"{counts['collaborations']:,} collaborations generated in {time.perf_counter() - start:.1f}s ({root})")
+
+    results = {}
+    os.chdir(root)
+    try:
+        ctx = types.SimpleNamespace(stubs=stubs, api=None, collab_id=busiest_collaboration())
+        ctx.message_path = sorted(glob.glob('data/messages/*.json'))[-1]
+        with open(ctx.message_path, 'r', encoding='utf-8') as f:
+            ctx.message = json.load(f)
+        for name in names:
+            previous = estimates.get(name)
+            if previous and previous[1] * scale / previous[0] > budget:
+                estimate = previous[1] * scale / previous[0]
+                result = {'skipped': f"estimated {estimate:.0f}s, over the {budget}s budget"}
+            else:
+                try:
+                    result = run_benchmark(name, ctx, repeats, budget)
+                    estimates[name] = (scale, result['first'])
+                except ImportError as e:
+                    result = {'skipped': str(e)}
+                except Exception as e:
+                    result = {'error': f"{type(e).__name__}: {e}"}
+            results[name] = result
+            print(f"  {name:<24}{format_result(result)}")
+    finally:
+        os.chdir(cwd)
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+    return {'counts': counts, 'end': end.isoformat(), 'results': results}
+
+
+def format_result(result, baseline=None):
+    if 'skipped' in result:
+        return f"skipped ({result['skipped']})"
+    if 'error' in result:
+        return f"error ({result['error']})"
+    line = f"{result['best']:>9.4f}s best  {result['first']:>9.4f}s first"
+    if result['calls']:
+        line += '  ' + ', '.join(f"{service} {count:,}" for service, count in sorted(result['calls'].items()))
+    if result['modeledNetwork']:
+        line += f"  (+{result['modeledNetwork']:.1f}s network)"
+    if baseline and 'best' in baseline and baseline['best']:
+        line += f"  x{result['best'] / baseline['best']:.2f} vs baseline"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the core functions of the scripts on synthetic data')
+    parser.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run, defaults to all: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help='Comma-separated scales, e.g. 1x,10x,1000x')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--budget', type=float, default=TIME_BUDGET, help='Seconds allowed per benchmark and scale')
+    parser.add_argument('--output', default=RESULTS_FILE, help='Where to save the results')
+    parser.add_argument('--baseline', help='Earlier results to compare against')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated data trees')
+    args = parser.parse_args()
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['scales']
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    stubs = install_stubs(Counter())
+    estimates = {}  # benchmark -> (scale, seconds) of its last run, to skip hopeless scales
+    scales = {}
+    for label in args.scales.split(','):
+        scale = parse_scale(label.strip())
+        scales[f"{scale}x"] = run_scale(scale, names, stubs, args.repeats, args.budget, estimates, args.keep)
+
+    if baseline:
+        print("\nCompared with baseline:")
+        for label, scale_results in scales.items():
+            for name, result in scale_results['results'].items():
+                previous = baseline.get(label, {}).get('results', {}).get(name)
+                if previous and 'best' in result:
+                    print(f"  {label:>6} {name:<24}{format_result(result, previous)}")
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'measuredAt': datetime.now().isoformat(), 'python': sys.version.split()[0],
+                   'rtt': RTT, 'scales': scales}, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
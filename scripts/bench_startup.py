@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Scripts run directly by operators or the GUI
+ENTRY_POINTS = [
+    'airtable_sync', 'balance_monitor', 'batch_generate', 'calculate_distributions', 'check_encoding',
+    'create_hot_wallets', 'create_token_accounts', 'create_treasury_wallet', 'distribution_ledger',
+    'fund_hot_wallets', 'generate_conversation', 'generate_specification', 'get_global_conversation_context',
+    'keystore', 'list_swarm_relations', 'message_log', 'phantom_pay', 'pullData', 'pushData',
+    'search_index', 'send_recap', 'vector_index', 'watch_changes', 'weekly_payments'
+]
+RESULTS_FILE = 'cache/startup_bench.json'
+
+
+def parse_importtime(stderr):
+    """Per-module (self, cumulative) microseconds from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nesting is shown by indentation; top-level imports have none after the bar
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def measure(entry_point, repeats=3):
+    """Best-of-N cold import of an entry point module in a fresh interpreter
+
+    Importing runs everything at module level, which is what every run of
+    the script pays before main() starts.
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {entry_point}"],
+            capture_output=True, text=True, env={**os.environ, 'PYTHONPATH': SCRIPTS_DIR}, timeout=120
+        )
+        wall = time.perf_counter() - start
+        modules = parse_importtime(process.stderr)
+        error = None
+        if process.returncode != 0:
+            error = (process.stderr.strip().splitlines() or ['failed'])[-1]
+        result = {
+            'wall': round(wall, 4),
+            'imports': round(sum(m[0] for m in modules.values()) / 1e6, 4),
+            'heaviest': sorted(((name, round(m[1] / 1e6, 4)) for name, m in modules.items() if m[2] == 1),
+                               key=lambda item: -item[1])[:5],
+            'error': error
+        }
+        if best is None or result['wall'] < best['wall']:
+            best = result
+    return best
+
+
+def load_results(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start import time of every script entry point')
+    parser.add_argument('entry_points', nargs='*', help='Modules to measure, defaults to all entry points')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=RESULTS_FILE, help='Where to save the results')
+    parser.add_argument('--baseline', help='Earlier results to compare against, defaults to the output file')
+    args = parser.parse_args()
+
+    baseline = load_results(args.baseline or args.output)
+    baseline_results = baseline['results'] if baseline else {}
+
+    results = {}
+    print(f"{'entry point':<34}{'wall':>8}{'imports':>9}{'delta':>9}  heaviest imports")
+    for entry_point in args.entry_points or ENTRY_POINTS:
+        result = measure(entry_point, args.repeats)
+        results[entry_point] = result
+        previous = baseline_results.get(entry_point)
+        delta = f"{result['wall'] - previous['wall']:+.2f}" if previous else ''
+        heaviest = ', '.join(f"{name} {seconds:.2f}" for name, seconds in result['heaviest'][:3])
+        note = f"  ({result['error']})" if result['error'] else ''
+        print(f"{entry_point:<34}{result['wall']:>7.2f}s{result['imports']:>8.2f}s{delta:>9}  {heaviest}{note}")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'measuredAt': datetime.now().isoformat(), 'python': sys.version.split()[0], 'results': results},
+                  f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
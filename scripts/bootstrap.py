@@ -0,0 +1,79 @@
+import os
+import sys
+import stat
+import types
+import socket
+import struct
+import codecs
+import importlib
+
+_env_loaded = False
+
+
+def setup_console():
+    """Force UTF-8 on stdin, stdout and stderr and for locale-based defaults"""
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+    if sys.stdin is not None and sys.stdin.encoding != 'utf-8':
+        sys.stdin = codecs.getreader('utf-8')(sys.stdin.buffer, 'strict')
+
+    import locale
+    locale.getpreferredencoding = lambda *args: 'UTF-8'
+
+
+def load_env(override=False):
+    """Load .env once per process, again only when override is requested"""
+    global _env_loaded
+    if _env_loaded and not override:
+        return
+    from dotenv import load_dotenv
+    load_dotenv(override=override)
+    _env_loaded = True
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self.__dict__['_module'] is None:
+            self.__dict__['_module'] = importlib.import_module(self.__name__)
+        return self.__dict__['_module']
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """Return name if already imported, otherwise a placeholder that imports it when used
+
+    Heavy SDKs (anthropic, telegram, solana, pyairtable) cost seconds to
+    import, so modules that only need them on some paths import them lazily.
+    """
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def private_dir(path, create=False):
+    """Whether path is a directory owned by this user and closed to everyone else"""
+    if create:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def peer_uid(sock):
+    """uid of the process at the other end of a Unix socket, None where SO_PEERCRED is missing"""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
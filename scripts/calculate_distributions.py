@@ -1,22 +1,19 @@
 import glob
 import json
 import os
-import sys
-import codecs
-import subprocess
+import argparse
 from datetime import datetime
 from pathlib import Path
+from distribution_engine import (
+    DEFAULT_REVENUE_SHARE, compute_distributions_vectorized, grand_totals, reconcile,
+    to_base_units, format_amount
+)
+from distribution_ledger import DistributionLedger, iso_week, parse_week
+from airtable_sync import upsert_swarms
+from bootstrap import setup_console
 
 # Force UTF-8 encoding for stdin/stdout/stderr
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-if sys.stdin.encoding != 'utf-8':
-    sys.stdin = codecs.getreader('utf-8')(sys.stdin.buffer, 'strict')
-
-# Set default encoding to UTF-8
-import locale
-locale.getpreferredencoding = lambda: 'UTF-8'
+setup_console()
 
 def load_json_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -44,89 +41,25 @@ def load_active_collaborations():
     return collabs
 
 def calculate_distributions():
+    """Weekly distributions per provider, in integer $COMPUTE base units"""
     swarms = load_swarms()
     active_collabs = load_active_collaborations()
     
-    # Group collaborations by provider
-    provider_totals = {}
-    
-    for collab in active_collabs:
-        provider_id = collab['providerSwarmId']
-        if provider_id not in provider_totals:
-            provider_totals[provider_id] = {
-                'total': 0,
-                'collaborations': []
-            }
-        provider_totals[provider_id]['total'] += collab['price']
-        provider_totals[provider_id]['collaborations'].append(collab)
-
-    results = {}
-    
-    for provider_id, data in provider_totals.items():
-        total = data['total']
-        provider_swarm = swarms[provider_id]
-        revenue_share = provider_swarm.get('revenueShare', 10)  # Default to 10% if not specified
-        
-        # Calculate burns (50% of total)
-        burn_amount = total * 0.5
-        burn_compute = burn_amount * 0.9  # 90% of burn in COMPUTE
-        burn_ubc = burn_amount * 0.1     # 10% of burn in UBC
-        
-        # Calculate redistribution (revenueShare% of total)
-        redistribution_amount = total * (revenue_share / 100)
-        redistribution_compute = redistribution_amount * 0.9  # 90% in COMPUTE
-        redistribution_ubc = redistribution_amount * 0.1     # 10% in UBC
-        
-        # Calculate net (remaining after burns and redistributions)
-        net_amount = total - burn_amount - redistribution_amount
-        
-        results[provider_id] = {
-            'total': total,
-            'burn': {
-                'total': burn_amount,
-                'compute': burn_compute,
-                'ubc': burn_ubc
-            },
-            'redistribution': {
-                'total': redistribution_amount,
-                'compute': redistribution_compute,
-                'ubc': redistribution_ubc,
-                'share': revenue_share
-            },
-            'net': net_amount,
-            'collaborations': [
-                {
-                    'id': c['collaborationId'],
-                    'client': c['clientSwarmId'],
-                    'price': c['price']
-                } for c in data['collaborations']
-            ]
-        }
+    revenue_shares = {
+        swarm_id: swarm.get('revenueShare', DEFAULT_REVENUE_SHARE)  # Default to 10% if not specified
+        for swarm_id, swarm in swarms.items()
+    }
+    results = compute_distributions_vectorized(active_collabs, revenue_shares)
     
+    # Parts must add up to each provider total and totals to all active prices
+    reconcile(results, sum(to_base_units(c['price']) for c in active_collabs))
     return results
 
 def calculate_grand_totals(results):
-    totals = {
-        'revenue': 0,
-        'burn_compute': 0,
-        'burn_ubc': 0,
-        'redistribution_compute': 0,
-        'redistribution_ubc': 0,
-        'net': 0
-    }
-    
-    for data in results.values():
-        totals['revenue'] += data['total']
-        totals['burn_compute'] += data['burn']['compute']
-        totals['burn_ubc'] += data['burn']['ubc']
-        totals['redistribution_compute'] += data['redistribution']['compute']
-        totals['redistribution_ubc'] += data['redistribution']['ubc']
-        totals['net'] += data['net']
-    
-    return totals
+    return grand_totals(results)
 
-def update_swarm_revenues(results):
-    """Update swarm weekly revenues based on distribution results and push to Airtable"""
+def update_swarm_revenues(ledger, week, swarm_ids):
+    """Set weeklyRevenue/totalRevenue of swarm_ids from the ledger and push to Airtable"""
     print("\nUpdating swarm revenues...")
     
     try:
@@ -142,25 +75,21 @@ def update_swarm_revenues(results):
                 print(f"Error loading {file}: {str(e)}")
                 continue
         
-        # Update revenues based on distribution results
-        for swarm_id, data in results.items():
+        # Revenues are derived from the ledger, so re-running a week changes nothing
+        for swarm_id in swarm_ids:
             if swarm_id in swarms:
-                # Update weekly revenue with net amount
-                swarms[swarm_id]['weeklyRevenue'] = int(data['net'])
-                swarms[swarm_id]['totalRevenue'] = swarms[swarm_id].get('totalRevenue', 0) + int(data['net'])
+                swarms[swarm_id].update(ledger.swarm_fields(swarm_id, week))
                 
                 try:
                     # Save updated swarm data
                     with open(f'data/swarms/{swarm_id}.json', 'w', encoding='utf-8') as f:
                         json.dump(swarms[swarm_id], f, indent=2, ensure_ascii=False)
-                    print(f"Updated {swarm_id} weekly revenue to {data['net']:,} $COMPUTE")
+                    print(f"Updated {swarm_id} weekly revenue to {format_amount(ledger.weekly_revenue(swarm_id, week))} $COMPUTE")
                 except Exception as e:
                     print(f"Error saving {swarm_id}: {str(e)}")
         
-        # Push only swarms to Airtable
-        print("\nPushing swarm updates to Airtable...")
-        subprocess.run(["python", "scripts/pushData.py", "--table", "Swarms"], check=True)
-        print("Swarm updates pushed to Airtable successfully")
+        # Push only the swarms changed by this run, in one batched upsert
+        upsert_swarms(swarm_ids)
         
     except Exception as e:
         print(f"Error updating swarm revenues: {str(e)}")
@@ -169,52 +98,65 @@ def format_results(results):
     output = []
     for provider_id, data in results.items():
         output.append(f"\n{provider_id.upper()} Weekly Distributions:")
-        output.append(f"Total Revenue: {data['total']:,} $COMPUTE")
+        output.append(f"Total Revenue: {format_amount(data['total'])} $COMPUTE")
         
         output.append("\nCollaborations:")
         for collab in data['collaborations']:
-            output.append(f"- {collab['client']}: {collab['price']:,} $COMPUTE")
+            output.append(f"- {collab['client']}: {format_amount(collab['price'])} $COMPUTE")
         
         output.append(f"\nBurns (50%):")
-        output.append(f"- {data['burn']['compute']:,.0f} $COMPUTE")
-        output.append(f"- {data['burn']['ubc']:,.0f} UBC")
+        output.append(f"- {format_amount(data['burn']['compute'])} $COMPUTE")
+        output.append(f"- {format_amount(data['burn']['ubc'])} UBC")
         
         output.append(f"\nRedistributions ({data['redistribution']['share']}%):")
-        output.append(f"- {data['redistribution']['compute']:,.0f} $COMPUTE")
-        output.append(f"- {data['redistribution']['ubc']:,.0f} UBC")
+        output.append(f"- {format_amount(data['redistribution']['compute'])} $COMPUTE")
+        output.append(f"- {format_amount(data['redistribution']['ubc'])} UBC")
         
-        output.append(f"\nNet Revenue: {data['net']:,.0f} $COMPUTE")
+        output.append(f"\nNet Revenue: {format_amount(data['net'])} $COMPUTE")
         output.append("-" * 50)
     
     # Add grand totals
     totals = calculate_grand_totals(results)
     output.append("\nGRAND TOTALS")
-    output.append(f"Total Weekly Revenue: {totals['revenue']:,} $COMPUTE")
+    output.append(f"Total Weekly Revenue: {format_amount(totals['revenue'])} $COMPUTE")
     output.append("\nTotal Burns:")
-    output.append(f"- {totals['burn_compute']:,.0f} $COMPUTE")
-    output.append(f"- {totals['burn_ubc']:,.0f} UBC")
+    output.append(f"- {format_amount(totals['burn_compute'])} $COMPUTE")
+    output.append(f"- {format_amount(totals['burn_ubc'])} UBC")
     output.append("\nTotal Redistributions:")
-    output.append(f"- {totals['redistribution_compute']:,.0f} $COMPUTE")
-    output.append(f"- {totals['redistribution_ubc']:,.0f} UBC")
-    output.append(f"\nTotal Net Revenue: {totals['net']:,.0f} $COMPUTE")
+    output.append(f"- {format_amount(totals['redistribution_compute'])} $COMPUTE")
+    output.append(f"- {format_amount(totals['redistribution_ubc'])} UBC")
+    output.append(f"\nTotal Net Revenue: {format_amount(totals['net'])} $COMPUTE")
     output.append("-" * 50)
     
     return "\n".join(output)
 
 def main():
+    parser = argparse.ArgumentParser(description='Calculate and record weekly distributions')
+    parser.add_argument('--week', help='ISO week (2025-W07) or a date in it, defaults to the current week')
+    args = parser.parse_args()
+    week = parse_week(args.week) if args.week else iso_week()
+    
     # Create reports directory if it doesn't exist
     Path('data/reports').mkdir(parents=True, exist_ok=True)
     
     results = calculate_distributions()
     print(format_results(results))
     
+    # Record the week; providers already in the ledger for it are skipped
+    ledger = DistributionLedger()
+    opening_totals = {swarm_id: swarm.get('totalRevenue', 0) for swarm_id, swarm in load_swarms().items()}
+    entries = ledger.record_week(week, results, opening_totals)
+    if not entries:
+        print(f"\nDistributions for {week} are already recorded, re-syncing swarm revenues from the ledger")
+    
     # Save to file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     with open(f'data/reports/distributions_{timestamp}.txt', 'w') as f:
         f.write(format_results(results))
     
-    # Update swarm revenues and push to Airtable
-    update_swarm_revenues(results)
+    # Revenue fields always come from the ledger, so a re-run also repairs a
+    # previous run that appended the week but failed to save or push swarms
+    update_swarm_revenues(ledger, week, sorted(p for p in results if ledger.is_recorded(week, p)))
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,210 @@
+import os
 import sys
-import codecs
+import json
+import mmap
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from bootstrap import setup_console, lazy_import
+
+np = lazy_import('numpy')
+
+setup_console()
+
+# Files are scanned in windows of this many bytes so memory stays bounded
+CHUNK_SIZE = 16 * 1024 * 1024
+# Longest pattern looked at, in bytes past a position (4-byte UTF-8 lead, mojibake)
+LOOKAHEAD = 4
+SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', os.cpu_count() or 4))
+ISSUES = ('invalid', 'control', 'mojibake')
+BOMS = {
+    b'\xef\xbb\xbf': 'utf-8',
+    b'\xff\xfe': 'utf-16-le',
+    b'\xfe\xff': 'utf-16-be',
+}
+
+
+def _followed_by(a, positions, k, low, top):
+    """Which of positions have a byte in [low, top] k bytes later"""
+    following = a[np.minimum(positions + k, len(a) - 1)]
+    return (positions + k < len(a)) & (following >= low) & (following <= top)
+
+
+def scan_window(window, offset, start, end, at_eof):
+    """Offsets of each issue at positions [start, end) of window, which begins at file offset
+
+    window extends up to LOOKAHEAD bytes either side of [start, end) so
+    sequences crossing a chunk boundary are judged with full context.
+    Whole-window passes are kept to a handful of comparisons.
+    """
+    a = window
+    n = len(a)
+    # ASCII control characters other than tab, newline and carriage return; newlines are
+    # masked out up front so positions are only collected when something is there
+    mask = a < 0x20
+    mask &= a != 0x0A
+    mask |= a == 0x7F
+    control = np.flatnonzero(mask) if mask.any() else np.zeros(0, dtype=np.intp)
+    control = control[(a[control] != 0x09) & (a[control] != 0x0D)]
+
+    if not (a >= 0x80).any():
+        empty = np.zeros(0, dtype=np.intp)
+        return {'invalid': empty, 'control': control[(control >= start) & (control < end)] + offset,
+                'mojibake': empty}, 0
+
+    # Lead bytes (C0..FF) are a small share of most text, so every rule that
+    # depends on a lead byte runs on their positions rather than the whole window
+    leads = np.flatnonzero(a >= 0xC0)
+    values = a[leads]
+
+    # Every continuation byte (80..BF, below -64 as a signed byte) must be claimed
+    # by a lead, and every position a lead claims must hold a continuation byte
+    expected = np.zeros(n + 3, dtype=bool)
+    for k, lead in ((1, 0xC0), (2, 0xE0), (3, 0xF0)):
+        if len(leads) > n // 16:
+            expected[k:n] |= a[:-k] >= lead  # dense non-ASCII text, e.g. CJK: shifting beats scattering
+        else:
+            expected[leads[values >= lead] + k] = True
+    invalid = expected[:n] != (a.view(np.int8) < -64)
+    # Bytes never valid in UTF-8: C0, C1 (overlong) and F5..FF
+    invalid[leads[(values >= 0xF5) | ((values & 0xFE) == 0xC0)]] = True
+
+    # Second-byte ranges that rule out overlong forms, surrogates and code points above U+10FFFF
+    for lead, low, top in ((0xE0, 0x80, 0x9F), (0xED, 0xA0, 0xBF), (0xF0, 0x80, 0x8F), (0xF4, 0x90, 0xBF)):
+        positions = leads[values == lead]
+        invalid[positions[_followed_by(a, positions, 1, low, top)]] = True
+
+    # A sequence cut off by the end of the file
+    if at_eof:
+        needed = (values >= 0xC0).astype(np.intp) + (values >= 0xE0) + (values >= 0xF0)
+        invalid[leads[leads + needed >= n]] = True
+
+    # UTF-8 encoded C1 controls (U+0080..U+009F), usually cp1252 decoded as latin-1
+    c2 = leads[values == 0xC2]
+    control = np.union1d(control, c2[_followed_by(a, c2, 1, 0x80, 0x9F)])
+
+    # UTF-8 text decoded as latin-1/cp1252 and encoded again: Ã© for é, â€™ for ’
+    c3 = leads[values == 0xC3]
+    mojibake = c3[(_followed_by(a, c3, 1, 0x82, 0x9F) & _followed_by(a, c3, 2, 0xC2, 0xC2) &
+                   _followed_by(a, c3, 3, 0x80, 0xBF)) |
+                  (_followed_by(a, c3, 1, 0xA2, 0xA2) & _followed_by(a, c3, 2, 0xE2, 0xE2) &
+                   _followed_by(a, c3, 3, 0x82, 0x82) & _followed_by(a, c3, 4, 0xAC, 0xAC))]
+
+    found = {
+        'invalid': np.flatnonzero(invalid[start:end]) + offset + start,
+        'control': control[(control >= start) & (control < end)] + offset,
+        'mojibake': mojibake[(mojibake >= start) & (mojibake < end)] + offset,
+    }
+    non_ascii = int(np.count_nonzero((leads >= start) & (leads < end)))
+    return found, non_ascii
+
+
+def scan_file(path, max_offsets=5):
+    """Summary of encoding issues in one file
+
+    The file is memory-mapped and checked in CHUNK_SIZE windows with
+    vectorized byte operations. Returns {path, size, bom, nonAscii,
+    invalid, control, mojibake, offsets}, where offsets holds the first
+    max_offsets positions of each issue, or {path, error}.
+    """
+    try:
+        size = os.path.getsize(path)
+        summary = {'path': path, 'size': size, 'bom': None, 'nonAscii': 0,
+                   **{issue: 0 for issue in ISSUES}, 'offsets': {}}
+        if size == 0:
+            return summary
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = window = np.frombuffer(mm, dtype=np.uint8)
+            try:
+                head = bytes(data[:3])
+                for bom, name in BOMS.items():
+                    if head.startswith(bom):
+                        summary['bom'] = name
+                        break
+                first = {issue: [] for issue in ISSUES}
+                chunk_start = 0
+                while chunk_start < size:
+                    chunk_end = min(chunk_start + CHUNK_SIZE, size)
+                    if size - chunk_end < LOOKAHEAD:
+                        chunk_end = size  # the last chunk holds any sequence cut off by the end of the file
+                    window_start = max(chunk_start - LOOKAHEAD, 0)
+                    window = data[window_start:min(chunk_end + LOOKAHEAD, size)]
+                    found, non_ascii = scan_window(window, window_start, chunk_start - window_start,
+                                                   chunk_end - window_start, chunk_end == size)
+                    summary['nonAscii'] += non_ascii
+                    for issue, positions in found.items():
+                        summary[issue] += len(positions)
+                        first[issue].extend(positions[:max_offsets - len(first[issue])].tolist())
+                    chunk_start = chunk_end
+                summary['offsets'] = {issue: offsets for issue, offsets in first.items() if offsets}
+            finally:
+                data = window = None  # release the views before the map closes
+        return summary
+    except (OSError, ValueError) as e:
+        return {'path': path, 'error': str(e)}
+
+
+def iter_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def has_issues(summary):
+    return 'error' in summary or summary['bom'] or any(summary[issue] for issue in ISSUES)
+
+
+def format_summary(summary):
+    if 'error' in summary:
+        return f"{summary['path']}: error {summary['error']}"
+    parts = [f"{summary[issue]} {issue}" for issue in ISSUES if summary[issue]]
+    if summary['bom']:
+        parts.insert(0, f"{summary['bom']} BOM")
+    offsets = '; '.join(f"{issue} at {', '.join(map(str, positions))}"
+                        for issue, positions in summary['offsets'].items())
+    line = f"{summary['path']}: {', '.join(parts) or 'ok'} ({summary['size']:,} bytes, {summary['nonAscii']} non-ASCII)"
+    return line + (f"\n    {offsets}" if offsets else '')
+
+
+def scan(paths, workers=SCAN_WORKERS, max_offsets=5):
+    """Scan files and directories in parallel, returning per-file summaries in path order"""
+    files = list(iter_files(paths))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda path: scan_file(path, max_offsets), files))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find invalid UTF-8, BOMs, control characters and mojibake')
+    parser.add_argument('paths', nargs='*', default=['data'], help='Files or directories, defaults to data/')
+    parser.add_argument('--all', action='store_true', help='Also list files without issues')
+    parser.add_argument('--offsets', type=int, default=5, help='Offsets to show per issue')
+    parser.add_argument('--workers', type=int, default=SCAN_WORKERS)
+    parser.add_argument('--output', help='Save the summaries as JSON')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summaries = scan(args.paths, args.workers, args.offsets)
+    elapsed = time.perf_counter() - start
+
+    flagged = [s for s in summaries if has_issues(s)]
+    for summary in (summaries if args.all else flagged):
+        print(format_summary(summary))
+
+    total = sum(s.get('size', 0) for s in summaries)
+    print(f"\nScanned {len(summaries)} files, {total / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"({total / 1e6 / max(elapsed, 1e-9):.0f} MB/s), {len(flagged)} with issues")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, indent=2, ensure_ascii=False)
+        print(f"Summaries saved to {args.output}")
+
+    sys.exit(1 if flagged else 0)
 
-def check_encoding(file_path):
-    with open(file_path, 'rb') as f:
-        content = f.read()
-        for i, byte in enumerate(content):
-            if byte > 127:
-                print(f"Found special character at position {i}: byte {hex(byte)}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python check_encoding.py <file_path>")
-        sys.exit(1)
-    check_encoding(sys.argv[1])
+    main()
@@ -0,0 +1,18 @@
+def conversation_key(fields):
+    """Group messages by collaboration, or by swarm pair when there is none"""
+    if fields.get('collaborationId'):
+        return f"collab-{fields['collaborationId']}"
+    parties = sorted(p for p in (fields.get('senderId'), fields.get('receiverId')) if p)
+    return 'pair-' + '--'.join(parties) if parties else 'pair-unknown'
+
+
+def involves(fields, swarm_ids):
+    """Check whether a message belongs to the conversation between swarm_ids
+
+    With several swarms both parties must be in the set; with a single
+    swarm any message it sent or received counts.
+    """
+    parties = {fields.get('senderId'), fields.get('receiverId')}
+    if len(swarm_ids) == 1:
+        return bool(parties & swarm_ids)
+    return parties <= swarm_ids
@@ -3,92 +3,71 @@ import json
 import glob
 from solders.keypair import Keypair
 import base58
-from cryptography.fernet import Fernet
-import base64
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from dotenv import load_dotenv
-import subprocess
-import time
+from keystore import encrypt, decrypt, load_keystore, save_keystore, keypair_from_encrypted, HOT_WALLET_KEYSTORE
+from bootstrap import load_env
+from airtable_sync import upsert_swarms
 
-load_dotenv()
+load_env()
 
 class WalletManager:
-    def __init__(self):
-        self.master_key = self._derive_master_key()
-        self.fernet = Fernet(self.master_key)
-        
-    def _derive_master_key(self):
-        """Create encryption key from environment variables"""
-        salt = os.getenv('WALLET_SALT').encode()
-        password = (
-            os.getenv('WALLET_SECRET_1') + 
-            os.getenv('WALLET_SECRET_2')
-        ).encode()
-        
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=480000,
-        )
-        return base64.urlsafe_b64encode(kdf.derive(password))
+    def generate_wallet(self):
+        """New keypair as (public key, encrypted base58 private key)
+
+        Encrypted with the keystore key, which is only taken from the agent
+        when it passes the check against the local secrets, and read back
+        before it is saved, so no wallet is handed out that cannot be decrypted.
+        """
+        keypair = Keypair()
+        private_key = base58.b58encode(bytes(keypair)).decode('ascii')
+        encrypted_key = encrypt(private_key.encode())
+        if decrypt(encrypted_key).decode('ascii') != private_key:
+            raise ValueError("Encrypted hot wallet key does not decrypt back to the generated key")
+        return str(keypair.pubkey()), encrypted_key.decode()
+
+    def create_hot_wallets(self, swarm_ids):
+        """Create hot wallets for many swarms with one keystore write
+
+        All keys are generated and encrypted in one pass and saved in a single
+        atomic keystore update before any swarm file points at them. A swarm
+        that already has a key in the keystore, e.g. from an interrupted run,
+        keeps it. Returns {swarm_id: public key}.
+        """
+        keys = load_keystore()
+        public_keys = {}
+        for swarm_id in swarm_ids:
+            if swarm_id in keys:
+                public_keys[swarm_id] = str(keypair_from_encrypted(keys[swarm_id]).pubkey())
+            else:
+                public_keys[swarm_id], keys[swarm_id] = self.generate_wallet()
+        save_keystore(keys)
+        print(f"Saved {len(public_keys)} encrypted keys to {HOT_WALLET_KEYSTORE}")
+
+        update_swarm_files(public_keys)
+        return public_keys
 
     def create_hot_wallet(self, swarm_id):
         """Create and store encrypted hot wallet"""
-        print(f"\nCreating hot wallet for {swarm_id}...")
-        try:
-            # Generate new keypair
-            print("Generating keypair...")
-            keypair = Keypair()
-            
-            # Get keys - using correct Solders Keypair properties
-            public_key = str(keypair.pubkey())
-            private_key = base58.b58encode(bytes(keypair)).decode('ascii')  # Changed to bytes(keypair)
-            print(f"Generated public key: {public_key}")
-            
-            # Encrypt private key
-            print("Encrypting private key...")
-            encrypted_key = self.fernet.encrypt(private_key.encode()).decode()
-            
-            # Save encrypted key
-            print("Saving encrypted key...")
-            os.makedirs('secure', exist_ok=True)
-            with open(f'secure/{swarm_id}_wallet.enc', 'w') as f:
-                f.write(encrypted_key)
-            print(f"Encrypted key saved to secure/{swarm_id}_wallet.enc")
-                
-            # Update swarm file with public key
-            print(f"Updating swarm data for {swarm_id}...")
-            swarm_file = f'data/swarms/{swarm_id}.json'
-            with open(swarm_file, 'r', encoding='utf-8') as f:
-                swarm_data = json.load(f)
-            
-            swarm_data['hotWallet'] = public_key
-            
-            with open(swarm_file, 'w', encoding='utf-8') as f:
-                json.dump(swarm_data, f, indent=2, ensure_ascii=False)
-            print(f"Updated swarm file with hot wallet public key")
-                
-            # Push update to Airtable
-            print("\nPushing update to Airtable...")
-            subprocess.run(["python", "scripts/pushData.py", "--table", "Swarms"], check=True)
-            print("Airtable update complete")
-            
-            print(f"\nHot wallet creation complete for {swarm_id}")
-            print(f"Public Key: {public_key}")
-            return public_key
-            
-        except Exception as e:
-            print(f"Error creating hot wallet for {swarm_id}: {str(e)}")
-            raise
+        return self.create_hot_wallets([swarm_id])[swarm_id]
+
+def update_swarm_files(public_keys):
+    """Set hotWallet in every swarm file, each replaced atomically"""
+    for swarm_id, public_key in public_keys.items():
+        swarm_file = f'data/swarms/{swarm_id}.json'
+        with open(swarm_file, 'r', encoding='utf-8') as f:
+            swarm_data = json.load(f)
+        swarm_data['hotWallet'] = public_key
+        temp_file = swarm_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(swarm_data, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, swarm_file)
+        print(f"{swarm_id}: {public_key}")
 
 def main():
     wallet_manager = WalletManager()
     
-    # Process all swarms without hot wallets
+    # Collect all swarms without hot wallets
     swarm_files = glob.glob('data/swarms/*.json')
-    processed = 0
+    missing = []
     
     print(f"\nFound {len(swarm_files)} swarm files to process")
     
@@ -96,20 +75,31 @@ def main():
         try:
             with open(file, 'r', encoding='utf-8') as f:
                 swarm = json.load(f)
-                if 'hotWallet' not in swarm:
-                    print(f"\nProcessing {swarm['swarmId']}...")
-                    wallet_manager.create_hot_wallet(swarm['swarmId'])
-                    processed += 1
-                    
-                    # Add delay between wallet creations
-                    if processed < len(swarm_files):
-                        print("\nWaiting 2 seconds before next wallet creation...")
-                        time.sleep(2)
+            if 'hotWallet' not in swarm:
+                missing.append(swarm['swarmId'])
         except Exception as e:
             print(f"Error processing {file}: {str(e)}")
             continue
     
-    print(f"\nProcessing complete. Created {processed} hot wallets.")
+    if not missing:
+        print("\nAll swarms already have hot wallets.")
+        return
+    
+    print(f"Creating {len(missing)} hot wallets...")
+    try:
+        created = list(wallet_manager.create_hot_wallets(missing))
+    except Exception as e:
+        print(f"Error creating hot wallets: {str(e)}")
+        raise
+    
+    # Push all new hot wallets to Airtable at once
+    try:
+        upsert_swarms(created)
+    except Exception as e:
+        print(f"Error syncing swarms to Airtable: {str(e)}")
+        print(f"Retry with: python scripts/airtable_sync.py {' '.join(created)}")
+    
+    print(f"\nProcessing complete. Created {len(created)} hot wallets.")
 
 if __name__ == "__main__":
     main()
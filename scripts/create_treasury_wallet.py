@@ -2,35 +2,16 @@ import os
 import json
 from solders.keypair import Keypair
 import base58
-from cryptography.fernet import Fernet
-import base64
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from dotenv import load_dotenv
+from keystore import get_fernet
+from bootstrap import load_env
 
-load_dotenv()
+load_env()
 
 class TreasuryManager:
     def __init__(self):
-        self.master_key = self._derive_master_key()
-        self.fernet = Fernet(self.master_key)
+        # Key comes from the keystore agent when running, derived once otherwise
+        self.fernet = get_fernet()
         
-    def _derive_master_key(self):
-        """Create encryption key from environment variables"""
-        salt = os.getenv('WALLET_SALT').encode()
-        password = (
-            os.getenv('WALLET_SECRET_1') + 
-            os.getenv('WALLET_SECRET_2')
-        ).encode()
-        
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=480000,
-        )
-        return base64.urlsafe_b64encode(kdf.derive(password))
-
     def create_treasury_wallet(self):
         """Create and store encrypted treasury wallet"""
         print("\nCreating treasury wallet...")
@@ -0,0 +1,187 @@
+import os
+from decimal import Decimal, ROUND_DOWN
+from bootstrap import lazy_import
+
+np = lazy_import('numpy')
+
+# $COMPUTE amounts are computed in integer base units (10**COMPUTE_DECIMALS per token)
+COMPUTE_DECIMALS = int(os.getenv('COMPUTE_DECIMALS', 6))
+
+# Rates in basis points
+BPS = 10000
+BURN_BPS = 5000         # 50% of revenue is burned
+UBC_BPS = 1000          # 10% of burns and redistributions are paid in UBC
+DEFAULT_REVENUE_SHARE = 10
+
+# Rounding rules: every share is floored, and the remainder stays with the
+# larger part (burn and redistribution remainders go to $COMPUTE, everything
+# left after burn and redistribution is net). No base unit is ever created
+# or lost, which reconcile() checks.
+
+
+def to_base_units(amount, decimals=COMPUTE_DECIMALS):
+    """Convert a token amount (int, float or str) to integer base units, truncating"""
+    if isinstance(amount, int):
+        return amount * 10 ** decimals
+    return int((Decimal(str(amount)) * (10 ** decimals)).to_integral_value(rounding=ROUND_DOWN))
+
+
+def from_base_units(units, decimals=COMPUTE_DECIMALS):
+    """Exact token amount for base units; whole amounts come back as int"""
+    if units % (10 ** decimals) == 0:
+        return units // (10 ** decimals)
+    return float(Decimal(units).scaleb(-decimals))
+
+
+def format_amount(units, decimals=COMPUTE_DECIMALS):
+    """Format base units as a token amount with thousands separators"""
+    text = f"{Decimal(units).scaleb(-decimals):,.{decimals}f}"
+    return text.rstrip('0').rstrip('.') if decimals else text
+
+
+def share_to_bps(revenue_share):
+    """Revenue share percentage (e.g. 10 or 12.5) in basis points"""
+    return int((Decimal(str(revenue_share)) * 100).to_integral_value(rounding=ROUND_DOWN))
+
+
+def mul_bps(amount, bps):
+    """floor(amount * bps / BPS) without overflowing int64 arrays
+
+    Works for Python ints and NumPy integer arrays alike.
+    """
+    return (amount // BPS) * bps + (amount % BPS) * bps // BPS
+
+
+def split_amount(total, share_bps):
+    """Split a provider total into burn, redistribution and net parts"""
+    burn = mul_bps(total, BURN_BPS)
+    burn_ubc = mul_bps(burn, UBC_BPS)
+    redistribution = mul_bps(total, share_bps)
+    redistribution_ubc = mul_bps(redistribution, UBC_BPS)
+    return {
+        'burn': burn,
+        'burn_compute': burn - burn_ubc,
+        'burn_ubc': burn_ubc,
+        'redistribution': redistribution,
+        'redistribution_compute': redistribution - redistribution_ubc,
+        'redistribution_ubc': redistribution_ubc,
+        'net': total - burn - redistribution
+    }
+
+
+def _provider_result(total, share, parts, collaborations):
+    return {
+        'total': total,
+        'burn': {
+            'total': parts['burn'],
+            'compute': parts['burn_compute'],
+            'ubc': parts['burn_ubc']
+        },
+        'redistribution': {
+            'total': parts['redistribution'],
+            'compute': parts['redistribution_compute'],
+            'ubc': parts['redistribution_ubc'],
+            'share': share
+        },
+        'net': parts['net'],
+        'collaborations': collaborations
+    }
+
+
+def _collaboration_row(collab, price_units):
+    return {
+        'id': collab['collaborationId'],
+        'client': collab['clientSwarmId'],
+        'price': price_units
+    }
+
+
+def compute_distributions(collaborations, revenue_shares, decimals=COMPUTE_DECIMALS):
+    """Per-provider distributions in base units for a list of collaborations
+
+    revenue_shares maps providerSwarmId to its revenueShare percentage.
+    """
+    providers = {}
+    for collab in collaborations:
+        price = to_base_units(collab['price'], decimals)
+        provider = providers.setdefault(collab['providerSwarmId'], {'total': 0, 'collaborations': []})
+        provider['total'] += price
+        provider['collaborations'].append(_collaboration_row(collab, price))
+
+    results = {}
+    for provider_id, data in providers.items():
+        share = revenue_shares.get(provider_id, DEFAULT_REVENUE_SHARE)
+        parts = split_amount(data['total'], share_to_bps(share))
+        results[provider_id] = _provider_result(data['total'], share, parts, data['collaborations'])
+    return results
+
+
+def compute_distributions_vectorized(collaborations, revenue_shares, decimals=COMPUTE_DECIMALS):
+    """Same results as compute_distributions, with every provider split in one NumPy batch"""
+    if not collaborations:
+        return {}
+    prices = np.array([to_base_units(c['price'], decimals) for c in collaborations], dtype=np.int64)
+    positions = {}
+    inverse = np.array([positions.setdefault(c['providerSwarmId'], len(positions)) for c in collaborations],
+                       dtype=np.intp)
+    provider_ids = list(positions)
+
+    totals = np.zeros(len(provider_ids), dtype=np.int64)
+    np.add.at(totals, inverse, prices)
+    shares = [revenue_shares.get(p, DEFAULT_REVENUE_SHARE) for p in provider_ids]
+    parts = split_amount(totals, np.array([share_to_bps(s) for s in shares], dtype=np.int64))
+
+    rows = [[] for _ in provider_ids]
+    for collab, index, price in zip(collaborations, inverse.tolist(), prices.tolist()):
+        rows[index].append(_collaboration_row(collab, price))
+
+    columns = {name: values.tolist() for name, values in parts.items()}
+    totals = totals.tolist()
+    results = {}
+    for i, provider_id in enumerate(provider_ids):
+        provider_parts = {name: values[i] for name, values in columns.items()}
+        results[provider_id] = _provider_result(totals[i], shares[i], provider_parts, rows[i])
+    return results
+
+
+def grand_totals(results):
+    """Sum every provider's parts"""
+    totals = {
+        'revenue': 0,
+        'burn_compute': 0,
+        'burn_ubc': 0,
+        'redistribution_compute': 0,
+        'redistribution_ubc': 0,
+        'net': 0
+    }
+    for data in results.values():
+        totals['revenue'] += data['total']
+        totals['burn_compute'] += data['burn']['compute']
+        totals['burn_ubc'] += data['burn']['ubc']
+        totals['redistribution_compute'] += data['redistribution']['compute']
+        totals['redistribution_ubc'] += data['redistribution']['ubc']
+        totals['net'] += data['net']
+    return totals
+
+
+def reconcile(results, expected_total=None):
+    """Raise ValueError unless every provider's parts add up to its total
+
+    With expected_total (base units) the provider totals must also add up
+    to it, e.g. the sum of all active collaboration prices.
+    """
+    for provider_id, data in results.items():
+        parts = (data['burn']['compute'] + data['burn']['ubc'] +
+                 data['redistribution']['compute'] + data['redistribution']['ubc'] + data['net'])
+        if parts != data['total']:
+            raise ValueError(f"Distribution for {provider_id} does not reconcile: parts {parts} != total {data['total']}")
+        if sum(c['price'] for c in data['collaborations']) != data['total']:
+            raise ValueError(f"Collaboration prices for {provider_id} do not add up to {data['total']}")
+        if min(data['net'], data['burn']['compute'], data['redistribution']['compute']) < 0:
+            raise ValueError(f"Distribution for {provider_id} has a negative part")
+
+    if expected_total is not None:
+        revenue = sum(data['total'] for data in results.values())
+        if revenue != expected_total:
+            raise ValueError(f"Provider totals {revenue} != expected revenue {expected_total}")
+    return True
@@ -0,0 +1,243 @@
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime, date
+
+from distribution_engine import COMPUTE_DECIMALS, to_base_units, format_amount
+
+LEDGER_FILE = 'data/ledger/distributions.jsonl'
+# Running totals derived from the ledger, rebuilt from it whenever missing
+REVENUE_CACHE = 'cache/ledger_revenue.json'
+
+
+def iso_week(day=None):
+    """ISO week label such as 2025-W07"""
+    year, week, _ = (day or datetime.utcnow().date()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def parse_week(value):
+    """Accept 2025-W07 or any date inside the week"""
+    if 'W' in value:
+        year, week = value.split('-W')
+        return f"{int(year)}-W{int(week):02d}"
+    return iso_week(date.fromisoformat(value))
+
+
+def allocate(amount, weights):
+    """Split amount over weights proportionally, floored, remainder by largest fraction
+
+    The allocations always add up to amount exactly.
+    """
+    total = sum(weights)
+    if total == 0:
+        return [0] * len(weights)
+    shares = [amount * w // total for w in weights]
+    remainder = amount - sum(shares)
+    # Ties go to the earlier position so the split is deterministic
+    order = sorted(range(len(weights)), key=lambda i: (-(amount * weights[i] % total), i))
+    for i in order[:remainder]:
+        shares[i] += 1
+    return shares
+
+
+class DistributionLedger:
+    """Append-only record of weekly distributions
+
+    One 'distribution' entry is written per (week, provider, collaboration)
+    and carries that collaboration's share of the provider's net revenue.
+    An 'opening' entry carries a swarm's totalRevenue from before the ledger
+    existed, so totalRevenue is always the sum of a swarm's entries.
+    """
+
+    def __init__(self, path=LEDGER_FILE, cache_path=REVENUE_CACHE):
+        self.path = path
+        self.cache_path = cache_path
+        self.offset = 0
+        self.revenue = {}  # swarmId -> {'total': units, 'weeks': {week: units}}
+        self.keys = set()  # (week, provider, collaboration) already recorded
+        self.weeks = set()  # (week, provider) of those keys, for is_recorded
+        self.digest = hashlib.sha256()  # of the ledger bytes up to offset
+        self._load_cache()
+        self.refresh()
+
+    def _prefix_digest(self, size):
+        """sha256 of the first size bytes of the ledger"""
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            while size > 0:
+                chunk = f.read(min(size, 1 << 20))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size -= len(chunk)
+        return digest
+
+    def _load_cache(self):
+        """Start from the cached totals if the ledger still begins with the bytes they cover"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('path') != self.path or cache.get('offset', 0) > os.path.getsize(self.path):
+                return
+            # Hashing the prefix is far cheaper than parsing it, and catches a
+            # rewritten or replaced ledger that is at least as long as before
+            digest = self._prefix_digest(cache['offset'])
+            if digest.hexdigest() != cache['sha256']:
+                return
+            self.offset = cache['offset']
+            self.revenue = cache['revenue']
+            self.keys = {tuple(key) for key in cache['keys']}
+            self.weeks = {key[:2] for key in self.keys}
+            self.digest = digest
+        except (OSError, ValueError, KeyError):
+            self.offset, self.revenue, self.keys, self.digest = 0, {}, set(), hashlib.sha256()
+            self.weeks = set()
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'path': self.path, 'offset': self.offset, 'sha256': self.digest.hexdigest(),
+                       'revenue': self.revenue, 'keys': sorted(self.keys)}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def _apply(self, entry):
+        swarm = self.revenue.setdefault(entry['providerSwarmId'], {'total': 0, 'weeks': {}})
+        swarm['total'] += entry['net']
+        if entry['type'] == 'distribution':
+            swarm['weeks'][entry['week']] = swarm['weeks'].get(entry['week'], 0) + entry['net']
+            self.keys.add((entry['week'], entry['providerSwarmId'], entry['collaborationId']))
+            self.weeks.add((entry['week'], entry['providerSwarmId']))
+
+    def refresh(self):
+        """Fold entries appended since the last read into the running totals"""
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        # A partially written last line is left for the next refresh
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        if end:
+            self.digest.update(data[:end])
+            self.offset += end
+            self._save_cache()
+        return self
+
+    def entries(self):
+        """Every ledger entry, oldest first"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _append(self, entries):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.refresh()
+
+    def is_recorded(self, week, provider_id):
+        return (week, provider_id) in self.weeks
+
+    def record_week(self, week, results, opening_totals=None):
+        """Append the entries for week from calculate_distributions results
+
+        Providers already recorded for the week are skipped, so re-running a
+        week appends nothing. opening_totals maps swarmId to its pre-ledger
+        totalRevenue and is only used for swarms with no entries yet.
+        Returns the appended distribution entries.
+        """
+        recorded_at = datetime.utcnow().isoformat() + 'Z'
+        opening, entries = [], []
+        for provider_id, data in sorted(results.items()):
+            if self.is_recorded(week, provider_id):
+                print(f"{provider_id} already recorded for {week}, skipping")
+                continue
+            if provider_id not in self.revenue and (opening_totals or {}).get(provider_id):
+                opening.append({
+                    'type': 'opening',
+                    'providerSwarmId': provider_id,
+                    'net': to_base_units(opening_totals[provider_id]),
+                    'decimals': COMPUTE_DECIMALS,
+                    'recordedAt': recorded_at
+                })
+
+            collabs = sorted(data['collaborations'], key=lambda c: str(c['id']))
+            nets = allocate(data['net'], [c['price'] for c in collabs])
+            for collab, net in zip(collabs, nets):
+                entries.append({
+                    'type': 'distribution',
+                    'week': week,
+                    'providerSwarmId': provider_id,
+                    'collaborationId': collab['id'],
+                    'clientSwarmId': collab['client'],
+                    'price': collab['price'],
+                    'revenueShare': data['redistribution']['share'],
+                    'net': net,
+                    'decimals': COMPUTE_DECIMALS,
+                    'recordedAt': recorded_at
+                })
+        if opening or entries:
+            self._append(opening + entries)
+        return entries
+
+    def weekly_revenue(self, swarm_id, week):
+        """Net revenue in base units for swarm_id in week"""
+        return self.revenue.get(swarm_id, {}).get('weeks', {}).get(week, 0)
+
+    def total_revenue(self, swarm_id):
+        """All net revenue in base units for swarm_id, including its opening balance"""
+        return self.revenue.get(swarm_id, {}).get('total', 0)
+
+    def history(self, swarm_id):
+        """[(week, net units)] for swarm_id, oldest first"""
+        return sorted(self.revenue.get(swarm_id, {}).get('weeks', {}).items())
+
+    def swarm_fields(self, swarm_id, week):
+        """weeklyRevenue and totalRevenue as stored on the swarm record
+
+        The record keeps whole $COMPUTE as int, truncated from the exact ledger
+        totals so fractions never accumulate into the stored figures.
+        """
+        whole = 10 ** COMPUTE_DECIMALS
+        return {
+            'weeklyRevenue': self.weekly_revenue(swarm_id, week) // whole,
+            'totalRevenue': self.total_revenue(swarm_id) // whole
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the distribution ledger')
+    sub = parser.add_subparsers(dest='command', required=True)
+    history = sub.add_parser('history', help='Weekly net revenue of a swarm')
+    history.add_argument('swarm_id')
+    week = sub.add_parser('week', help='Net revenue per provider for a week')
+    week.add_argument('week', help='ISO week (2025-W07) or a date in it')
+    args = parser.parse_args()
+
+    ledger = DistributionLedger()
+    if args.command == 'history':
+        for week_label, units in ledger.history(args.swarm_id):
+            print(f"{week_label}: {format_amount(units)} $COMPUTE")
+        print(f"Total revenue: {format_amount(ledger.total_revenue(args.swarm_id))} $COMPUTE")
+    elif args.command == 'week':
+        week_label = parse_week(args.week)
+        for swarm_id in sorted(ledger.revenue):
+            units = ledger.weekly_revenue(swarm_id, week_label)
+            if units:
+                print(f"{swarm_id}: {format_amount(units)} $COMPUTE")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import os
+import json
+import heapq
+from pathlib import Path
+
+INDEX_DIR = Path(os.getenv('FILE_INDEX_DIR', 'cache/index'))
+
+
+def _index_path(directory, fields):
+    name = str(directory).replace('\\', '/').strip('/').replace('/', '_')
+    return INDEX_DIR / f"{name}__{'-'.join(fields)}.json"
+
+
+class FileIndex:
+    """Selected fields of every JSON file in a directory, cached by mtime
+
+    Only files whose mtime or size changed since the last refresh are
+    re-parsed, so listing the latest N files no longer opens every file,
+    and top_k() selects from the cached fields with a bounded heap.
+    """
+
+    def __init__(self, directory, fields):
+        self.directory = str(directory).replace('\\', '/').rstrip('/')
+        self.fields = tuple(fields)
+        self.path = _index_path(self.directory, self.fields)
+        self.entries = {}  # file name -> {'mtime', 'size', 'fields'}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Persist the index if anything changed"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def _read_fields(self, file_path):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {field: data.get(field) for field in self.fields}
+
+    def update_file(self, file_path, stat=None, force=False):
+        """Re-index a single file if it changed, e.g. from a watcher event"""
+        name = os.path.basename(file_path)
+        try:
+            stat = stat or os.stat(file_path)
+        except OSError:
+            return self.remove_file(file_path)
+        entry = self.entries.get(name)
+        if not force and entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return False
+        try:
+            fields = self._read_fields(file_path)
+        except Exception as e:
+            print(f"Error reading {file_path}: {e}")
+            return False
+        self.entries[name] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'fields': fields}
+        self._dirty = True
+        return True
+
+    def remove_file(self, file_path):
+        """Drop a deleted file from the index"""
+        name = os.path.basename(file_path)
+        if name in self.entries:
+            del self.entries[name]
+            self._dirty = True
+            return True
+        return False
+
+    def _keys(self, field):
+        # Ties are broken by path so the selection is stable between runs
+        return ((entry['fields'].get(field) or '', self.file_path(name)) for name, entry in self.entries.items())
+
+    def refresh(self, full=False):
+        """Bring the index up to date with the directory
+
+        Every file is stat'ed, since files rewritten in place leave the
+        directory mtime alone, and only changed files are parsed again.
+        full=True parses every file.
+        """
+        if not os.path.isdir(self.directory):
+            if self.entries:
+                self.entries = {}
+                self._dirty = True
+            self.save()
+            return self
+
+        seen = set()
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                self.update_file(entry.path, stat=entry.stat(), force=full)
+        for name in list(self.entries):
+            if name not in seen:
+                self.remove_file(name)
+
+        self.save()
+        return self
+
+    def file_path(self, name):
+        return f"{self.directory}/{name}"
+
+    def items(self):
+        """Yield (path, fields) for every indexed file"""
+        for name, entry in self.entries.items():
+            yield self.file_path(name), entry['fields']
+
+    def top_k(self, field, k, reverse=True):
+        """Return paths of the k files with the largest (or smallest) field value"""
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        return [path for _, path in select(k, self._keys(field))]
+
+    def sorted_paths(self, field, reverse=True):
+        """Return all paths ordered by field value"""
+        return [path for _, path in sorted(self._keys(field), reverse=reverse)]
+
+
+def note_file_event(file_path, deleted=False):
+    """Apply a file event to every persisted index covering the file's directory"""
+    file_path = file_path.replace('\\', '/')
+    if not file_path.endswith('.json'):
+        return
+    directory = os.path.dirname(file_path)
+    prefix = _index_path(directory, ()).name.split('__')[0] + '__'
+    if not INDEX_DIR.exists():
+        return
+    for index_file in INDEX_DIR.glob(f"{prefix}*.json"):
+        fields = index_file.stem[len(prefix):].split('-')
+        index = FileIndex(directory, fields)
+        if deleted:
+            index.remove_file(file_path)
+        else:
+            index.update_file(file_path)
+        index.save()
@@ -1,59 +1,27 @@
 import os
 import json
 import glob
-import codecs
-import sys
-import base64
-import time
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from solders.keypair import Keypair
-from solana.rpc.api import Client
-from solana.transaction import Transaction
 from solders.pubkey import Pubkey
-from spl.token.instructions import TransferParams, transfer, create_associated_token_account, get_associated_token_address
-from spl.token.constants import TOKEN_PROGRAM_ID, ASSOCIATED_TOKEN_PROGRAM_ID
-import base58
-from dotenv import load_dotenv
+from spl.token.instructions import get_associated_token_address
+from bootstrap import setup_console, load_env, lazy_import
+from keystore import load_treasury_wallet
+from distribution_engine import COMPUTE_DECIMALS, to_base_units, format_amount
+from tx_packer import (create_ata_idempotent_ix, transfer_checked_ix, fetch_accounts, token_account_amount,
+                       pack_instructions, CREATE_ATA_UNITS, TRANSFER_UNITS)
+from tx_executor import TxExecutor
+from balance_monitor import MAX_TX_AMOUNT
 
 # Force UTF-8 encoding
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-
-load_dotenv()
-
-def load_treasury_wallet():
-    """Load encrypted treasury wallet"""
-    try:
-        # Load encrypted key
-        with open('secure/treasury_wallet.enc', 'r') as f:
-            encrypted_key = f.read()
-            
-        # Create encryption key from environment variables
-        salt = os.getenv('WALLET_SALT').encode()
-        password = (
-            os.getenv('WALLET_SECRET_1') + 
-            os.getenv('WALLET_SECRET_2')
-        ).encode()
-        
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=480000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password))
-        
-        # Decrypt private key
-        f = Fernet(key)
-        private_key = f.decrypt(encrypted_key.encode()).decode()
-        
-        return Keypair.from_bytes(base58.b58decode(private_key))
-    except Exception as e:
-        print(f"Error loading treasury wallet: {e}")
-        return None
+setup_console()
+
+load_env()
+
+solana_rpc = lazy_import('solana.rpc.api')
+
+COMPUTE_TOKEN = "B1N1HcMm4RysYz4smsXwmk2UnS8NziqKCM6Ho8i62vXo"
+
+# Initial funding per hot wallet in whole $COMPUTE
+FUND_AMOUNT = int(os.getenv('FUND_AMOUNT', 1_000_000))
 
 def load_swarms_with_hot_wallets():
     """Load all swarms that have hot wallets"""
@@ -76,95 +44,67 @@ def fund_hot_wallets():
     if not treasury:
         print("Failed to load treasury wallet")
         return
-        
+
     print(f"Loaded treasury wallet: {treasury.pubkey()}")
-    
+
     # Load all swarms with hot wallets
     swarms = load_swarms_with_hot_wallets()
     print(f"\nFound {len(swarms)} hot wallets to fund")
-    
+
     # Initialize Solana client with Helius RPC
     helius_url = os.getenv('NEXT_PUBLIC_HELIUS_RPC_URL')
     if not helius_url:
         print("Error: NEXT_PUBLIC_HELIUS_RPC_URL not found in environment variables")
         return
-        
-    client = Client(helius_url)
-    compute_token_mint = Pubkey.from_string(os.getenv('COMPUTE_TOKEN_ADDRESS'))
+
+    client = solana_rpc.Client(helius_url)
+    compute_token_mint = Pubkey.from_string(os.getenv('COMPUTE_TOKEN_ADDRESS') or COMPUTE_TOKEN)
     print(f"Connected to Helius RPC endpoint")
-    
-    for swarm_id, swarm in swarms.items():
-        hot_wallet = swarm['hotWallet']
-        print(f"\nProcessing {swarm_id}")
-        print(f"Hot wallet: {hot_wallet}")
-        
-        max_retries = 3
-        retry_delay = 5  # seconds
-        
-        for attempt in range(max_retries):
-            try:
-                # Get recent blockhash
-                print("Getting recent blockhash...")
-                blockhash_response = client.get_latest_blockhash()
-                recent_blockhash = blockhash_response.value.blockhash
-                print(f"Got blockhash: {recent_blockhash}")
-                
-                # Get or create token account
-                print("Creating/checking token account...")
-                hot_wallet_pubkey = Pubkey.from_string(hot_wallet)
-                token_account = get_associated_token_address(hot_wallet_pubkey, compute_token_mint)
-                
-                # Create token account if it doesn't exist
-                create_account_ix = create_associated_token_account(
-                    payer=treasury.pubkey(),
-                    owner=hot_wallet_pubkey,
-                    mint=compute_token_mint
-                )
-                
-                # Create transfer instruction
-                print("Creating COMPUTE transfer instruction...")
-                transfer_params = TransferParams(
-                    program_id=TOKEN_PROGRAM_ID,
-                    source=get_associated_token_address(treasury.pubkey(), compute_token_mint),
-                    dest=token_account,
-                    owner=treasury.pubkey(),
-                    amount=1000000,  # 1M COMPUTE
-                    signers=[]
-                )
-                
-                # Create transaction with both instructions
-                tx = Transaction()
-                tx.add(create_account_ix)  # Add create account instruction
-                tx.add(transfer(transfer_params))  # Add transfer instruction
-                tx.recent_blockhash = recent_blockhash
-                
-                print("Signing and sending transaction...")
-                tx.sign(treasury)
-                serialized_tx = tx.serialize()
-                
-                result = client.send_raw_transaction(serialized_tx)
-                signature = result.value  # Changed from result['result']
-                
-                print("Waiting for confirmation...")
-                print("Waiting for confirmation...")
-                confirmation = client.confirm_transaction(signature)
-                if confirmation.value:
-                    print(f"{token_name} token account created at: {str(ata)}")
-                else:
-                    raise Exception(f"{token_name} account creation not confirmed")
-                    
-                # Add delay between transactions
-                time.sleep(2)
-                
-            print(f"\nSuccessfully created token accounts for {swarm_id}")
-            break
-                
-            except Exception as e:
-                print(f"Error funding {swarm_id} (attempt {attempt + 1}/{max_retries}): {e}")
-                if attempt == max_retries - 1:
-                    print("Full error traceback:")
-                    import traceback
-                    print(traceback.format_exc())
+
+    # One batched lookup of the treasury and every hot wallet token account
+    wallets = {swarm_id: Pubkey.from_string(swarm['hotWallet']) for swarm_id, swarm in swarms.items()}
+    treasury_ata = get_associated_token_address(treasury.pubkey(), compute_token_mint)
+    atas = {swarm_id: get_associated_token_address(wallet, compute_token_mint) for swarm_id, wallet in wallets.items()}
+    accounts = fetch_accounts(client, [treasury_ata] + list(atas.values()))
+
+    amount = to_base_units(FUND_AMOUNT)
+    items = []
+    for swarm_id, wallet in wallets.items():
+        account = accounts.get(str(atas[swarm_id]))
+        # Initial funding only: wallets that already hold COMPUTE are left alone
+        if account is not None and token_account_amount(account) > 0:
+            print(f"Skipping {swarm_id}: already funded")
+            continue
+        # Create and fund in one group so the transfer never lands without its account
+        instructions = [
+            create_ata_idempotent_ix(treasury.pubkey(), wallet, compute_token_mint),
+            transfer_checked_ix(treasury.pubkey(), wallet, compute_token_mint, amount, COMPUTE_DECIMALS)
+        ]
+        items.append((instructions, CREATE_ATA_UNITS + TRANSFER_UNITS, swarm_id, amount))
+    if not items:
+        print("All hot wallets are already funded")
+        return
+
+    treasury_account = accounts.get(str(treasury_ata))
+    available = token_account_amount(treasury_account) if treasury_account else 0
+    if available < amount * len(items):
+        print(f"Error: treasury holds {format_amount(available)} COMPUTE, "
+              f"{format_amount(amount * len(items))} needed to fund {len(items)} wallets")
+        return
+
+    packed = pack_instructions(treasury.pubkey(), items, max_amount=to_base_units(MAX_TX_AMOUNT))
+    print(f"Funding {len(items)} wallets with {format_amount(amount)} COMPUTE each in {len(packed)} transactions")
+
+    def report(result):
+        swarm_ids = ', '.join(result['labels'])
+        if result['status'] == 'confirmed':
+            print(f"Funded {swarm_ids}: {result['signature']}")
+        else:
+            print(f"Error funding {swarm_ids} after {result['attempts']} attempts: {result['error']}")
+
+    results = TxExecutor(client, treasury).execute(packed, on_result=report)
+    funded = sum(len(r['labels']) for r in results if r['status'] == 'confirmed')
+    print(f"\nFunded {funded}/{len(items)} hot wallets")
 
 def main():
     print("Starting hot wallet funding process...")
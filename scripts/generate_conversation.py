@@ -2,14 +2,17 @@ import sys
 import json
 import os
 import glob
-import codecs
 import subprocess
 from datetime import datetime
-import anthropic
-from dotenv import load_dotenv
+from bootstrap import setup_console, load_env, lazy_import
+from llm_cache import create_message_text, pop_no_cache_flag
+from message_log import MessageLog, log_enabled
+from vector_index import relevant_chunks, format_chunks, RETRIEVAL_K
+
+anthropic = lazy_import('anthropic')
 
 # Load environment variables from .env file with override
-load_dotenv(override=True)
+load_env(override=True)
 
 # Get API key and validate
 api_key = os.getenv('ANTHROPIC_API_KEY')
@@ -32,23 +35,7 @@ def load_kinos_context():
     return context
 
 # Force UTF-8 encoding for stdin/stdout/stderr
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-if sys.stdin.encoding != 'utf-8':
-    sys.stdin = codecs.getreader('utf-8')(sys.stdin.buffer, 'strict')
-
-# Set default encoding to UTF-8
-import locale
-locale.getpreferredencoding = lambda: 'UTF-8'
-
-# Set console output encoding to UTF-8
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-
-# Load environment variables
-load_dotenv()
+setup_console()
 
 # Debug environment variable loading
 print("Environment variables loaded:")
@@ -73,6 +60,10 @@ def load_collaboration(collab_id):
 
 def load_messages(collab_id):
     """Load existing messages for the collaboration"""
+    if log_enabled():
+        # One sequential read of the collaboration's segment
+        return MessageLog().sync().read_collaboration(collab_id)
+
     messages = []
     message_files = glob.glob('data/messages/*.json')
     for file in message_files:
@@ -113,19 +104,98 @@ def save_message(message_data):
     os.makedirs(os.path.dirname(filename), exist_ok=True)
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(message_data, f, indent=2, ensure_ascii=False)
+    if log_enabled():
+        MessageLog().append_file(filename, message_data)
+
+def load_specifications(collab_id):
+    """Load specifications for the collaboration"""
+    specifications = []
+    spec_files = glob.glob('data/specifications/*.json')
+    for file in spec_files:
+        try:
+            # Open in binary mode first
+            with open(file, 'rb') as f:
+                # Decode bytes to string using UTF-8
+                content = f.read().decode('utf-8')
+                spec_data = json.loads(content)
+                if spec_data.get('collaborationId') == collab_id:
+                    specifications.append(spec_data)
+        except Exception as e:
+            print(f"Error reading specification file {file}: {str(e)}")
+            continue
+    return specifications
 
-def generate_conversation(collab_id, prompt, message_count=1):
-    """Generate a conversation using Claude"""
-    # Initialize Claude client with global api_key
-    client = anthropic.Client(api_key=api_key)
+def build_conversation_request(collab, prompt, existing_messages, specifications):
+    """Build the Claude request parameters for the next message in a collaboration"""
+    # Create context for Claude
+    context = f"""You are helping generate a conversation between {collab['clientSwarmId']} and {collab['providerSwarmId']}.
+
+{load_kinos_context()}
+
+"""
+    # Only the chunks closest to the prompt are included once a vector
+    # index exists; without one every specification is sent verbatim
+    recent = existing_messages[-25:]
+    recent_ids = {msg.get('messageId') for msg in recent}
+    query = prompt + ('\n' + recent[-1]['content'] if recent else '')
+    chunks = relevant_chunks(query, collaboration_id=collab.get('collaborationId'), k=RETRIEVAL_K,
+                             exclude=lambda chunk: chunk['id'] in recent_ids)
+    if chunks is not None:
+        context += "Relevant Specifications and Earlier Discussion:\n"
+        context += format_chunks(chunks)
+    else:
+        context += "Collaboration Specifications:\n"
+        for spec in specifications:
+            context += f"\nSpecification: {spec.get('title')}\n"
+            context += f"Content:\n{spec.get('content')}\n"
+            context += "-" * 40 + "\n"
+
+    context += "\nExisting conversation context:\n"
+    for msg in recent:  # Last 25 messages for context
+        context += f"\n{msg['senderId']}: {msg['content']}\n"
+
+    context += f"\nPrompt: {prompt}\n"
+
+    return {
+        "model": "claude-3-5-sonnet-20241022",
+        "max_tokens": 2000,
+        "messages": [{
+            "role": "user",
+            "content": "Generate the next message in this conversation. Return ONLY the message content, no additional formatting or explanation."
+        }],
+        "system": context
+    }
+
+def build_message_data(collab, content, turn=0):
+    """Create message data for generated content, alternating senders by turn"""
+    timestamp = datetime.utcnow().isoformat() + 'Z'
     
+    # Alternate between senders
+    if turn % 2 == 0:
+        sender_id = collab['providerSwarmId']
+        receiver_id = collab['clientSwarmId']
+    else:
+        sender_id = collab['clientSwarmId']
+        receiver_id = collab['providerSwarmId']
+        
+    return {
+        "collaborationId": collab['collaborationId'],
+        "senderId": sender_id,
+        "receiverId": receiver_id,
+        "content": content.strip(),
+        "timestamp": timestamp,
+        "messageId": generate_message_id(sender_id, timestamp)
+    }
+
+def generate_conversation(collab_id, prompt, message_count=1, no_cache=False):
+    """Generate a conversation using Claude"""
     # Load collaboration data
     collab = load_collaboration(collab_id)
     if not collab:
         print(f"Error: Collaboration {collab_id} not found")
         return
 
-    # Initialize Claude client
+    # Initialize Claude client with global api_key
     client = anthropic.Client(api_key=api_key)
     
     # Generate multiple messages
@@ -134,75 +204,19 @@ def generate_conversation(collab_id, prompt, message_count=1):
         existing_messages = load_messages(collab_id)
         
         # Load specifications for this collaboration
-        specifications = []
-        spec_files = glob.glob('data/specifications/*.json')
-        for file in spec_files:
-            try:
-                # Open in binary mode first
-                with open(file, 'rb') as f:
-                    # Decode bytes to string using UTF-8
-                    content = f.read().decode('utf-8')
-                    spec_data = json.loads(content)
-                    if spec_data.get('collaborationId') == collab_id:
-                        specifications.append(spec_data)
-            except Exception as e:
-                print(f"Error reading specification file {file}: {str(e)}")
-                continue
+        specifications = load_specifications(collab_id)
         
-        # Create context for Claude
-        context = f"""You are helping generate a conversation between {collab['clientSwarmId']} and {collab['providerSwarmId']}.
-
-{load_kinos_context()}
-
-Collaboration Specifications:
-"""
-        # Add specifications to context
-        for spec in specifications:
-            context += f"\nSpecification: {spec.get('title')}\n"
-            context += f"Content:\n{spec.get('content')}\n"
-            context += "-" * 40 + "\n"
-
-        context += "\nExisting conversation context:\n"
-        for msg in existing_messages[-25:]:  # Last 25 messages for context
-            context += f"\n{msg['senderId']}: {msg['content']}\n"
-
-        context += f"\nPrompt: {prompt}\n"
+        request = build_conversation_request(collab, prompt, existing_messages, specifications)
         
         try:
             # Generate response using Claude
-            response = client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=2000,
-                messages=[{
-                    "role": "user",
-                    "content": "Generate the next message in this conversation. Return ONLY the message content, no additional formatting or explanation."
-                }],
-                system=context
-            )
+            content = create_message_text(client, no_cache=no_cache, **request)
             
-            if not hasattr(response, 'content') or len(response.content) == 0:
+            if not content:
                 print("Error: No response content from Claude")
                 continue
 
-            # Create message data
-            timestamp = datetime.utcnow().isoformat() + 'Z'
-            
-            # Alternate between senders
-            if i % 2 == 0:
-                sender_id = collab['providerSwarmId']
-                receiver_id = collab['clientSwarmId']
-            else:
-                sender_id = collab['clientSwarmId']
-                receiver_id = collab['providerSwarmId']
-                
-            message_data = {
-                "collaborationId": collab_id,
-                "senderId": sender_id,
-                "receiverId": receiver_id,
-                "content": response.content[0].text.strip(),
-                "timestamp": timestamp,
-                "messageId": generate_message_id(sender_id, timestamp)
-            }
+            message_data = build_message_data(collab, content, i)
             
             # Save the message
             save_message(message_data)
@@ -216,15 +230,16 @@ Collaboration Specifications:
             print(f"Error generating message {i+1}: {str(e)}")
 
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: python generate_conversation.py <collaboration_id> <prompt> <message_count>")
+    args, no_cache = pop_no_cache_flag(sys.argv[1:])
+    if len(args) < 3:
+        print("Usage: python generate_conversation.py <collaboration_id> <prompt> <message_count> [--no-cache]")
         return
     
-    collab_id = sys.argv[1]
-    prompt = sys.argv[2]
-    message_count = int(sys.argv[3])
+    collab_id = args[0]
+    prompt = args[1]
+    message_count = int(args[2])
     
-    generate_conversation(collab_id, prompt, message_count)
+    generate_conversation(collab_id, prompt, message_count, no_cache=no_cache)
 
 if __name__ == "__main__":
     main()
@@ -2,25 +2,21 @@ import sys
 import json
 import os
 import glob
-import codecs
 import subprocess
 from datetime import datetime
-import anthropic
-from dotenv import load_dotenv
+from bootstrap import setup_console, load_env, lazy_import
+from llm_cache import create_message_text, pop_no_cache_flag
+from message_log import MessageLog, log_enabled
+from search_index import related_context
+from vector_index import relevant_chunks, format_chunks, RETRIEVAL_K
 
-# Force UTF-8 encoding for stdin/stdout/stderr
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-if sys.stdin.encoding != 'utf-8':
-    sys.stdin = codecs.getreader('utf-8')(sys.stdin.buffer, 'strict')
+anthropic = lazy_import('anthropic')
 
-# Set default encoding to UTF-8
-import locale
-locale.getpreferredencoding = lambda: 'UTF-8'
+# Force UTF-8 encoding for stdin/stdout/stderr
+setup_console()
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 def load_collaboration(collab_id):
     """Load collaboration data and related information"""
@@ -40,12 +36,15 @@ def load_collaboration(collab_id):
 
         # Load related messages
         messages = []
-        message_files = glob.glob('data/messages/*.json')
-        for file in message_files:
-            with open(file, 'r') as f:
-                data = json.load(f)
-                if data.get('collaborationId') == collab_id:
-                    messages.append(data)
+        if log_enabled():
+            messages = MessageLog().sync().read_collaboration(collab_id)
+        else:
+            message_files = glob.glob('data/messages/*.json')
+            for file in message_files:
+                with open(file, 'r') as f:
+                    data = json.load(f)
+                    if data.get('collaborationId') == collab_id:
+                        messages.append(data)
         
         # Load related specifications
         specs = []
@@ -81,17 +80,8 @@ def git_operations(spec_id):
         print(f"Error in git operations: {e}")
         raise
 
-def generate_specification(collab_id, topic):
-    """Generate a specification document using Claude"""
-    collab, messages, existing_specs = load_collaboration(collab_id)
-    if not collab:
-        print(f"Could not find collaboration {collab_id}")
-        return
-
-    client = anthropic.Client(
-        api_key=os.getenv('ANTHROPIC_API_KEY')
-    )
-    
+def build_specification_request(collab, messages, existing_specs, topic):
+    """Build the Claude request parameters for a specification on topic"""
     # Build context
     context = f"""You are helping generate a detailed technical specification document.
 
@@ -102,43 +92,85 @@ Collaboration Context:
 Recent Messages:
 """
     # Add last 25 messages for context
-    for msg in sorted(messages, key=lambda x: x.get('timestamp', ''))[-25:]:
+    recent = sorted(messages, key=lambda x: x.get('timestamp', ''))[-25:]
+    for msg in recent:
         context += f"- From {msg.get('senderId')} to {msg.get('receiverId')}: {msg.get('content')}\n"
 
-    context += "\nExisting Specifications:\n"
+    # Earlier drafts of this topic are left out so a rerun sends the same prompt
+    recent_ids = {msg.get('messageId') for msg in recent}
+    chunks = relevant_chunks(topic, collaboration_id=collab.get('collaborationId'), k=RETRIEVAL_K,
+                             exclude=lambda chunk: chunk['id'] in recent_ids or chunk['title'] == topic)
+    if chunks is not None:
+        context += "\nRelevant Specifications and Earlier Discussion:\n"
+        context += format_chunks(chunks)
+    else:
+        context += "\nExisting Specifications:\n"
+        for spec in existing_specs:
+            if spec.get('title') == topic:
+                continue
+            context += f"- {spec.get('title')}: {spec.get('content')[:200]}...\n"
+
+    # Related material from other collaborations, when the search index is built
+    related = related_context(topic, exclude_collaboration_id=collab.get('collaborationId'))
+    if related:
+        context += f"\nRelated Discussions Elsewhere:\n{related}\n"
+
+    return {
+        "model": "claude-3-5-sonnet-20241022",
+        "max_tokens": 2000,
+        "messages": [{
+            "role": "user",
+            "content": f"Generate a detailed technical specification document for: {topic}\n\nThe specification should include:\n1. Overview\n2. Requirements\n3. Technical Details\n4. Implementation Plan\n5. Success Criteria"
+        }],
+        "system": context
+    }
+
+def save_specification(collab_id, topic, spec_content, existing_specs):
+    """Write a generated specification to data/specifications and return it"""
+    spec_id = f"spec-{collab_id}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    
+    # Reuse the file from a previous run that saved this exact spec
+    # (e.g. a retry after git_operations failed)
     for spec in existing_specs:
-        context += f"- {spec.get('title')}: {spec.get('content')[:200]}...\n"
+        if spec.get('title') == topic and spec.get('content') == spec_content:
+            spec_id = spec.get('specificationId', spec_id)
+            break
+    
+    specification = {
+        "specificationId": spec_id,
+        "collaborationId": collab_id,
+        "title": topic,
+        "content": spec_content
+    }
+    
+    # Save specification with UTF-8 encoding
+    filename = f"data/specifications/{spec_id}.json"
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(specification, f, indent=2, ensure_ascii=False)
+    
+    return specification
+
+def generate_specification(collab_id, topic, no_cache=False):
+    """Generate a specification document using Claude"""
+    collab, messages, existing_specs = load_collaboration(collab_id)
+    if not collab:
+        print(f"Could not find collaboration {collab_id}")
+        return
+
+    client = anthropic.Client(
+        api_key=os.getenv('ANTHROPIC_API_KEY')
+    )
+    
+    request = build_specification_request(collab, messages, existing_specs, topic)
 
     try:
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=2000,
-            messages=[{
-                "role": "user",
-                "content": f"Generate a detailed technical specification document for: {topic}\n\nThe specification should include:\n1. Overview\n2. Requirements\n3. Technical Details\n4. Implementation Plan\n5. Success Criteria"
-            }],
-            system=context
-        )
+        spec_content = create_message_text(client, no_cache=no_cache, **request)
         
-        if hasattr(response, 'content') and len(response.content) > 0:
-            spec_content = response.content[0].text
-            
-            # Create specification data
-            timestamp = datetime.utcnow().isoformat() + 'Z'
-            spec_id = f"spec-{collab_id}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-            
-            specification = {
-                "specificationId": spec_id,
-                "collaborationId": collab_id,
-                "title": topic,
-                "content": spec_content
-            }
-            
-            # Save specification with UTF-8 encoding
+        if spec_content:
+            specification = save_specification(collab_id, topic, spec_content, existing_specs)
+            spec_id = specification['specificationId']
             filename = f"data/specifications/{spec_id}.json"
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(specification, f, indent=2, ensure_ascii=False)
             
             print(f"\nSpecification generated and saved as {filename}")
             print("\nSpecification content:")
@@ -160,17 +192,18 @@ Recent Messages:
         return None
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python generate_specification.py <collaboration_id> <topic>")
+    args, no_cache = pop_no_cache_flag(sys.argv[1:])
+    if len(args) < 2:
+        print("Usage: python generate_specification.py <collaboration_id> <topic> [--no-cache]")
         return
         
-    collab_id = sys.argv[1]
-    topic = ' '.join(sys.argv[2:])
+    collab_id = args[0]
+    topic = ' '.join(args[1:])
     
     print(f"Generating specification for collaboration {collab_id}")
     print(f"Topic: {topic}")
     
-    specification = generate_specification(collab_id, topic)
+    specification = generate_specification(collab_id, topic, no_cache=no_cache)
     if specification:
         print(f"\nSpecification {specification['specificationId']} generated successfully")
 
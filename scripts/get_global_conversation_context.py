@@ -1,39 +1,15 @@
-import os
 import glob
-import json
-from datetime import datetime
+from file_index import FileIndex
 
 def get_files_sorted_by_date(directory):
     """Get files from directory sorted by createdAt field in JSON"""
-    files = []
-    for file_path in glob.glob(f"{directory}/*.json"):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                created_at = data.get('createdAt', '')
-                files.append((file_path, created_at))
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
-            continue
-    
-    # Sort by date descending and return just the paths
-    return [f[0] for f in sorted(files, key=lambda x: x[1], reverse=True)]
+    index = FileIndex(directory, ['createdAt']).refresh()
+    return index.sorted_paths('createdAt')
 
-def get_files_sorted_by_date(directory):
-    """Get files from directory sorted by createdAt field in JSON"""
-    files = []
-    for file_path in glob.glob(f"{directory}/*.json"):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                created_at = data.get('createdAt', '')
-                files.append((file_path, created_at))
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
-            continue
-    
-    # Sort by date descending and return just the paths
-    return [f[0] for f in sorted(files, key=lambda x: x[1], reverse=True)]
+def get_latest_files(directory, limit):
+    """Get the limit most recent files from directory by createdAt"""
+    index = FileIndex(directory, ['createdAt']).refresh()
+    return index.top_k('createdAt', limit)
 
 def get_context_files():
     """Get list of files for global conversation context"""
@@ -49,20 +25,20 @@ def get_context_files():
     context_files.extend(glob.glob("data/news/*.json"))
     
     # Get last 10 collaborations
-    collaborations = get_files_sorted_by_date("data/collaborations")
-    context_files.extend(collaborations[:10])
+    collaborations = get_latest_files("data/collaborations", 10)
+    context_files.extend(collaborations)
     
     # Get last 5 deliverables
-    deliverables = get_files_sorted_by_date("data/deliverables")
-    context_files.extend(deliverables[:5])
+    deliverables = get_latest_files("data/deliverables", 5)
+    context_files.extend(deliverables)
     
     # Get last 5 specifications
-    specifications = get_files_sorted_by_date("data/specifications")
-    context_files.extend(specifications[:5])
+    specifications = get_latest_files("data/specifications", 5)
+    context_files.extend(specifications)
 
     # Get last 5 missions
-    missions = get_files_sorted_by_date("data/missions")
-    context_files.extend(missions[:5])
+    missions = get_latest_files("data/missions", 5)
+    context_files.extend(missions)
     
     return context_files
 
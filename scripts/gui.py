@@ -3,8 +3,6 @@ from tkinter import ttk, scrolledtext, font, Canvas
 import subprocess
 import threading
 import time
-import glob
-import json
 
 def configure_styles():
     style = ttk.Style()
@@ -78,6 +76,36 @@ import os
 from datetime import datetime
 from threading import Thread
 import signal
+import glob
+import shutil
+from file_index import FileIndex
+
+# Output console limits: lines kept in the widget, and poll interval bounds in ms
+OUTPUT_MAX_LINES = int(os.getenv('GUI_MAX_LINES', 5000))
+POLL_MIN_MS = 50
+POLL_MAX_MS = 500
+# Queue items handled per tick before yielding back to Tk
+QUEUE_BATCH_LIMIT = 2000
+# Full console history, kept for save_output after old lines are trimmed
+OUTPUT_LOG_DIR = 'cache/gui'
+# Session logs kept in OUTPUT_LOG_DIR, oldest removed first
+OUTPUT_LOG_KEEP = int(os.getenv('GUI_LOG_KEEP', 10))
+
+def prune_output_logs(keep=OUTPUT_LOG_KEEP):
+    """Remove all but the newest keep session logs"""
+    # Session names embed their start time, so name order is age order
+    logs = sorted(glob.glob(os.path.join(OUTPUT_LOG_DIR, 'session_*.log')))
+    for path in logs[:max(len(logs) - keep, 0)]:
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Could not remove old session log {path}: {e}")
+
+def load_collaboration_choices():
+    """Selector labels for every collaboration, read through the collaborations index"""
+    index = FileIndex('data/collaborations', ('collaborationId', 'clientSwarmId', 'providerSwarmId')).refresh()
+    return sorted(f"{fields.get('collaborationId')} - {fields.get('clientSwarmId')} with {fields.get('providerSwarmId')}"
+                  for _, fields in index.items())
 
 class RedirectText:
     def __init__(self, text_widget, queue):
@@ -105,18 +133,31 @@ class ScriptGUI:
         
         self.watch_process = None
         self.watching = False
+        self.collab_choices = []
+        self.runner = None
+        self.poll_interval = POLL_MIN_MS
+        os.makedirs(OUTPUT_LOG_DIR, exist_ok=True)
+        prune_output_logs(OUTPUT_LOG_KEEP - 1)
+        self.output_log_path = os.path.join(OUTPUT_LOG_DIR, f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+        self.output_log = open(self.output_log_path, 'a', encoding='utf-8')
+        self.output_log_start = 0  # log offset of the last clear, save_output starts there
         
         self.setup_gui()
-        # Load collaborations for selector
-        self.load_collaborations()
-        
         self.setup_output_handling()
+        # Load collaborations for the selectors without blocking the window
+        self.load_collaborations()
+        self.start_runner()
         
     def cleanup(self):
         """Clean up resources before exit"""
         if self.watching and self.watch_process:
             self.toggle_watch()  # Stop watching process
         
+        if self.runner:
+            self.runner.shutdown()
+        
+        self.output_log.close()
+        
         # Restore original stdout
         sys.stdout = sys.__stdout__
         
@@ -238,9 +279,6 @@ class ScriptGUI:
         )
         spec_button.grid(row=2, column=1, padx=4, pady=4, sticky=tk.E)
 
-        # Load collaborations for both selectors after they're created
-        self.load_collaborations()
-
 
         # Conversation Generator Frame
         conv_frame = ttk.LabelFrame(
@@ -371,27 +409,87 @@ class ScriptGUI:
         self.root.after(100, self.check_queue)
 
     def check_queue(self):
-        """Check if there's something in the queue"""
-        while True:
+        """Drain the queue into one insert per tick, polling faster while output flows"""
+        chunks = []
+        processed = 0
+        while processed < QUEUE_BATCH_LIMIT:
             try:
-                text = self.queue.get_nowait()
-                self.output_text.insert(tk.END, text)
-                self.output_text.see(tk.END)
-                self.queue.task_done()
+                item = self.queue.get_nowait()
             except queue.Empty:
                 break
-        self.root.after(100, self.check_queue)
+            processed += 1
+            # Background threads queue callables for work that must run on the Tk thread
+            if callable(item):
+                self.append_output(''.join(chunks))
+                chunks = []
+                item()
+            else:
+                chunks.append(item)
+            self.queue.task_done()
+        self.append_output(''.join(chunks))
+
+        if processed >= QUEUE_BATCH_LIMIT:
+            self.poll_interval = 1  # Backlog left, come back right after Tk catches up
+        elif processed:
+            self.poll_interval = POLL_MIN_MS
+        else:
+            self.poll_interval = min(self.poll_interval * 2, POLL_MAX_MS)
+        self.root.after(self.poll_interval, self.check_queue)
+
+    def append_output(self, text):
+        """Log text and add it to the console, trimming the oldest lines past the limit"""
+        if not text:
+            return
+        self.output_log.write(text)
+        self.output_log.flush()
+        self.output_text.insert(tk.END, text)
+        # Trim in steps of a tenth so deletes do not happen on every tick
+        lines = int(self.output_text.index('end-1c').split('.')[0])
+        if lines > OUTPUT_MAX_LINES + OUTPUT_MAX_LINES // 10:
+            self.output_text.delete('1.0', f"{lines - OUTPUT_MAX_LINES + 1}.0")
+        self.output_text.see(tk.END)
+
+    def run_in_background(self, work, on_result):
+        """Run work on a worker thread and hand its result to on_result on the Tk thread"""
+        def worker():
+            try:
+                result = work()
+            except Exception as e:
+                self.queue.put(f"\nError in background task: {e}\n")
+                return
+            self.queue.put(lambda: on_result(result))
+        Thread(target=worker, daemon=True).start()
+
+    def start_runner(self):
+        """Start the warm script workers in the background, subprocesses are used until then"""
+        if os.getenv('SCRIPT_RUNNER', 'pool') != 'pool':
+            return
+        def start():
+            from script_runner import ScriptRunner
+            return ScriptRunner()
+        def started(runner):
+            self.runner = runner
+        self.run_in_background(start, started)
 
     def run_script(self, script_command):
-        """Run a Python script in a separate thread"""
+        """Run a Python script on a warm worker, or in a subprocess while none is available"""
         self.status_var.set(f"Running {script_command}...")
-        self.output_text.insert(tk.END, f"\n{'='*50}\nRunning {script_command} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n{'='*50}\n")
+        self.queue.put(f"\n{'='*50}\nRunning {script_command} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n{'='*50}\n")
+        
+        # Split the command into parts while preserving quoted strings
+        import shlex
+        command_parts = shlex.split(script_command)
+        
+        def done(code):
+            self.queue.put(f"\nScript completed with return code: {code}\n")
+            self.queue.put(lambda: self.status_var.set("Ready"))
+        
+        if self.runner:
+            self.runner.submit(command_parts[0], command_parts[1:], self.queue.put, done)
+            return
         
         def run():
             try:
-                # Split the command into parts while preserving quoted strings
-                import shlex
-                command_parts = shlex.split(script_command)
                 script_path = os.path.join("scripts", command_parts[0])
                 
                 # Construct the command list
@@ -411,57 +509,29 @@ class ScriptGUI:
                     if output:
                         self.queue.put(output)
                 
-                self.queue.put(f"\nScript completed with return code: {process.poll()}\n")
-                self.status_var.set("Ready")
+                done(process.poll())
             except Exception as e:
                 self.queue.put(f"\nError running script: {str(e)}\n")
-                self.status_var.set("Error")
+                self.queue.put(lambda: self.status_var.set("Error"))
         
         threading.Thread(target=run, daemon=True).start()
 
     def clear_output(self):
         """Clear the output text area"""
         self.output_text.delete(1.0, tk.END)
-
-    def load_collaborations(self):
-        """Load available collaborations into the selector"""
-        try:
-            import glob
-            import json
-            collab_files = glob.glob('data/collaborations/*.json')
-            collabs = []
-            for file in collab_files:
-                with open(file, 'r') as f:
-                    data = json.load(f)
-                    desc = f"{data.get('collaborationId')} - {data.get('clientSwarmId')} with {data.get('providerSwarmId')}"
-                    collabs.append(desc)
-            
-            sorted_collabs = sorted(collabs)
-            self.collab_selector['values'] = sorted_collabs
-            if collabs:
-                self.collab_selector.set(sorted_collabs[0])
-        except Exception as e:
-            print(f"Error loading collaborations: {e}")
-
-    def generate_conversation(self):
-        """Generate conversation based on selected collaboration and prompt"""
-        collab_id = self.collab_var.get().split(' - ')[0]
-        prompt = self.prompt_text.get("1.0", tk.END).strip()
-        message_count = self.message_count.get()
-        
-        if not prompt:
-            self.status_var.set("Please enter a prompt")
-            return
-            
-        self.status_var.set("Generating conversation...")
-        self.run_script(f"generate_conversation.py {collab_id} \"{prompt}\" {message_count}")
+        self.output_log.flush()
+        self.output_log_start = self.output_log.tell()
 
     def save_output(self):
         """Save the output to a file"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"output_{timestamp}.log"
-        with open(filename, "w") as f:
-            f.write(self.output_text.get(1.0, tk.END))
+        # The session log holds everything, including lines trimmed from the console,
+        # but output cleared from the console is left out
+        self.output_log.flush()
+        with open(self.output_log_path, 'rb') as src, open(filename, 'wb') as dst:
+            src.seek(self.output_log_start)
+            shutil.copyfileobj(src, dst)
         self.status_var.set(f"Output saved to {filename}")
 
     def toggle_watch(self):
@@ -474,7 +544,7 @@ class ScriptGUI:
                 style="MetallicToggle.TButton"
             )
             self.status_var.set("Started watching for changes...")
-            self.output_text.insert(tk.END, "\n=== Started watching for changes ===\n")
+            self.queue.put("\n=== Started watching for changes ===\n")
             
             def watch_runner():
                 try:
@@ -512,7 +582,7 @@ class ScriptGUI:
                 style="MetallicToggle.TButton"
             )
             self.status_var.set("Stopped watching for changes")
-            self.output_text.insert(tk.END, "\n=== Stopped watching for changes ===\n")
+            self.queue.put("\n=== Stopped watching for changes ===\n")
             
             if self.watch_process:
                 try:
@@ -534,31 +604,16 @@ class ScriptGUI:
         self.status_var.set("Watch process ended")
 
     def load_collaborations(self):
-        """Load available collaborations into the selectors"""
-        try:
-            import glob
-            import json
-            collab_files = glob.glob('data/collaborations/*.json')
-            collabs = []
-            for file in collab_files:
-                with open(file, 'r') as f:
-                    data = json.load(f)
-                    desc = f"{data.get('collaborationId')} - {data.get('clientSwarmId')} with {data.get('providerSwarmId')}"
-                    collabs.append(desc)
-            
-            sorted_collabs = sorted(collabs)
-            # Set values for conversation selector
-            self.collab_selector['values'] = sorted_collabs
-            if collabs:
-                self.collab_selector.set(sorted_collabs[0])
-                
-            # Set values for specification selector
-            self.spec_collab_selector['values'] = sorted_collabs
-            if collabs:
-                self.spec_collab_selector.set(sorted_collabs[0])
-                
-        except Exception as e:
-            print(f"Error loading collaborations: {e}")
+        """Load available collaborations into the selectors on a background thread"""
+        self.run_in_background(load_collaboration_choices, self.set_collaborations)
+
+    def set_collaborations(self, choices):
+        """Fill the collaboration selectors, keeping current selections"""
+        self.collab_choices = choices
+        for selector in (self.collab_selector, self.spec_collab_selector):
+            selector['values'] = choices
+            if choices and selector.get() not in choices:
+                selector.set(choices[0])
 
     def generate_conversation(self):
         """Generate conversation based on selected collaboration and prompt"""
@@ -598,17 +653,10 @@ class ScriptGUI:
         collab_selector = ttk.Combobox(dialog, textvariable=collab_var, width=40, state="readonly")
         collab_selector.grid(row=0, column=1, padx=5, pady=5)
         
-        # Load collaborations
-        collab_files = glob.glob('data/collaborations/*.json')
-        collabs = []
-        for file in collab_files:
-            with open(file, 'r') as f:
-                data = json.load(f)
-                desc = f"{data.get('collaborationId')} - {data.get('clientSwarmId')} with {data.get('providerSwarmId')}"
-                collabs.append(desc)
-        collab_selector['values'] = sorted(collabs)
-        if collabs:
-            collab_selector.set(collabs[0])
+        # Use the collaborations already loaded for the main selectors
+        collab_selector['values'] = self.collab_choices
+        if self.collab_choices:
+            collab_selector.set(self.collab_choices[0])
         
         # Topic Entry
         ttk.Label(dialog, text="Topic:", style="Metallic.TLabel").grid(row=1, column=0, padx=5, pady=5)
@@ -0,0 +1,287 @@
+import os
+import sys
+import json
+import time
+import hmac
+import base64
+import socket
+import hashlib
+import getpass
+import argparse
+import tempfile
+import subprocess
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from bootstrap import load_env, private_dir, peer_uid
+
+load_env()
+
+# KDF parameters of every encrypted wallet in secure/, do not change
+KDF_ITERATIONS = 480000
+KDF_LENGTH = 32
+
+# In the per-user runtime directory, else in a 0700 directory of our own under the temp dir
+AGENT_DIR = os.getenv('XDG_RUNTIME_DIR') or os.path.join(tempfile.gettempdir(), f"kinos-keystore-{getpass.getuser()}")
+AGENT_SOCKET = os.getenv('KEYSTORE_SOCKET', os.path.join(AGENT_DIR, 'kinos-keystore.sock'))
+AGENT_TTL = int(os.getenv('KEYSTORE_TTL', 3600))
+# off: always derive locally, on: use a running agent, auto: start one when none is running
+AGENT_MODE = os.getenv('KEYSTORE_AGENT', 'on').lower()
+
+# Encrypted hot wallet keys by swarm id, written in one atomic update
+HOT_WALLET_KEYSTORE = 'secure/hot_wallets.keystore.json'
+
+_fernet = None
+
+
+def _secrets():
+    salt = os.getenv('WALLET_SALT').encode()
+    password = (
+        os.getenv('WALLET_SECRET_1') +
+        os.getenv('WALLET_SECRET_2')
+    ).encode()
+    return salt, password
+
+
+def derive_key():
+    """Create encryption key from environment variables"""
+    salt, password = _secrets()
+
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=KDF_LENGTH,
+        salt=salt,
+        iterations=KDF_ITERATIONS,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(password))
+
+
+def key_check(key):
+    """Tag binding a key to the local secrets, cheap to compute unlike derive_key()
+
+    Only a process holding the same WALLET_* values can produce it, so a key
+    served by anything else, or by an agent started with older secrets, fails
+    the check.
+    """
+    salt, password = _secrets()
+    secret = hashlib.sha256(b'kinos-keystore-check\0' + salt + b'\0' + password).digest()
+    return hmac.new(secret, key, hashlib.sha256).hexdigest().encode()
+
+
+def agent_supported():
+    return hasattr(socket, 'AF_UNIX') and hasattr(os, 'getuid')
+
+
+def _request(command, timeout=2.0):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(AGENT_SOCKET)
+        uid = peer_uid(sock)
+        if uid is not None and uid != os.getuid():
+            raise PermissionError(f"{AGENT_SOCKET} is served by uid {uid}")
+        sock.sendall(command + b'\n')
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = sock.recv(256)
+            if not chunk:
+                break
+            data += chunk
+    return data.strip()
+
+
+def key_from_agent():
+    """Fernet key held by a running agent of this user, or None unless it passes key_check()"""
+    if AGENT_MODE == 'off' or not agent_supported() or not os.path.exists(AGENT_SOCKET):
+        return None
+    if not private_dir(os.path.dirname(AGENT_SOCKET)):
+        return None
+    try:
+        key, _, check = _request(b'GET').partition(b' ')
+    except OSError:
+        return None
+    if not key or not hmac.compare_digest(check, key_check(key)):
+        return None
+    return key
+
+
+def start_agent(ttl=AGENT_TTL, wait=10.0):
+    """Launch a detached agent and wait until it serves the key"""
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), 'agent', '--ttl', str(ttl)],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        key = key_from_agent()
+        if key:
+            return key
+        time.sleep(0.1)
+    return None
+
+
+def get_key():
+    """Fernet key from the agent when one is available, else derived locally"""
+    key = key_from_agent()
+    if key is None and AGENT_MODE == 'auto' and agent_supported():
+        key = start_agent()
+    return key or derive_key()
+
+
+def get_fernet():
+    """Process-wide Fernet for the wallet key"""
+    global _fernet
+    if _fernet is None:
+        _fernet = Fernet(get_key())
+    return _fernet
+
+
+def decrypt(token):
+    """Decrypt a wallet secret"""
+    return get_fernet().decrypt(token)
+
+
+def encrypt(data):
+    return get_fernet().encrypt(data)
+
+
+def keypair_from_encrypted(encrypted_key):
+    """Decrypt a base58 private key into a Keypair"""
+    # Imported here so the agent process does not load the Solana stack
+    import base58
+    from solders.keypair import Keypair
+    private_key = decrypt(encrypted_key.encode()).decode()
+    return Keypair.from_bytes(base58.b58decode(private_key))
+
+
+def load_keypair(path):
+    """Decrypt a base58 private key file from secure/ into a Keypair"""
+    with open(path, 'r') as f:
+        return keypair_from_encrypted(f.read())
+
+
+def load_keystore(path=HOT_WALLET_KEYSTORE):
+    """Encrypted keys of the bulk keystore by swarm id"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_keystore(keys, path=HOT_WALLET_KEYSTORE):
+    """Atomically replace the bulk keystore, readable by the owner only"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(keys, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_hot_wallet(swarm_id):
+    """Keypair of a swarm's hot wallet from the bulk keystore or its own .enc file"""
+    encrypted_key = load_keystore().get(swarm_id)
+    if encrypted_key:
+        return keypair_from_encrypted(encrypted_key)
+    return load_keypair(f'secure/{swarm_id}_wallet.enc')
+
+
+def load_treasury_wallet():
+    """Load encrypted treasury wallet"""
+    try:
+        return load_keypair('secure/treasury_wallet.enc')
+    except Exception as e:
+        print(f"Error loading treasury wallet: {e}")
+        return None
+
+
+def run_agent(ttl=AGENT_TTL):
+    """Serve the derived key on AGENT_SOCKET until ttl seconds have passed"""
+    if not agent_supported():
+        print("Unix sockets are not available here, scripts will derive the key themselves")
+        return
+    socket_dir = os.path.dirname(AGENT_SOCKET)
+    if not private_dir(socket_dir, create=True):
+        print(f"Not starting the agent: {socket_dir} must be a directory owned by you with mode 0700")
+        return
+    if os.path.exists(AGENT_SOCKET):
+        try:
+            _request(b'PING', timeout=1.0)
+            print(f"An agent is already running on {AGENT_SOCKET}")
+            return
+        except OSError:
+            os.unlink(AGENT_SOCKET)
+
+    key = derive_key()
+    check = key_check(key)
+    expires = time.time() + ttl
+    old_umask = os.umask(0o177)  # socket is only accessible to this user
+    try:
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(AGENT_SOCKET)
+    finally:
+        os.umask(old_umask)
+    server.listen(8)
+    server.settimeout(1.0)
+    print(f"Key agent listening on {AGENT_SOCKET} for {ttl}s")
+
+    try:
+        while time.time() < expires:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            with conn:
+                conn.settimeout(2.0)
+                try:
+                    uid = peer_uid(conn)
+                    if uid is not None and uid != os.getuid():
+                        continue
+                    command = conn.recv(64).strip()
+                    if command == b'GET':
+                        conn.sendall(key + b' ' + check + b'\n')
+                    elif command == b'PING':
+                        conn.sendall(b'OK\n')
+                    elif command == b'STOP':
+                        conn.sendall(b'OK\n')
+                        break
+                except OSError:
+                    continue
+    finally:
+        key = check = None
+        server.close()
+        if os.path.exists(AGENT_SOCKET):
+            os.unlink(AGENT_SOCKET)
+        print("Key agent stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wallet key agent')
+    sub = parser.add_subparsers(dest='command', required=True)
+    agent = sub.add_parser('agent', help='Derive the key once and serve it to local scripts')
+    agent.add_argument('--ttl', type=int, default=AGENT_TTL, help='Seconds before the agent forgets the key and exits')
+    sub.add_parser('stop', help='Stop a running agent')
+    sub.add_parser('status', help='Check whether an agent is running')
+    args = parser.parse_args()
+
+    if args.command == 'agent':
+        run_agent(args.ttl)
+    elif not agent_supported():
+        print("Unix sockets are not available here, no agent can run")
+    elif args.command == 'stop':
+        try:
+            _request(b'STOP')
+            print("Key agent stopped")
+        except OSError:
+            print("No key agent running")
+    elif args.command == 'status':
+        try:
+            _request(b'PING', timeout=1.0)
+            print(f"Key agent running on {AGENT_SOCKET}")
+        except OSError:
+            print("No key agent running")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+from datetime import datetime
+from bootstrap import private_dir, peer_uid
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Subcommand -> (script, help)
+COMMANDS = {
+    'pull': ('pullData.py', 'Pull all Airtable tables into data/'),
+    'push': ('pushData.py', 'Push data/ to Airtable (--table to push one table)'),
+    'watch': ('watch_changes.py', 'Watch the repository and sync changes'),
+    'distributions': ('calculate_distributions.py', 'Calculate and record weekly distributions'),
+    'relations': ('list_swarm_relations.py', 'List provider/client relations between swarms'),
+    'generate': ('generate_conversation.py', 'Generate collaboration messages'),
+    'spec': ('generate_specification.py', 'Generate a collaboration specification'),
+    'batch': ('batch_generate.py', 'Generate conversations and specs for many collaborations'),
+    'recap': ('send_recap.py', 'Generate and send the news recap'),
+}
+WALLET_COMMANDS = {
+    'treasury': ('create_treasury_wallet.py', 'Create the treasury wallet'),
+    'create': ('create_hot_wallets.py', 'Create hot wallets for swarms without one'),
+    'accounts': ('create_token_accounts.py', 'Create missing token accounts'),
+    'fund': ('fund_hot_wallets.py', 'Fund hot wallets from the treasury'),
+    'balances': ('balance_monitor.py', 'Check hot wallet balances and plan refills'),
+    'payments': ('weekly_payments.py', 'Settle the weekly collaboration payments'),
+    'phantom': ('phantom_pay.py', 'Open a Phantom payment link'),
+}
+# Long-running scripts that would hold a daemon worker forever
+LOCAL_ONLY = {'watch_changes.py'}
+
+# In a 0700 directory, so only this user can connect; both ends also check the peer uid
+SOCKET_PATH = os.getenv('KINOS_SOCKET', 'cache/daemon/kinos.sock')
+DAEMON_WORKERS = int(os.getenv('KINOS_DAEMON_WORKERS', 2))
+# Sibling modules kept imported in the daemon workers on top of the heavy SDKs
+DAEMON_PRELOAD = ('file_index', 'llm_cache', 'message_log', 'summary_store', 'tx_packer', 'tx_executor',
+                  'airtable_sync', 'vector_index')
+BENCH_FILE = 'cache/kinos_bench.json'
+
+
+def resolve(command, args):
+    """Script and arguments for a subcommand, None for an unknown one"""
+    if command == 'wallets':
+        if not args or args[0] not in WALLET_COMMANDS:
+            return None
+        return WALLET_COMMANDS[args[0]][0], list(args[1:])
+    if command not in COMMANDS:
+        return None
+    return COMMANDS[command][0], list(args)
+
+
+def run_local(script, args):
+    """Run a script in this process as __main__ and return its exit code"""
+    import runpy
+    path = os.path.join(SCRIPTS_DIR, script)
+    sys.argv = [path] + list(args)
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    try:
+        runpy.run_path(path, run_name='__main__')
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code)
+        return 1
+    return 0
+
+
+def _connect(timeout=None):
+    """Socket connected to the daemon, None when no daemon of this user is running"""
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(SOCKET_PATH):
+        return None
+    if not private_dir(os.path.dirname(os.path.abspath(SOCKET_PATH))):
+        print(f"Ignoring daemon socket {SOCKET_PATH}: its directory must be yours with mode 0700", file=sys.stderr)
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(SOCKET_PATH)
+        uid = peer_uid(client)
+    except OSError:
+        client.close()
+        return None
+    if uid is not None and uid != os.getuid():
+        client.close()
+        return None
+    return client
+
+
+def _request(client, message):
+    client.sendall((json.dumps(message) + '\n').encode('utf-8'))
+    return client.makefile('r', encoding='utf-8')
+
+
+def run_remote(script, args):
+    """Run a script on the daemon, streaming its output
+
+    Returns the exit code, or None when no daemon is available so the
+    caller can run the script locally instead.
+    """
+    client = _connect()
+    if client is None:
+        return None
+    with client:
+        replies = _request(client, {'script': script, 'args': list(args), 'cwd': os.getcwd(),
+                                    'env': dict(os.environ)})
+        for line in replies:
+            reply = json.loads(line)
+            if 'output' in reply:
+                sys.stdout.write(reply['output'])
+                sys.stdout.flush()
+            elif 'exit' in reply:
+                return reply['exit']
+            elif 'error' in reply:
+                print(f"Daemon: {reply['error']}, running locally", file=sys.stderr)
+                return None
+    print("Daemon closed the connection before the script finished", file=sys.stderr)
+    return 1
+
+
+def control(action):
+    """Send a control message (status, stop) to the daemon, None when it is not running"""
+    client = _connect(timeout=10)
+    if client is None:
+        return None
+    with client:
+        line = _request(client, {'control': action}).readline()
+    return json.loads(line) if line else {}
+
+
+def serve(workers=DAEMON_WORKERS):
+    """Run the daemon in the foreground until stopped
+
+    Scripts run on a pool of warm ScriptRunner workers, so SDK imports are
+    paid once per worker instead of once per command. Sibling modules and
+    the Airtable client and vector index they hold stay loaded between
+    commands run with the same environment, and are imported again when it
+    or .env changes so env-derived constants are never stale. .env is read
+    again and the keystore key dropped for every command. Each connection
+    is one request: a script to run, whose output is streamed back as JSON
+    lines, or a control message. A script runs with the client's
+    environment (KINOS_*, MESSAGE_STORE, ...), not the daemon's. Only
+    processes of the daemon's user can connect.
+    """
+    import queue
+    import threading
+    import socketserver
+    from script_runner import ScriptRunner, PRELOAD
+
+    if control('status') is not None:
+        print(f"Daemon already running on {SOCKET_PATH}")
+        return 1
+    socket_dir = os.path.dirname(os.path.abspath(SOCKET_PATH))
+    if not private_dir(socket_dir, create=True):
+        print(f"Not starting the daemon: {socket_dir} must be a directory owned by you with mode 0700")
+        return 1
+    if os.path.exists(SOCKET_PATH):
+        os.remove(SOCKET_PATH)  # left over from a daemon that did not shut down cleanly
+
+    runner = ScriptRunner(workers=workers, preload=PRELOAD + DAEMON_PRELOAD)
+    started = time.time()
+    cwd = os.path.realpath(os.getcwd())
+    stats = {'jobs': 0, 'running': 0}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def reply(self, message):
+            try:
+                self.wfile.write((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+                self.wfile.flush()
+                return True
+            except OSError:
+                return False  # client went away, the script keeps running
+
+        def handle(self):
+            uid = peer_uid(self.connection)
+            if uid is not None and uid != os.getuid():
+                return
+            try:
+                request = json.loads(self.rfile.readline())
+            except ValueError:
+                self.reply({'error': 'invalid request'})
+                return
+
+            if request.get('control') == 'status':
+                self.reply({'pid': os.getpid(), 'cwd': cwd, 'workers': workers, 'ready': runner.ready.is_set(),
+                            'uptime': round(time.time() - started, 1), **stats})
+                return
+            if request.get('control') == 'stop':
+                self.reply({'stopping': True})
+                threading.Thread(target=server.shutdown).start()
+                return
+
+            script = request.get('script')
+            if script not in {s for s, _ in list(COMMANDS.values()) + list(WALLET_COMMANDS.values())}:
+                self.reply({'error': f"unknown script {script}"})
+                return
+            if os.path.realpath(request.get('cwd', '')) != cwd:
+                self.reply({'error': f"daemon serves {cwd}"})
+                return
+
+            events = queue.Queue()
+            stats['jobs'] += 1
+            stats['running'] += 1
+            runner.submit(script, request.get('args', []),
+                          lambda text: events.put(('output', text)),
+                          lambda code: events.put(('exit', code)),
+                          env=request.get('env'))
+            connected = True
+            while True:
+                kind, value = events.get()
+                if connected:
+                    connected = self.reply({kind: value})
+                if kind == 'exit':
+                    break
+            stats['running'] -= 1
+
+    old_umask = os.umask(0o177)  # socket is only accessible to this user
+    try:
+        server = socketserver.ThreadingUnixStreamServer(SOCKET_PATH, Handler)
+    finally:
+        os.umask(old_umask)
+    server.daemon_threads = True
+    print(f"Daemon {os.getpid()} listening on {SOCKET_PATH} with {workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        runner.shutdown()
+        if os.path.exists(SOCKET_PATH):
+            os.remove(SOCKET_PATH)
+        print("Daemon stopped")
+    return 0
+
+
+def bench(command_args, repeats):
+    """Time one command as a plain script, through kinos locally and through the daemon
+
+    Each run is a fresh client process, as when an operator types the
+    command, with output discarded.
+    """
+    import subprocess
+    import statistics
+
+    target = resolve(command_args[0], command_args[1:]) if command_args else None
+    if target is None:
+        print("Usage: kinos.py bench <command> [args...]")
+        return 1
+    script, args = target
+    kinos = os.path.abspath(__file__)
+    modes = {
+        'script': [sys.executable, os.path.join(SCRIPTS_DIR, script)] + args,
+        'kinos-local': [sys.executable, kinos, '--local'] + command_args,
+    }
+    if control('status') is not None:
+        modes['kinos-daemon'] = [sys.executable, kinos] + command_args
+    else:
+        print("Daemon not running, start it with: python scripts/kinos.py daemon start")
+
+    results = {}
+    for mode, argv in modes.items():
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            code = subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+            times.append(time.perf_counter() - start)
+        results[mode] = {'best': round(min(times), 4), 'median': round(statistics.median(times), 4),
+                         'exitCode': code}
+        print(f"{mode:<14} best {min(times):.3f}s  median {statistics.median(times):.3f}s  (exit code {code})")
+
+    os.makedirs(os.path.dirname(BENCH_FILE), exist_ok=True)
+    with open(BENCH_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'measuredAt': datetime.now().isoformat(), 'command': command_args, 'repeats': repeats,
+                   'results': results}, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to {BENCH_FILE}")
+    return 0
+
+
+def build_parser():
+    lines = [f"  {name:<14}{description}" for name, (_, description) in COMMANDS.items()]
+    lines.append(f"  {'wallets':<14}Wallet operations: " + ', '.join(WALLET_COMMANDS))
+    lines += [f"    {name:<12}{description}" for name, (_, description) in WALLET_COMMANDS.items()]
+    lines += [f"  {'daemon':<14}start (foreground), stop or status of the warm daemon",
+              f"  {'bench':<14}Cold vs warm latency of a command"]
+    parser = argparse.ArgumentParser(
+        prog='kinos', description='KinOS operations',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='commands:\n' + '\n'.join(lines) + '\n\nArguments after the command are passed to its script.'
+    )
+    parser.add_argument('--local', action='store_true', help='Run in this process even if the daemon is running')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per mode for bench')
+    parser.add_argument('command', choices=list(COMMANDS) + ['wallets', 'daemon', 'bench'], metavar='command')
+    parser.add_argument('args', nargs=argparse.REMAINDER)
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.command == 'daemon':
+        action = args.args[0] if args.args else 'status'
+        if action == 'start':
+            workers = int(args.args[1]) if len(args.args) > 1 else DAEMON_WORKERS
+            return serve(workers)
+        if action not in ('stop', 'status'):
+            parser.error(f"unknown daemon action {action}")
+        reply = control(action)
+        if reply is None:
+            print("Daemon not running")
+            return 1
+        print(json.dumps(reply, indent=2, ensure_ascii=False))
+        return 0
+
+    if args.command == 'bench':
+        return bench(args.args, args.repeats)
+
+    target = resolve(args.command, args.args)
+    if target is None:
+        parser.error("wallets needs one of: " + ', '.join(WALLET_COMMANDS))
+    script, script_args = target
+
+    if not args.local and script not in LOCAL_ONLY and os.getenv('KINOS_DAEMON', 'on') != 'off':
+        code = run_remote(script, script_args)
+        if code is not None:
+            return code
+    return run_local(script, script_args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
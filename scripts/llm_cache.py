@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+
+# Opt-in: set LLM_CACHE=1 in .env to reuse Claude responses across runs
+CACHE_DIR = Path(os.getenv('LLM_CACHE_DIR', 'cache/llm'))
+CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))  # seconds
+CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+# Puts between eviction scans, so a write does not list the whole cache each time
+EVICT_INTERVAL = int(os.getenv('LLM_CACHE_EVICT_INTERVAL', '50'))
+
+# Entry files keep their store time as mtime and their last use as atime
+_puts_since_evict = 0
+
+
+def cache_enabled(no_cache=False):
+    """Check whether the response cache should be used for this run"""
+    if no_cache:
+        return False
+    return os.getenv('LLM_CACHE', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def pop_no_cache_flag(argv):
+    """Remove --no-cache from an argument list, returning (args, no_cache)"""
+    args = [a for a in argv if a != '--no-cache']
+    return args, len(args) != len(argv)
+
+
+def make_cache_key(model, system, messages, max_tokens):
+    """Hash the request parameters that determine the response"""
+    payload = json.dumps({
+        'model': model,
+        'system': system,
+        'messages': messages,
+        'max_tokens': max_tokens
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _entry_path(key):
+    return CACHE_DIR / key[:2] / f"{key}.json"
+
+
+def _expired(stat, now):
+    return CACHE_TTL > 0 and now - stat.st_mtime > CACHE_TTL
+
+
+def get_cached(key):
+    """Return cached response text for key, or None if missing or expired"""
+    path = _entry_path(key)
+    now = time.time()
+    try:
+        stat = path.stat()
+        if _expired(stat, now):
+            path.unlink(missing_ok=True)
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # Mark the entry used for eviction, keeping its store time for the TTL
+    try:
+        os.utime(path, (now, stat.st_mtime))
+    except OSError:
+        pass
+    return entry.get('text')
+
+
+def put_cached(key, text, model=None):
+    """Store response text under key, evicting old entries every EVICT_INTERVAL puts"""
+    global _puts_since_evict
+    path = _entry_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stored_at = time.time()
+    entry = {
+        'key': key,
+        'model': model,
+        'storedAt': stored_at,
+        'text': text
+    }
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.utime(tmp_path, (stored_at, stored_at))
+    os.replace(tmp_path, path)
+
+    _puts_since_evict += 1
+    if _puts_since_evict >= EVICT_INTERVAL:
+        _puts_since_evict = 0
+        evict()
+
+
+def evict(max_bytes=None):
+    """Drop expired entries, then least recently used ones until under max_bytes
+
+    Between scans the cache can exceed max_bytes by up to EVICT_INTERVAL entries.
+    """
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if not CACHE_DIR.exists():
+        return 0
+
+    now = time.time()
+    entries = []
+    removed = 0
+    for path in CACHE_DIR.glob('*/*.json'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        if _expired(stat, now):
+            path.unlink(missing_ok=True)
+            removed += 1
+            continue
+        entries.append((stat.st_atime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def create_message_text(client, model, system, messages, max_tokens, no_cache=False):
+    """Call client.messages.create and return the first text block, using the cache when enabled"""
+    use_cache = cache_enabled(no_cache)
+    key = make_cache_key(model, system, messages, max_tokens)
+
+    if use_cache:
+        text = get_cached(key)
+        if text is not None:
+            print(f"Using cached response ({key[:12]})")
+            return text
+
+    response = client.messages.create(
+        model=model,
+        max_tokens=max_tokens,
+        system=system,
+        messages=messages
+    )
+    if not hasattr(response, 'content') or len(response.content) == 0:
+        return None
+
+    text = response.content[0].text
+    # Write even with --no-cache so a forced regeneration refreshes the entry
+    if cache_enabled():
+        put_cached(key, text, model)
+    return text
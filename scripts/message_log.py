@@ -0,0 +1,342 @@
+import os
+import json
+import glob
+import argparse
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from conversations import conversation_key
+
+# Optional storage backend: set MESSAGE_STORE=log to read messages from here.
+# data/messages stays the source of truth, the log is a local cache of it
+LOG_DIR = os.getenv('MESSAGE_LOG_DIR', 'cache/message_log')
+MESSAGES_DIR = 'data/messages'
+PARTITION = os.getenv('MESSAGE_LOG_PARTITION', 'collaboration')  # or 'day'
+COMPACT_DEAD_RATIO = 0.5
+
+
+def log_enabled():
+    """Check whether the segmented log is the configured message store"""
+    return os.getenv('MESSAGE_STORE', 'files').lower() == 'log'
+
+
+def _lock_file(f):
+    if fcntl:
+        fcntl.flock(f, fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f):
+    if fcntl:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class MessageLog:
+    """Messages stored in append-only JSONL segments with an offset index
+
+    Each segment holds one collaboration (or one day) so reading a
+    conversation is a single sequential read. Rewriting a message appends
+    a new version; compaction drops superseded versions. sync() brings the
+    log in line with data/messages, including files edited in place or
+    deleted.
+
+    The watcher, the generators and pullData write to the same log, so
+    every change runs under a file lock on a freshly loaded index and is
+    saved before the lock is released.
+    """
+
+    def __init__(self, log_dir=LOG_DIR, partition=PARTITION):
+        self.log_dir = log_dir
+        self.partition = partition
+        self.segment_dir = os.path.join(log_dir, 'segments')
+        self.index_path = os.path.join(log_dir, 'index.json')
+        self.lock_path = os.path.join(log_dir, 'index.lock')
+        # messageId -> [segment, offset, length, source mtime]
+        self.index = {}
+        # segment -> total bytes written, used to decide when to compact
+        self.segment_bytes = {}
+        # source file name -> [mtime at last import, messageId]
+        self.sources = {}
+        self._dirty = False
+        self._lock_depth = 0
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.index = data.get('messages', {})
+            self.segment_bytes = data.get('segmentBytes', {})
+            self.sources = data.get('sources', {})
+        except (OSError, ValueError):
+            self.index = {}
+            self.segment_bytes = {}
+            self.sources = {}
+
+    def save_index(self):
+        if not self._dirty:
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'partition': self.partition, 'messages': self.index,
+                       'segmentBytes': self.segment_bytes, 'sources': self.sources}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    @contextmanager
+    def locked(self):
+        """Hold the log lock with the index reloaded, saving it on the way out"""
+        if self._lock_depth:
+            yield self
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        with open(self.lock_path, 'a+b') as lock_file:
+            _lock_file(lock_file)
+            self._lock_depth += 1
+            try:
+                # Another process may have changed the log since it was loaded
+                self._load_index()
+                self._dirty = False
+                yield self
+                self.save_index()
+            finally:
+                self._lock_depth -= 1
+                _unlock_file(lock_file)
+
+    def segment_for(self, message):
+        """Name of the segment a message belongs to"""
+        if self.partition == 'day':
+            return f"day-{(message.get('timestamp') or 'unknown')[:10]}"
+        return conversation_key(message)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.segment_dir, f"{segment}.jsonl")
+
+    def append(self, message, source_mtime=None, source_name=None):
+        """Append a message (or a new version of it) to its segment"""
+        message_id = message.get('messageId')
+        if not message_id:
+            raise ValueError("Message is missing messageId")
+
+        with self.locked():
+            segment = self.segment_for(message)
+            line = (json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8')
+            os.makedirs(self.segment_dir, exist_ok=True)
+            with open(self._segment_path(segment), 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line)
+
+            self.index[message_id] = [segment, offset, len(line), source_mtime]
+            self.segment_bytes[segment] = self.segment_bytes.get(segment, 0) + len(line)
+            if source_name:
+                self.sources[source_name] = [source_mtime, message_id]
+            self._dirty = True
+        return segment
+
+    def append_file(self, file_path, message):
+        """Append a message read from file_path unless that file version is already logged"""
+        name = os.path.basename(file_path)
+        mtime = os.path.getmtime(file_path)
+        with self.locked():
+            if self.sources.get(name, [None])[0] == mtime:
+                return None
+            return self.append(message, source_mtime=mtime, source_name=name)
+
+    def remove_file(self, file_path):
+        """Drop the message imported from a deleted file; its bytes go at the next compaction"""
+        with self.locked():
+            _, message_id = self.sources.pop(os.path.basename(file_path), [None, None])
+            if message_id is None:
+                return False
+            # Kept when another file still holds the same message, e.g. after a rename
+            if not any(source[1] == message_id for source in self.sources.values()):
+                self.index.pop(message_id, None)
+            self._dirty = True
+        return True
+
+    def get(self, message_id):
+        """Read one message by ID with a single seek"""
+        location = self.index.get(message_id)
+        if not location:
+            return None
+        segment, offset, length = location[:3]
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def read_segment(self, segment):
+        """Read the live messages of a segment in one sequential pass"""
+        path = self._segment_path(segment)
+        if not os.path.exists(path):
+            return []
+        messages = []
+        offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    message = json.loads(line)
+                    location = self.index.get(message.get('messageId'))
+                    # Older versions of a rewritten message are skipped
+                    if location and location[0] == segment and location[1] == offset:
+                        messages.append(message)
+                offset += len(line)
+        return sorted(messages, key=lambda x: x.get('timestamp', ''))
+
+    def read_collaboration(self, collab_id):
+        """All messages of a collaboration, oldest first"""
+        if self.partition == 'day':
+            messages = []
+            for segment in self.segments():
+                messages.extend(m for m in self.read_segment(segment) if m.get('collaborationId') == collab_id)
+            return sorted(messages, key=lambda x: x.get('timestamp', ''))
+        return self.read_segment(conversation_key({'collaborationId': collab_id}))
+
+    def segments(self):
+        return sorted(os.path.basename(p)[:-len('.jsonl')] for p in glob.glob(os.path.join(self.segment_dir, '*.jsonl')))
+
+    def iter_messages(self):
+        for segment in self.segments():
+            yield from self.read_segment(segment)
+
+    def live_bytes(self, segment):
+        return sum(loc[2] for loc in self.index.values() if loc[0] == segment)
+
+    def compact(self, force=False):
+        """Rewrite segments whose superseded versions exceed COMPACT_DEAD_RATIO"""
+        with self.locked():
+            live = {}
+            for loc in self.index.values():
+                live[loc[0]] = live.get(loc[0], 0) + loc[2]
+
+            compacted = 0
+            for segment in self.segments():
+                total = self.segment_bytes.get(segment) or os.path.getsize(self._segment_path(segment))
+                dead = total - live.get(segment, 0)
+                if not force and (total == 0 or dead / total < COMPACT_DEAD_RATIO):
+                    continue
+
+                messages = self.read_segment(segment)
+                tmp_path = self._segment_path(segment) + '.tmp'
+                offset = 0
+                with open(tmp_path, 'wb') as f:
+                    for message in messages:
+                        line = (json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8')
+                        f.write(line)
+                        location = self.index[message['messageId']]
+                        self.index[message['messageId']] = [segment, offset, len(line), location[3]]
+                        offset += len(line)
+                os.replace(tmp_path, self._segment_path(segment))
+                self.segment_bytes[segment] = offset
+                self._dirty = True
+                compacted += 1
+        return compacted
+
+    def sync(self, directory=MESSAGES_DIR):
+        """Bring the log in line with data/messages before reading from it
+
+        Every file is stat'ed, as files rewritten in place leave the directory
+        mtime alone, and only new or changed files are parsed.
+        """
+        if os.path.isdir(directory):
+            self.import_files(directory)
+        return self
+
+    def import_files(self, directory=MESSAGES_DIR):
+        """Append per-file messages that are new or changed since the last import
+
+        Messages whose file is gone are dropped from the log.
+        """
+        imported = 0
+        seen = set()
+        with self.locked():
+            for file_path in glob.glob(f"{directory}/*.json"):
+                name = os.path.basename(file_path)
+                seen.add(name)
+                try:
+                    mtime = os.path.getmtime(file_path)
+                    if self.sources.get(name, [None])[0] == mtime:
+                        continue
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                    if not content.strip():
+                        continue
+                    message = json.loads(content)
+                except Exception as e:
+                    print(f"Skipping {file_path}: {e}")
+                    continue
+
+                if not message.get('messageId'):
+                    self.sources[name] = [mtime, None]
+                    self._dirty = True
+                    continue
+                # Messages that move between segments leave a dead copy behind
+                self.append(message, source_mtime=mtime, source_name=name)
+                imported += 1
+
+            for name in [name for name in self.sources if name not in seen]:
+                self.remove_file(name)
+
+            # Compaction piggybacks on imports so dead versions do not pile up
+            self.compact()
+        return imported
+
+    def export_files(self, directory=MESSAGES_DIR):
+        """Write every live message back to the one-file-per-message layout"""
+        os.makedirs(directory, exist_ok=True)
+        exported = 0
+        for message in self.iter_messages():
+            file_path = f"{directory}/{message['messageId']}.json"
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    if json.load(f) == message:
+                        continue
+            except (OSError, ValueError):
+                pass
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(message, f, indent=2, ensure_ascii=False)
+            exported += 1
+        return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the segmented message log')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('import', help='Import data/messages/*.json into the log')
+    sub.add_parser('export', help='Write the log back to data/messages/*.json')
+    compact = sub.add_parser('compact', help='Drop superseded message versions')
+    compact.add_argument('--force', action='store_true', help='Rewrite every segment')
+    sub.add_parser('stats', help='Show segment statistics')
+    show = sub.add_parser('show', help='Print the messages of a collaboration')
+    show.add_argument('collaboration_id')
+    args = parser.parse_args()
+
+    log = MessageLog()
+    if args.command == 'import':
+        print(f"Imported {log.import_files()} messages into {log.log_dir}")
+    elif args.command == 'export':
+        print(f"Exported {log.export_files()} messages to data/messages")
+    elif args.command == 'compact':
+        print(f"Compacted {log.compact(force=args.force)} segments")
+    elif args.command == 'stats':
+        print(f"Partition: {log.partition}")
+        print(f"Messages: {len(log.index)}")
+        for segment in log.segments():
+            total = log.segment_bytes.get(segment, 0)
+            print(f"  {segment}: {total:,} bytes, {log.live_bytes(segment):,} live")
+    elif args.command == 'show':
+        for message in log.sync().read_collaboration(args.collaboration_id):
+            print(f"[{message.get('timestamp')}] {message.get('senderId')}: {message.get('content')}")
+
+
+if __name__ == '__main__':
+    main()
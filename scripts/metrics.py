@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Off unless set: port for a Prometheus text endpoint on 127.0.0.1
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_FILE = os.getenv('METRICS_FILE', 'cache/metrics.json')
+# Seconds between JSON dumps, 0 to only dump on request
+METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', 30))
+# Histogram bucket bounds in seconds, Prometheus client defaults stretched for git and API calls
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Recent observations kept per histogram series for the quantiles in the JSON dump
+RECENT = 1024
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    rendered = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                        for k, v in labels)
+    return f"{name}{{{rendered}}}"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self):
+        ordered = sorted(self.recent)
+        quantile = lambda q: round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 4) if ordered else None
+        return {'count': self.count, 'sum': round(self.sum, 4), 'mean': round(self.sum / self.count, 4) if self.count else None,
+                'p50': quantile(0.5), 'p95': quantile(0.95), 'max': round(self.max, 4)}
+
+
+class Trace:
+    """Stage durations of one unit of work, e.g. one file event, for a structured log line"""
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.spans = {}
+        self.start = time.perf_counter()
+
+    def record(self):
+        return {'trace': self.name, **self.attributes,
+                'spans': {stage: round(seconds, 4) for stage, seconds in self.spans.items()},
+                'total': round(time.perf_counter() - self.start, 4)}
+
+
+class Metrics:
+    """Thread-safe counters and histograms, keyed by name and labels"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def span(self, name, trace=None, **labels):
+        """Time a block into the <name>_seconds histogram, counting errors_total{stage=name} if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc('errors_total', stage=name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(f"{name}_seconds", elapsed, **labels)
+            if trace is not None:
+                trace.spans[name] = trace.spans.get(name, 0) + elapsed
+
+    def prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{_series(name, labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{_series(name + '_bucket', labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{_series(name + '_sum', labels)} {histogram.sum:.6f}")
+                lines.append(f"{_series(name + '_count', labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'updatedAt': datetime.now().isoformat(),
+                'uptime': round(time.time() - self.started, 1),
+                'counters': {_series(name, labels): value for (name, labels), value in sorted(self.counters.items())},
+                'histograms': {_series(name, labels): histogram.summary()
+                               for (name, labels), histogram in sorted(self.histograms.items())},
+            }
+
+    def dump(self, path=METRICS_FILE):
+        """Write the snapshot as JSON, replacing the file atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /metrics (Prometheus text) and /metrics.json from a background thread"""
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path == '/metrics':
+                    payload, content_type = registry.prometheus().encode('utf-8'), 'text/plain; version=0.0.4'
+                elif path == '/metrics.json':
+                    payload, content_type = json.dumps(registry.snapshot()).encode('utf-8'), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def start(self, port=METRICS_PORT, path=METRICS_FILE, interval=METRICS_INTERVAL):
+        """Start whichever exporters are configured: the endpoint when port is set, the dump every interval"""
+        if port:
+            self.serve(port)
+            print(f"Metrics on http://127.0.0.1:{port}/metrics")
+        if interval and path:
+            def dump_loop():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.dump(path)
+                    except OSError as e:
+                        print(f"Error writing metrics to {path}: {e}")
+
+            threading.Thread(target=dump_loop, daemon=True).start()
+
+
+# Process-wide registry used through the functions below
+REGISTRY = Metrics()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+span = REGISTRY.span
+dump = REGISTRY.dump
+start = REGISTRY.start
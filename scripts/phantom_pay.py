@@ -2,21 +2,14 @@ import sys
 import json
 import os
 import glob
-import codecs
 from datetime import datetime
 import webbrowser
-from dotenv import load_dotenv
+from bootstrap import setup_console, load_env
 
 # Force UTF-8 encoding
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-if sys.stdin.encoding != 'utf-8':
-    sys.stdin = codecs.getreader('utf-8')(sys.stdin.buffer, 'strict')
+setup_console()
 
-# Set default encoding to UTF-8
-import locale
-locale.getpreferredencoding = lambda: 'UTF-8'
+load_env()
 
 def load_swarm(swarm_id):
     """Load swarm data"""
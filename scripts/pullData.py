@@ -1,23 +1,14 @@
 import os
-import sys
-import codecs
 import json
-from dotenv import load_dotenv
+from bootstrap import setup_console, load_env
 from pyairtable import Api
+from message_log import MessageLog, log_enabled
 
 # Force UTF-8 encoding for stdin/stdout/stderr
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-if sys.stdin.encoding != 'utf-8':
-    sys.stdin = codecs.getreader('utf-8')(sys.stdin.buffer, 'strict')
-
-# Set default encoding to UTF-8
-import locale
-locale.getpreferredencoding = lambda: 'UTF-8'
+setup_console()
 
 # Load environment variables from .env file
-load_dotenv()
+load_env()
 
 # Get API key from environment variable
 AIRTABLE_API_KEY = os.getenv('AIRTABLE_API_KEY')
@@ -29,8 +20,11 @@ BASE_ID = os.getenv('AIRTABLE_BASE_ID')
 if not BASE_ID:
     raise ValueError("AIRTABLE_BASE_ID environment variable is required")
 
+# Another server to send Airtable requests to, e.g. scripts/airtable_standin.py
+AIRTABLE_ENDPOINT_URL = os.getenv('AIRTABLE_ENDPOINT_URL', 'https://api.airtable.com')
+
 # Initialize Airtable API
-api = Api(AIRTABLE_API_KEY)
+api = Api(AIRTABLE_API_KEY, endpoint_url=AIRTABLE_ENDPOINT_URL)
 
 # Configure table names and their corresponding ID fields
 TABLES = {
@@ -84,6 +78,11 @@ def fetch_and_save_table(table_name, id_field):
     print(f"  - Saved: {saved_count} files")
     if skipped_count > 0:
         print(f"  - Skipped: {skipped_count} records (missing ID)")
+    
+    # Keep the segmented message log in step with the per-file layout
+    if table_name == 'Messages' and log_enabled():
+        imported = MessageLog().import_files(directory)
+        print(f"  - Imported into message log: {imported}")
 
 def main():
     for table_name, id_field in TABLES.items():
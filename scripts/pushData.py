@@ -1,21 +1,11 @@
 import os
-import sys
-import codecs
 import json
 import glob
-from dotenv import load_dotenv
+from bootstrap import setup_console, load_env
 from pyairtable import Api
 
 # Force UTF-8 encoding for stdin/stdout/stderr
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-if sys.stdin.encoding != 'utf-8':
-    sys.stdin = codecs.getreader('utf-8')(sys.stdin.buffer, 'strict')
-
-# Set default encoding to UTF-8
-import locale
-locale.getpreferredencoding = lambda: 'UTF-8'
+setup_console()
 
 def get_table_schema(table):
     """Get the available fields for a table by checking a sample record"""
@@ -34,7 +24,7 @@ def filter_data_for_table(data, valid_fields):
     return {k: v for k, v in data.items() if k in valid_fields}
 
 # Load environment variables from .env file
-load_dotenv()
+load_env()
 
 # Get API key from environment variable
 AIRTABLE_API_KEY = os.getenv('AIRTABLE_API_KEY')
@@ -46,8 +36,11 @@ BASE_ID = os.getenv('AIRTABLE_BASE_ID')
 if not BASE_ID:
     raise ValueError("AIRTABLE_BASE_ID environment variable is required")
 
+# Another server to send Airtable requests to, e.g. scripts/airtable_standin.py
+AIRTABLE_ENDPOINT_URL = os.getenv('AIRTABLE_ENDPOINT_URL', 'https://api.airtable.com')
+
 # Initialize Airtable API
-api = Api(AIRTABLE_API_KEY)
+api = Api(AIRTABLE_API_KEY, endpoint_url=AIRTABLE_ENDPOINT_URL)
 
 def push_swarms():
     print("\nProcessing Swarms...")
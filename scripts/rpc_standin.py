@@ -0,0 +1,319 @@
+# Local stand-in for the Solana JSON-RPC methods used by the treasury scripts.
+# Point them at it with NEXT_PUBLIC_HELIUS_RPC_URL=http://127.0.0.1:8899 to
+# exercise token account creation, funding and balance checks without
+# touching mainnet. Blocks advance on a timer, blockhashes expire after
+# BLOCKHASH_VALIDITY blocks, signatures confirm after a delay, and only
+# associated token account creation and SPL token transfers are executed.
+import json
+import time
+import base64
+import struct
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from solders.hash import Hash
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+
+TOKEN_PROGRAM = 'TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA'
+ATA_PROGRAM = 'ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL'
+COMPUTE_BUDGET_PROGRAM = 'ComputeBudget111111111111111111111111111111'
+BLOCKHASH_VALIDITY = 150
+TOKEN_ACCOUNT_SIZE = 165
+TOKEN_ACCOUNT_RENT = 2039280
+# Packet size limit of a serialized transaction and the compute unit ceiling
+MAX_TX_SIZE = 1232
+MAX_COMPUTE_UNITS = 1_400_000
+
+
+def token_account_data(mint, owner, amount):
+    """SPL token account layout: mint, owner, amount, then an initialized state byte"""
+    data = bytearray(TOKEN_ACCOUNT_SIZE)
+    data[0:32] = bytes(Pubkey.from_string(mint))
+    data[32:64] = bytes(Pubkey.from_string(owner))
+    data[64:72] = struct.pack('<Q', amount)
+    data[108] = 1
+    return bytes(data)
+
+
+def associated_token_address(owner, mint):
+    seeds = [bytes(Pubkey.from_string(owner)), bytes(Pubkey.from_string(TOKEN_PROGRAM)), bytes(Pubkey.from_string(mint))]
+    return str(Pubkey.find_program_address(seeds, Pubkey.from_string(ATA_PROGRAM))[0])
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class LostReply(Exception):
+    """The transaction went through but the client never hears back"""
+
+
+class ChainState:
+    def __init__(self, slot_time=0.4, confirm_delay=0.8, decimals=6, drop_every=0, lose_reply_every=0):
+        self.slot_time = slot_time
+        self.confirm_delay = confirm_delay
+        self.decimals = decimals
+        # Silently drop every Nth transaction to exercise resends
+        self.drop_every = drop_every
+        # Execute every Nth transaction but answer with an HTTP error, like a timeout after delivery
+        self.lose_reply_every = lose_reply_every
+        self.started = time.time()
+        self.accounts = {}      # address -> {'mint', 'owner', 'amount'}
+        self.lamports = {}      # wallet address -> SOL balance, fees and rent are not charged
+        self.signatures = {}    # signature -> {'slot', 'time', 'err'}
+        self.sent = 0
+        self.requests = {}      # method -> count
+        self.lock = threading.Lock()
+
+    def block_height(self):
+        return int((time.time() - self.started) / self.slot_time) + 1
+
+    def blockhash(self, height):
+        return str(Hash(hashlib.sha256(f"standin-{self.started}-{height}".encode()).digest()))
+
+    def valid_blockhashes(self):
+        height = self.block_height()
+        return {self.blockhash(h): h for h in range(max(1, height - BLOCKHASH_VALIDITY), height + 1)}
+
+    def set_token_balance(self, owner, mint, amount):
+        """Create or overwrite the associated token account of owner for mint"""
+        address = associated_token_address(owner, mint)
+        with self.lock:
+            self.accounts[address] = {'mint': mint, 'owner': owner, 'amount': amount}
+        return address
+
+    def set_lamports(self, address, lamports):
+        """Give a wallet a SOL balance, returned as a system account"""
+        with self.lock:
+            self.lamports[address] = lamports
+
+    def _execute(self, message):
+        keys = [str(k) for k in message.account_keys]
+        # Work on a copy so a failing instruction leaves no partial effects
+        accounts = {k: dict(v) for k, v in self.accounts.items()}
+        for index, ix in enumerate(message.instructions):
+            program = keys[ix.program_id_index]
+            metas = [keys[i] for i in bytes(ix.accounts)]
+            data = bytes(ix.data)
+            if program == ATA_PROGRAM:
+                ata, owner, mint = metas[1], metas[2], metas[3]
+                if ata in accounts:
+                    if not data or data[0] != 1:
+                        return {'InstructionError': [index, {'Custom': 0}]}
+                    continue
+                accounts[ata] = {'mint': mint, 'owner': owner, 'amount': 0}
+            elif program == TOKEN_PROGRAM and data and data[0] in (3, 12):
+                amount = struct.unpack('<Q', data[1:9])[0]
+                if data[0] == 3:
+                    source, dest, authority = metas[0], metas[1], metas[2]
+                else:
+                    source, dest, authority = metas[0], metas[2], metas[3]
+                if source not in accounts or dest not in accounts:
+                    return {'InstructionError': [index, 'InvalidAccountData']}
+                if accounts[source]['owner'] != authority:
+                    return {'InstructionError': [index, {'Custom': 4}]}
+                if accounts[source]['amount'] < amount:
+                    return {'InstructionError': [index, {'Custom': 1}]}
+                accounts[source]['amount'] -= amount
+                accounts[dest]['amount'] += amount
+            elif program == COMPUTE_BUDGET_PROGRAM:
+                # SetComputeUnitLimit above the ceiling fails the whole transaction
+                if data and data[0] == 2 and struct.unpack('<I', data[1:5])[0] > MAX_COMPUTE_UNITS:
+                    return {'InstructionError': [index, 'InvalidInstructionData']}
+            else:
+                return {'InstructionError': [index, 'UnsupportedProgramId']}
+        self.accounts = accounts
+        return None
+
+    def send_transaction(self, raw):
+        if len(raw) > MAX_TX_SIZE:
+            raise RpcError(-32602, f"base64 encoded solana_sdk::transaction::versioned::VersionedTransaction "
+                                   f"too large: {len(raw)} bytes (max: {MAX_TX_SIZE} bytes)")
+        tx = Transaction.from_bytes(raw)
+        try:
+            tx.verify()
+        except Exception:
+            raise RpcError(-32003, 'Transaction signature verification failure')
+        signature = str(tx.signatures[0])
+        with self.lock:
+            if str(tx.message.recent_blockhash) not in self.valid_blockhashes():
+                raise RpcError(-32002, 'Transaction simulation failed: Blockhash not found')
+            if signature in self.signatures:
+                return signature
+            self.sent += 1
+            if self.drop_every and self.sent % self.drop_every == 0:
+                return signature
+            err = self._execute(tx.message)
+            self.signatures[signature] = {'slot': self.block_height(), 'time': time.time(), 'err': err}
+            if self.lose_reply_every and self.sent % self.lose_reply_every == 0:
+                raise LostReply()
+        return signature
+
+    def signature_status(self, signature):
+        entry = self.signatures.get(signature)
+        if not entry:
+            return None
+        # processed -> confirmed after confirm_delay -> finalized after twice that
+        age = time.time() - entry['time']
+        if age >= 2 * self.confirm_delay:
+            level = 'finalized'
+        elif age >= self.confirm_delay:
+            level = 'confirmed'
+        else:
+            level = 'processed'
+        return {
+            'slot': entry['slot'],
+            'confirmations': None if level == 'finalized' else (0 if level == 'processed' else 1),
+            'err': entry['err'],
+            'status': {'Err': entry['err']} if entry['err'] else {'Ok': None},
+            'confirmationStatus': level
+        }
+
+    def account_info(self, address):
+        account = self.accounts.get(address)
+        if not account:
+            if address in self.lamports:
+                return {'data': ['', 'base64'], 'executable': False, 'lamports': self.lamports[address],
+                        'owner': '11111111111111111111111111111111', 'rentEpoch': 0, 'space': 0}
+            return None
+        data = token_account_data(account['mint'], account['owner'], account['amount'])
+        return {
+            'data': [base64.b64encode(data).decode('ascii'), 'base64'],
+            'executable': False,
+            'lamports': TOKEN_ACCOUNT_RENT,
+            'owner': TOKEN_PROGRAM,
+            'rentEpoch': 0,
+            'space': TOKEN_ACCOUNT_SIZE
+        }
+
+    def token_amount(self, amount):
+        ui = amount / (10 ** self.decimals)
+        return {
+            'amount': str(amount),
+            'decimals': self.decimals,
+            'uiAmount': ui,
+            'uiAmountString': f"{ui:f}".rstrip('0').rstrip('.')
+        }
+
+    def call(self, method, params):
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+        context = {'slot': self.block_height()}
+        if method == 'getLatestBlockhash':
+            height = self.block_height()
+            return {'context': context, 'value': {
+                'blockhash': self.blockhash(height),
+                'lastValidBlockHeight': height + BLOCKHASH_VALIDITY
+            }}
+        if method == 'getBlockHeight':
+            return self.block_height()
+        if method == 'isBlockhashValid':
+            return {'context': context, 'value': params[0] in self.valid_blockhashes()}
+        if method == 'getMultipleAccounts':
+            if len(params[0]) > 100:
+                raise RpcError(-32602, 'Too many inputs provided; max 100')
+            with self.lock:
+                return {'context': context, 'value': [self.account_info(a) for a in params[0]]}
+        if method == 'getAccountInfo':
+            with self.lock:
+                return {'context': context, 'value': self.account_info(params[0])}
+        if method == 'getTokenAccountBalance':
+            with self.lock:
+                account = self.accounts.get(params[0])
+            if not account:
+                raise RpcError(-32602, 'Invalid param: could not find account')
+            return {'context': context, 'value': self.token_amount(account['amount'])}
+        if method == 'sendTransaction':
+            return self.send_transaction(base64.b64decode(params[0]))
+        if method == 'getSignatureStatuses':
+            if len(params[0]) > 256:
+                raise RpcError(-32602, 'Too many inputs provided; max 256')
+            with self.lock:
+                return {'context': context, 'value': [self.signature_status(s) for s in params[0]]}
+        raise RpcError(-32601, f'Method not found: {method}')
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _handle(self, request):
+            response = {'jsonrpc': '2.0', 'id': request.get('id')}
+            try:
+                response['result'] = state.call(request.get('method'), request.get('params') or [])
+            except LostReply:
+                raise
+            except RpcError as e:
+                response['error'] = {'code': e.code, 'message': e.message}
+            except Exception as e:
+                response['error'] = {'code': -32603, 'message': f'Internal error: {e}'}
+            return response
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            # JSON-RPC batches arrive as a list
+            try:
+                result = [self._handle(r) for r in body] if isinstance(body, list) else self._handle(body)
+            except LostReply:
+                self.send_error(504)
+                return
+            payload = json.dumps(result).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def start_server(host='127.0.0.1', port=8899, **state_options):
+    """Start the stand-in in a background thread and return the server"""
+    state = ChainState(**state_options)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Solana JSON-RPC stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--slot-time', type=float, default=0.4, help='Seconds per block')
+    parser.add_argument('--confirm-delay', type=float, default=0.8, help='Seconds until a signature is confirmed')
+    parser.add_argument('--drop-every', type=int, default=0, help='Drop every Nth transaction')
+    parser.add_argument('--lose-reply-every', type=int, default=0,
+                        help='Execute every Nth transaction but reply with an HTTP error')
+    parser.add_argument('--fund', action='append', default=[], metavar='OWNER:MINT:AMOUNT',
+                        help='Seed a token balance in base units, e.g. for the treasury')
+    parser.add_argument('--sol', action='append', default=[], metavar='WALLET:LAMPORTS',
+                        help='Seed a SOL balance for fees and rent, e.g. for a hot wallet')
+    args = parser.parse_args()
+
+    state = ChainState(args.slot_time, args.confirm_delay, drop_every=args.drop_every,
+                       lose_reply_every=args.lose_reply_every)
+    for spec in args.fund:
+        owner, mint, amount = spec.split(':')
+        print(f"Seeded {state.set_token_balance(owner, mint, int(amount))} with {amount}")
+    for spec in args.sol:
+        wallet, lamports = spec.split(':')
+        state.set_lamports(wallet, int(lamports))
+        print(f"Seeded {wallet} with {lamports} lamports")
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"Solana RPC stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped stand-in")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+import io
+import os
+import sys
+import time
+import queue
+import runpy
+import atexit
+import itertools
+import threading
+import traceback
+import importlib
+import multiprocessing
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy dependencies imported once per worker so scripts start warm
+PRELOAD = (
+    'dotenv', 'anthropic', 'pyairtable', 'numpy', 'cryptography.fernet',
+    'solana.rpc.api', 'solders.keypair', 'spl.token.instructions', 'telegram'
+)
+RUNNER_WORKERS = int(os.getenv('SCRIPT_RUNNER_WORKERS', 2))
+# Output is sent in chunks of whole lines, at least this often while a script runs
+OUTPUT_CHUNK = 8192
+OUTPUT_INTERVAL = 0.05
+# Caches of sibling modules and their empty values, reset after every run so
+# the next script re-reads .env and never inherits a wallet key. Other state,
+# such as the Airtable client and the vector index, stays warm while the
+# working directory, environment and .env are unchanged
+RUN_CACHES = {
+    'bootstrap': ('_env_loaded', False),
+    'keystore': ('_fernet', None),
+}
+ENV_FILES = ('.env', os.path.join(os.path.dirname(SCRIPTS_DIR), '.env'))
+
+
+class QueueWriter:
+    """File-like stdout for a script in a worker, sending whole lines to the parent
+
+    Lines are coalesced into chunks so chatty scripts don't pay one queue
+    message per print; a background thread flushes whatever is pending
+    every OUTPUT_INTERVAL so progress output still shows up promptly.
+    """
+
+    encoding = 'utf-8'
+    errors = 'strict'
+
+    def __init__(self, events, job_id):
+        self.events = events
+        self.job_id = job_id
+        self.pending = ''
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        threading.Thread(target=self._flush_periodically, daemon=True).start()
+
+    def write(self, text):
+        with self.lock:
+            self.pending += text
+            if len(self.pending) >= OUTPUT_CHUNK and '\n' in self.pending:
+                lines, self.pending = self.pending.rsplit('\n', 1)
+                self.events.put(('output', self.job_id, lines + '\n'))
+        return len(text)
+
+    def _flush_periodically(self):
+        while not self.closed.wait(OUTPUT_INTERVAL):
+            with self.lock:
+                if '\n' in self.pending:
+                    lines, self.pending = self.pending.rsplit('\n', 1)
+                    self.events.put(('output', self.job_id, lines + '\n'))
+
+    def flush(self):
+        with self.lock:
+            if self.pending:
+                self.events.put(('output', self.job_id, self.pending))
+                self.pending = ''
+
+    def close(self):
+        self.closed.set()
+        self.flush()
+
+    def isatty(self):
+        return False
+
+
+_module_mtimes = {}
+_context = None
+
+
+def _script_modules():
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if path and os.path.dirname(os.path.abspath(path)) == SCRIPTS_DIR:
+            yield name, path
+
+
+def _forget_changed_modules():
+    """Drop cached script modules whose file changed, so edits are picked up"""
+    for name, path in _script_modules():
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        if name in _module_mtimes and _module_mtimes[name] != mtime:
+            del sys.modules[name]
+            del _module_mtimes[name]
+        else:
+            _module_mtimes[name] = mtime
+
+
+def _run_context():
+    """What the sibling modules' constants and clients were derived from"""
+    env_files = []
+    for path in ENV_FILES:
+        try:
+            env_files.append(os.path.getmtime(path))
+        except OSError:
+            env_files.append(None)
+    return os.getcwd(), sorted(os.environ.items()), env_files
+
+
+def _forget_modules_on_new_context():
+    """Drop cached script modules when the run context changed
+
+    Sibling modules read env vars into module constants and clients when
+    imported, so after a change of directory, environment or .env they are
+    imported again rather than keeping the values of an earlier run.
+    """
+    global _context
+    context = _run_context()
+    if context == _context:
+        return
+    for name, _ in _script_modules():
+        if name != __name__:
+            del sys.modules[name]
+            _module_mtimes.pop(name, None)
+    _context = context
+
+
+def _reset_caches():
+    for name, (attribute, empty) in RUN_CACHES.items():
+        module = sys.modules.get(name)
+        if module is not None:
+            setattr(module, attribute, empty)
+
+
+def _run(job_id, script, args, events, env=None):
+    """Run one script as __main__ with its output sent to events, return its exit code
+
+    env, when given, replaces os.environ for the run.
+    """
+    path = script if os.path.isabs(script) else os.path.join(SCRIPTS_DIR, script)
+    writer = QueueWriter(events, job_id)
+    saved = sys.stdout, sys.stderr, sys.stdin, sys.argv[:], sys.path[:]
+    cwd, environ = os.getcwd(), dict(os.environ)
+    if env is not None:
+        os.environ.clear()
+        os.environ.update(env)
+    sys.stdout = sys.stderr = writer
+    sys.stdin = io.TextIOWrapper(io.BytesIO(), encoding='utf-8')
+    sys.argv = [path] + list(args)
+    sys.path.insert(0, os.path.dirname(path))
+    _forget_modules_on_new_context()
+    _forget_changed_modules()
+    try:
+        runpy.run_path(path, run_name='__main__')
+        code = 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            code = e.code or 0
+        else:
+            print(e.code)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        writer.close()
+        sys.stdout, sys.stderr, sys.stdin, sys.argv, sys.path = saved
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(environ)
+        _reset_caches()
+        _forget_changed_modules()
+    return code
+
+
+def _worker(jobs, events, preload):
+    global _context
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+    _context = _run_context()
+    events.put(('ready', None, os.getpid()))
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, script, args, env = job
+        events.put(('start', job_id, os.getpid()))
+        events.put(('done', job_id, _run(job_id, script, args, events, env)))
+
+
+class ScriptRunner:
+    """Pool of warm worker processes that run scripts in-process with runpy
+
+    Workers import the heavy dependencies once at startup, so a script
+    starts without paying interpreter and import time. Output is streamed
+    line by line to on_output and the exit code to on_done, both called
+    from a background thread. A worker that dies mid-script is replaced.
+    """
+
+    def __init__(self, workers=RUNNER_WORKERS, preload=PRELOAD):
+        self.context = multiprocessing.get_context('spawn')
+        self.preload = preload
+        self.jobs = self.context.Queue()
+        self.events = self.context.Queue()
+        self.callbacks = {}    # job id -> (on_output, on_done)
+        self.running = {}      # worker pid -> job id
+        self.ready = threading.Event()
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.closed = False
+        self.processes = [self._start_worker() for _ in range(workers)]
+        threading.Thread(target=self._pump, daemon=True).start()
+        atexit.register(self.shutdown)
+
+    def _start_worker(self):
+        process = self.context.Process(target=_worker, args=(self.jobs, self.events, self.preload))
+        process.start()
+        return process
+
+    def submit(self, script, args=(), on_output=None, on_done=None, env=None):
+        """Queue script (a file name in scripts/ or a path) with args and return its job id
+
+        env replaces the worker's environment for this run, e.g. a client's.
+        """
+        job_id = next(self.ids)
+        with self.lock:
+            self.callbacks[job_id] = (on_output, on_done)
+        self.jobs.put((job_id, script, list(args), env))
+        return job_id
+
+    def run(self, script, args=(), on_output=None, timeout=None):
+        """Run a script and wait for its exit code"""
+        done = queue.Queue()
+        self.submit(script, args, on_output, done.put)
+        return done.get(timeout=timeout)
+
+    def _finish(self, job_id, code):
+        with self.lock:
+            on_output, on_done = self.callbacks.pop(job_id, (None, None))
+        if on_done:
+            on_done(code)
+
+    def _pump(self):
+        while not self.closed:
+            try:
+                kind, job_id, value = self.events.get(timeout=1.0)
+            except queue.Empty:
+                self._replace_dead_workers()
+                continue
+            except (EOFError, OSError):
+                break
+            if kind == 'ready':
+                self.ready.set()
+            elif kind == 'start':
+                self.running[value] = job_id
+            elif kind == 'output':
+                with self.lock:
+                    on_output = self.callbacks.get(job_id, (None, None))[0]
+                if on_output:
+                    on_output(value)
+            elif kind == 'done':
+                self.running = {pid: job for pid, job in self.running.items() if job != job_id}
+                self._finish(job_id, value)
+
+    def _replace_dead_workers(self):
+        for index, process in enumerate(self.processes):
+            if process.is_alive() or self.closed:
+                continue
+            job_id = self.running.pop(process.pid, None)
+            if job_id is not None:
+                with self.lock:
+                    on_output = self.callbacks.get(job_id, (None, None))[0]
+                if on_output:
+                    on_output(f"\nWorker exited with code {process.exitcode}\n")
+                self._finish(job_id, process.exitcode if process.exitcode is not None else -1)
+            self.processes[index] = self._start_worker()
+
+    def shutdown(self):
+        """Stop all workers, interrupting running scripts"""
+        if self.closed:
+            return
+        self.closed = True
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout=2)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python script_runner.py <script.py> [args...]")
+        return
+    # Compare a cold subprocess start with a warm worker for the same script
+    import subprocess
+    start = time.time()
+    subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, sys.argv[1])] + sys.argv[2:],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    cold = time.time() - start
+
+    runner = ScriptRunner(workers=1)
+    runner.ready.wait()
+    start = time.time()
+    first_output = []
+    code = runner.run(sys.argv[1], sys.argv[2:],
+                      lambda text: first_output or first_output.append(time.time() - start))
+    warm = time.time() - start
+    runner.shutdown()
+    print(f"Subprocess: {cold:.2f}s, warm worker: {warm:.2f}s "
+          f"(first output after {first_output[0] if first_output else warm:.2f}s, exit code {code})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+import os
+import json
+import glob
+import time
+import sqlite3
+import argparse
+from file_index import FileIndex
+
+SEARCH_DB = os.getenv('SEARCH_DB', 'cache/search.db')
+# Same fields as the GUI's collaboration index, so both share one cache file
+COLLAB_FIELDS = ('collaborationId', 'clientSwarmId', 'providerSwarmId')
+
+# Directory -> (kind, id field, timestamp fields in order of preference)
+SOURCES = {
+    'data/messages': ('messages', 'messageId', ('timestamp',)),
+    'data/specifications': ('specifications', 'specificationId', ('createdAt',)),
+    'data/deliverables': ('deliverables', 'deliverableId', ('createdAt',)),
+    'data/thoughts': ('thoughts', 'thoughtId', ('createdAt',)),
+    'data/news': ('news', 'newsId', ('date', 'createdAt', 'timestamp'))
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    doc_id TEXT,
+    collaboration_id TEXT,
+    swarms TEXT,
+    ts TEXT,
+    title TEXT,
+    mtime REAL
+);
+CREATE INDEX IF NOT EXISTS docs_kind_ts ON docs(kind, ts);
+CREATE INDEX IF NOT EXISTS docs_collab ON docs(collaboration_id);
+CREATE TABLE IF NOT EXISTS failed (
+    path TEXT PRIMARY KEY,
+    mtime REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(title, content, tokenize='unicode61 remove_diacritics 2');
+"""
+
+
+def index_exists():
+    return os.path.exists(SEARCH_DB)
+
+
+def connect(db_path=SEARCH_DB):
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def load_collaboration_parties():
+    """Map collaborationId -> [clientSwarmId, providerSwarmId]
+
+    Read from the mtime-keyed collaboration FileIndex, so only collaboration
+    files that changed since the last call are parsed.
+    """
+    parties = {}
+    for entry in FileIndex('data/collaborations', COLLAB_FIELDS).refresh().entries.values():
+        fields = entry['fields']
+        if fields.get('collaborationId'):
+            parties[fields['collaborationId']] = [fields.get('clientSwarmId'), fields.get('providerSwarmId')]
+    return parties
+
+
+def source_for(path):
+    directory = os.path.dirname(path.replace('\\', '/'))
+    for source_dir, source in SOURCES.items():
+        if directory.endswith(source_dir):
+            return source
+    return None
+
+
+def document_fields(path, data, parties):
+    """Extract the indexed columns for one JSON document"""
+    kind, id_field, ts_fields = source_for(path)
+    collab_id = data.get('collaborationId')
+    swarms = {data.get('swarmId'), data.get('senderId'), data.get('receiverId')}
+    swarms.update(parties.get(collab_id, []))
+    swarms.discard(None)
+    timestamp = next((data[f] for f in ts_fields if data.get(f)), '')
+    return {
+        'kind': kind,
+        'doc_id': data.get(id_field),
+        'collaboration_id': collab_id,
+        # Padded so a LIKE '% id %' filter matches whole IDs only
+        'swarms': ' ' + ' '.join(sorted(swarms)) + ' ',
+        'ts': str(timestamp),
+        'title': data.get('title') or '',
+        'content': data.get('content') or ''
+    }
+
+
+def index_file(conn, path, parties=None, mtime=None):
+    """Add or replace one document, returning True if it was (re)indexed
+
+    A file that cannot be read is recorded in failed with its mtime, so
+    builds skip it until it changes.
+    """
+    path = path.replace('\\', '/')
+    if not path.endswith('.json') or not source_for(path):
+        return False
+    try:
+        mtime = mtime if mtime is not None else os.path.getmtime(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"Skipping {path}: {e}")
+        remove_file(conn, path)
+        if mtime is not None:
+            conn.execute("INSERT OR REPLACE INTO failed (path, mtime) VALUES (?, ?)", (path, mtime))
+        return False
+
+    fields = document_fields(path, data, parties if parties is not None else load_collaboration_parties())
+    remove_file(conn, path)
+    cursor = conn.execute(
+        "INSERT INTO docs (path, kind, doc_id, collaboration_id, swarms, ts, title, mtime) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (path, fields['kind'], fields['doc_id'], fields['collaboration_id'], fields['swarms'],
+         fields['ts'], fields['title'], mtime))
+    conn.execute("INSERT INTO docs_fts (rowid, title, content) VALUES (?, ?, ?)",
+                 (cursor.lastrowid, fields['title'], fields['content']))
+    return True
+
+
+def remove_file(conn, path):
+    path = path.replace('\\', '/')
+    conn.execute("DELETE FROM failed WHERE path = ?", (path,))
+    row = conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+    if not row:
+        return False
+    conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (row[0],))
+    conn.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+    return True
+
+
+def build_index(full=False, db_path=SEARCH_DB):
+    """Index new and changed documents and drop deleted ones"""
+    conn = connect(db_path)
+    known = {path: mtime for path, mtime in conn.execute("SELECT path, mtime FROM docs")}
+    known.update(conn.execute("SELECT path, mtime FROM failed"))
+    parties = load_collaboration_parties()
+    seen = set()
+    indexed = 0
+    with conn:
+        for directory in SOURCES:
+            for path in glob.glob(f"{directory}/*.json"):
+                path = path.replace('\\', '/')
+                seen.add(path)
+                mtime = os.path.getmtime(path)
+                if not full and known.get(path) == mtime:
+                    continue
+                if index_file(conn, path, parties, mtime):
+                    indexed += 1
+        removed = 0
+        for path in set(known) - seen:
+            remove_file(conn, path)
+            removed += 1
+    conn.close()
+    return indexed, removed
+
+
+def note_file_event(file_path, deleted=False):
+    """Apply a watcher event to the search index if one has been built"""
+    if not index_exists() or not source_for(file_path):
+        return
+    try:
+        conn = connect()
+        with conn:
+            if deleted:
+                remove_file(conn, file_path)
+            else:
+                index_file(conn, file_path)
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Error updating search index for {file_path}: {e}")
+
+
+def to_match_query(text):
+    """Quote every term so user input cannot break FTS5 query syntax"""
+    terms = [t.replace('"', '""') for t in text.split() if t.strip()]
+    return ' '.join(f'"{t}"' for t in terms)
+
+
+def search(query, kind=None, collaboration_id=None, swarm_id=None, since=None, until=None,
+           limit=10, exclude_collaboration_id=None, conn=None, raw=False):
+    """Ranked full-text search, best matches first"""
+    match = query if raw else to_match_query(query)
+    if not match:
+        return []
+
+    sql = ["""SELECT d.path, d.kind, d.doc_id, d.collaboration_id, d.ts, d.title,
+                     snippet(docs_fts, 1, '[', ']', '...', 16), bm25(docs_fts, 2.0, 1.0) AS rank
+              FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid
+              WHERE docs_fts MATCH ?"""]
+    params = [match]
+    if kind:
+        sql.append("AND d.kind = ?")
+        params.append(kind)
+    if collaboration_id:
+        sql.append("AND d.collaboration_id = ?")
+        params.append(collaboration_id)
+    if exclude_collaboration_id:
+        sql.append("AND (d.collaboration_id IS NULL OR d.collaboration_id != ?)")
+        params.append(exclude_collaboration_id)
+    if swarm_id:
+        sql.append("AND d.swarms LIKE ?")
+        params.append(f"% {swarm_id} %")
+    if since:
+        sql.append("AND d.ts >= ?")
+        params.append(since)
+    if until:
+        sql.append("AND d.ts <= ?")
+        params.append(until)
+    sql.append("ORDER BY rank LIMIT ?")
+    params.append(limit)
+
+    own_conn = conn is None
+    conn = conn or connect()
+    try:
+        rows = conn.execute(' '.join(sql), params).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+    return [{
+        'path': row[0], 'kind': row[1], 'id': row[2], 'collaborationId': row[3],
+        'timestamp': row[4], 'title': row[5], 'snippet': row[6], 'score': -row[7]
+    } for row in rows]
+
+
+def related_context(query, exclude_collaboration_id=None, limit=5):
+    """Format the best matching snippets for a prompt, or '' without an index"""
+    if not index_exists():
+        return ''
+    try:
+        hits = search(query, exclude_collaboration_id=exclude_collaboration_id, limit=limit)
+    except sqlite3.Error as e:
+        print(f"Search index unavailable: {e}")
+        return ''
+    lines = []
+    for hit in hits:
+        label = hit['title'] or hit['id']
+        where = f"collaboration {hit['collaborationId']}" if hit['collaborationId'] else hit['kind']
+        lines.append(f"- [{where}] {label}: {hit['snippet']}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-text search over messages, specifications, deliverables, thoughts and news')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='Create or incrementally update the index')
+    build.add_argument('--full', action='store_true', help='Re-index every document')
+    query = sub.add_parser('query', help='Search the index')
+    query.add_argument('text')
+    query.add_argument('--kind', choices=sorted(kind for kind, _, _ in SOURCES.values()))
+    query.add_argument('--collab', help='Only documents of this collaborationId')
+    query.add_argument('--swarm', help='Only documents involving this swarmId')
+    query.add_argument('--since', help='Earliest timestamp/date (ISO format)')
+    query.add_argument('--until', help='Latest timestamp/date (ISO format)')
+    query.add_argument('--limit', type=int, default=10)
+    query.add_argument('--raw', action='store_true', help='Pass the query to FTS5 unquoted')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        indexed, removed = build_index(full=args.full)
+        print(f"Indexed {indexed} documents, removed {removed} in {time.perf_counter() - start:.2f}s")
+        return
+
+    if not index_exists():
+        print("No search index yet, run: python scripts/search_index.py build")
+        return
+    start = time.perf_counter()
+    hits = search(args.text, kind=args.kind, collaboration_id=args.collab, swarm_id=args.swarm,
+                  since=args.since, until=args.until, limit=args.limit, raw=args.raw)
+    elapsed = (time.perf_counter() - start) * 1000
+    for hit in hits:
+        collab = f" collab={hit['collaborationId']}" if hit['collaborationId'] else ''
+        print(f"{hit['score']:6.2f}  {hit['path']}{collab}  {hit['timestamp']}")
+        if hit['title']:
+            print(f"        {hit['title']}")
+        print(f"        {hit['snippet']}")
+    print(f"\n{len(hits)} results in {elapsed:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,29 @@
 import os
-import sys
 import glob
 import json
-import codecs
+import argparse
 from datetime import datetime
-import anthropic
-from telegram.ext import ApplicationBuilder
-from dotenv import load_dotenv
+from bootstrap import setup_console, load_env, lazy_import
+from llm_cache import create_message_text
+from file_index import FileIndex
+from summary_store import (message_index, daily_summaries, messages_since, load_files,
+                           recap_window, get_last_recap, set_last_recap)
 
-# Force UTF-8 encoding for stdin/stdout/stderr
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-if sys.stdin.encoding != 'utf-8':
-    sys.stdin = codecs.getreader('utf-8')(sys.stdin.buffer, 'strict')
+anthropic = lazy_import('anthropic')
+telegram_ext = lazy_import('telegram.ext')
 
-# Set default encoding to UTF-8
-import locale
-locale.getpreferredencoding = lambda: 'UTF-8'
+# Force UTF-8 encoding for stdin/stdout/stderr
+setup_console()
 
 # Load environment variables
-load_dotenv()
+load_env()
+
+DEFAULT_RECAP_SWARMS = ['kinos', 'xforge']
+RECAP_LOOKBACK_DAYS = 7
+MAX_RAW_MESSAGES = 100
+MAX_NEWS_ITEMS = 20
+# Bot API server the bot token is appended to, e.g. scripts/telegram_standin.py for offline runs
+TELEGRAM_API_BASE_URL = os.getenv('TELEGRAM_API_BASE_URL', 'https://api.telegram.org/bot')
 
 def load_json_files(pattern, limit):
     """Load most recent JSON files based on pattern and limit"""
@@ -39,77 +42,88 @@ def load_json_files(pattern, limit):
     
     return results
 
-def build_system_prompt():
-    """Build system prompt from recent data"""
-    # Load swarm data
-    with open('data/swarms/kinos.json', 'r') as f:
-        kinos_data = json.load(f)
-    with open('data/swarms/xforge.json', 'r') as f:
-        xforge_data = json.load(f)
+def load_swarm(swarm_id):
+    """Load a swarm file, or None if it does not exist"""
+    try:
+        with open(f'data/swarms/{swarm_id}.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading swarm {swarm_id}: {e}")
+        return None
+
+def load_recent_news(since_day, limit=MAX_NEWS_ITEMS):
+    """Load the newest news items dated on or after since_day"""
+    index = FileIndex('data/news', ['date', 'swarmId']).refresh()
+    recent = [path for path in index.top_k('date', limit)
+              if (index.entries[os.path.basename(path)]['fields'].get('date') or '') >= since_day]
+    return load_files(recent)
+
+def build_system_prompt(client, swarm_ids, last_recap=None, lookback_days=RECAP_LOOKBACK_DAYS, no_cache=False):
+    """Build system prompt from persisted daily summaries plus items newer than the last recap"""
+    swarm_ids = set(swarm_ids)
+    index = message_index()
+    start_day, end_day = recap_window(last_recap, lookback_days)
+    today_start = datetime.utcnow().date().isoformat()
+    since = max(last_recap or '', today_start)
     
     # Load all services
     services = []
     service_files = glob.glob('data/services/*.json')
     for file in service_files:
-        with open(file, 'r') as f:
+        with open(file, 'r', encoding='utf-8') as f:
             services.append(json.load(f))
     
-    # Load messages between kinos and xforge
-    messages = []
-    message_files = glob.glob('data/messages/*.json')
-    for file in message_files:
-        with open(file, 'r') as f:
-            data = json.load(f)
-            if ((data.get('senderId') == 'kinos' and data.get('receiverId') == 'xforge') or
-                (data.get('senderId') == 'xforge' and data.get('receiverId') == 'kinos')):
-                messages.append(data)
-    
-    # Load all news
-    news = []
-    news_files = glob.glob('data/news/*.json')
-    for file in news_files:
-        with open(file, 'r') as f:
-            news.append(json.load(f))
+    # Closed days come from summaries, today's items are included verbatim
+    summaries = daily_summaries(client, swarm_ids, start_day, end_day, index=index, no_cache=no_cache)
+    messages = messages_since(swarm_ids, since, limit=MAX_RAW_MESSAGES, index=index)
+    news = load_recent_news(last_recap[:10] if last_recap else start_day)
     
     # Build prompt
     prompt = "You are a helpful AI assistant tasked with creating a recap of recent UBC ecosystem activities. Here's the relevant data:\n\n"
     
     # Add swarm information
-    prompt += "KinOS Swarm:\n"
-    prompt += f"Description: {kinos_data.get('shortDescription')}\n"
-    prompt += f"Weekly Revenue: {kinos_data.get('weeklyRevenue')} $COMPUTE\n\n"
-    
-    prompt += "XForge Swarm:\n"
-    prompt += f"Description: {xforge_data.get('shortDescription')}\n"
-    prompt += f"Weekly Revenue: {xforge_data.get('weeklyRevenue')} $COMPUTE\n\n"
+    for swarm_id in sorted(swarm_ids):
+        swarm_data = load_swarm(swarm_id)
+        if not swarm_data:
+            continue
+        prompt += f"{swarm_data.get('name', swarm_id)} Swarm:\n"
+        prompt += f"Description: {swarm_data.get('shortDescription')}\n"
+        prompt += f"Weekly Revenue: {swarm_data.get('weeklyRevenue')} $COMPUTE\n\n"
     
     # Add all services
     prompt += "Available Services:\n"
     for service in services:
         prompt += f"- {service.get('name')}: {service.get('description')}\n"
     
-    # Add messages between swarms
+    # Add daily summaries of communications between swarms
+    prompt += "\nCommunications Summary:\n"
+    for summary in sorted(summaries, key=lambda x: x['day'], reverse=True):
+        prompt += f"- {summary['day']} ({', '.join(summary['participants'])}):\n{summary['summary']}\n"
+    
+    # Add messages not covered by a summary yet
     prompt += "\nRecent Communications:\n"
     for msg in sorted(messages, key=lambda x: x.get('timestamp', ''), reverse=True):
         prompt += f"- From {msg.get('senderId')} to {msg.get('receiverId')}: {msg.get('content')}\n"
     
-    # Add all news
+    # Add news since the last recap
     prompt += "\nRecent News:\n"
-    for news_item in sorted(news, key=lambda x: x.get('timestamp', ''), reverse=True):
+    for news_item in sorted(news, key=lambda x: x.get('date', ''), reverse=True):
         prompt += f"- {news_item.get('title', 'Untitled')}: {news_item.get('content')}\n"
     
     return prompt
 
-def generate_recap():
+def generate_recap(swarm_ids=DEFAULT_RECAP_SWARMS, lookback_days=RECAP_LOOKBACK_DAYS, no_cache=False):
     """Generate recap using Anthropic's Claude"""
     client = anthropic.Client(
         api_key=os.getenv('ANTHROPIC_API_KEY')
     )
     
-    system_prompt = build_system_prompt()
+    last_recap = get_last_recap(set(swarm_ids))
+    system_prompt = build_system_prompt(client, swarm_ids, last_recap, lookback_days, no_cache)
     
     try:
-        response = client.messages.create(
+        recap = create_message_text(
+            client,
             model="claude-3-5-sonnet-20241022",  # don't change this value!!!!!
             max_tokens=2000,
             system=system_prompt,  # System prompt goes here as a parameter
@@ -121,11 +135,12 @@ def generate_recap():
                     Format it in a clear, engaging way suitable for a Telegram announcement.
                     Keep it under 2000 characters."""
                 }
-            ]
+            ],
+            no_cache=no_cache
         )
         
-        if hasattr(response, 'content') and len(response.content) > 0:
-            return response.content[0].text
+        if recap:
+            return recap
         else:
             raise Exception("No content in response")
             
@@ -141,7 +156,7 @@ async def send_telegram_message(recap_text):
     if not token or not chat_id:
         raise ValueError("Telegram credentials not properly configured")
     
-    app = ApplicationBuilder().token(token).build()
+    app = telegram_ext.ApplicationBuilder().token(token).base_url(TELEGRAM_API_BASE_URL).build()
     
     try:
         await app.bot.send_message(
@@ -149,21 +164,35 @@ async def send_telegram_message(recap_text):
             text=f"🔄 UBC Ecosystem Recap\n\n{recap_text}\n\n#UBCRecap"
         )
         print("Recap sent successfully to Telegram")
+        return True
     except Exception as e:
         print(f"Error sending to Telegram: {e}")
+        return False
     finally:
         await app.shutdown()
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--swarms', default=','.join(DEFAULT_RECAP_SWARMS),
+                        help='Comma-separated swarm IDs to recap (default: kinos,xforge)')
+    parser.add_argument('--lookback-days', type=int, default=RECAP_LOOKBACK_DAYS,
+                        help='Maximum number of past days covered by summaries')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore cached Claude responses')
+    args = parser.parse_args()
+    swarm_ids = [s.strip() for s in args.swarms.split(',') if s.strip()]
+    
     try:
         # Generate recap
         print("Generating recap...")
-        recap = generate_recap()
+        started_at = datetime.utcnow().isoformat() + 'Z'
+        recap = generate_recap(swarm_ids, args.lookback_days, no_cache=args.no_cache)
         
         # Send to Telegram
         print("Sending to Telegram...")
         import asyncio
-        asyncio.run(send_telegram_message(recap))
+        if asyncio.run(send_telegram_message(recap)):
+            # Items up to this point are covered; the next recap starts here
+            set_last_recap(set(swarm_ids), started_at)
         
         print("Recap process completed successfully!")
         
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import hashlib
+from datetime import datetime, timedelta
+from collections import defaultdict
+
+from file_index import FileIndex
+from llm_cache import create_message_text
+from conversations import conversation_key, involves
+
+# Generated from data/messages, so kept out of the watched and synced data/ tree
+SUMMARY_DIR = os.getenv('SUMMARY_DIR', 'cache/summaries')
+RECAP_STATE_FILE = f'{SUMMARY_DIR}/recaps.json'
+MESSAGE_FIELDS = ['timestamp', 'senderId', 'receiverId', 'collaborationId']
+
+SUMMARY_MODEL = "claude-3-5-sonnet-20241022"
+SUMMARY_MAX_TOKENS = 400
+
+
+def message_index():
+    """Index of message routing fields, refreshed incrementally"""
+    return FileIndex('data/messages', MESSAGE_FIELDS).refresh()
+
+
+def _safe_name(key):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+
+
+def summary_path(key, day):
+    return f"{SUMMARY_DIR}/{_safe_name(key)}/{day}.json"
+
+
+def load_summary(key, day):
+    try:
+        with open(summary_path(key, day), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_file = path + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(temp_file, path)
+
+
+def save_summary(summary):
+    _write_json(summary_path(summary['conversationKey'], summary['day']), summary)
+
+
+def source_digest(index, paths):
+    """Hash of the name, mtime and size of each message file behind a summary"""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        entry = index.entries.get(os.path.basename(path), {})
+        digest.update(f"{path}:{entry.get('mtime')}:{entry.get('size')}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_files(paths):
+    """Read the JSON files at paths, oldest timestamp first"""
+    messages = []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                messages.append(json.load(f))
+        except Exception as e:
+            print(f"Error reading {path}: {e}")
+    return sorted(messages, key=lambda x: x.get('timestamp', ''))
+
+
+def summarize_messages(client, key, day, messages, no_cache=False, digest=None):
+    """Ask Claude for a short summary of one conversation-day and persist it"""
+    transcript = "\n".join(f"{m.get('senderId')} -> {m.get('receiverId')}: {m.get('content')}" for m in messages)
+    text = create_message_text(
+        client,
+        model=SUMMARY_MODEL,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        system="You summarize conversations between UBC swarms for later recaps. Keep only decisions, deliverables, numbers and open questions.",
+        messages=[{
+            "role": "user",
+            "content": f"Summarize this conversation ({key}, {day}) in at most 5 bullet points:\n\n{transcript}"
+        }],
+        no_cache=no_cache
+    )
+    participants = sorted({p for m in messages for p in (m.get('senderId'), m.get('receiverId')) if p})
+    summary = {
+        'conversationKey': key,
+        'day': day,
+        'participants': participants,
+        'messageCount': len(messages),
+        'lastTimestamp': messages[-1].get('timestamp') if messages else None,
+        'sourceDigest': digest,
+        'summary': (text or '').strip(),
+        'createdAt': datetime.utcnow().isoformat() + 'Z'
+    }
+    save_summary(summary)
+    return summary
+
+
+def group_by_day(index, swarm_ids, start_day, end_day):
+    """Group indexed message paths by (conversation key, day) within [start_day, end_day]"""
+    groups = defaultdict(list)
+    for path, fields in index.items():
+        day = (fields.get('timestamp') or '')[:10]
+        if not day or day < start_day or day > end_day:
+            continue
+        if not involves(fields, swarm_ids):
+            continue
+        groups[(conversation_key(fields), day)].append(path)
+    return groups
+
+
+def daily_summaries(client, swarm_ids, start_day, end_day, index=None, no_cache=False):
+    """Return summaries for closed days in range, generating only missing or stale ones"""
+    index = index or message_index()
+    summaries = []
+    for (key, day), paths in sorted(group_by_day(index, swarm_ids, start_day, end_day).items(),
+                                    key=lambda item: (item[0][1], item[0][0])):
+        summary = load_summary(key, day)
+        # A late, edited or replaced message for a summarized day makes the summary stale
+        digest = source_digest(index, paths)
+        if summary is None or summary.get('sourceDigest') != digest:
+            print(f"Summarizing {key} on {day} ({len(paths)} messages)")
+            summary = summarize_messages(client, key, day, load_files(paths), no_cache, digest)
+        summaries.append(summary)
+    return summaries
+
+
+def messages_since(swarm_ids, since, limit=100, index=None):
+    """Load the newest messages for swarm_ids with a timestamp after since"""
+    index = index or message_index()
+    keyed = []
+    for path, fields in index.items():
+        timestamp = fields.get('timestamp') or ''
+        if timestamp > since and involves(fields, swarm_ids):
+            keyed.append((timestamp, path))
+    keyed.sort(reverse=True)
+    return load_files([path for _, path in keyed[:limit]])
+
+
+def recap_state_key(swarm_ids):
+    return ','.join(sorted(swarm_ids))
+
+
+def get_last_recap(swarm_ids):
+    """Timestamp of the last recap sent for this set of swarms, or None"""
+    try:
+        with open(RECAP_STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get(recap_state_key(swarm_ids))
+    except (OSError, ValueError):
+        return None
+
+
+def set_last_recap(swarm_ids, timestamp):
+    try:
+        with open(RECAP_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state[recap_state_key(swarm_ids)] = timestamp
+    _write_json(RECAP_STATE_FILE, state)
+
+
+def recap_window(last_recap, lookback_days, today=None):
+    """Return (first summarized day, last summarized day) for a recap
+
+    Closed days since the last recap are covered by summaries, capped at
+    lookback_days so the prompt stays bounded after a long gap.
+    """
+    today = today or datetime.utcnow().date()
+    earliest = today - timedelta(days=lookback_days)
+    start = earliest
+    if last_recap:
+        start = max(earliest, datetime.fromisoformat(last_recap[:10]).date())
+    return start.isoformat(), (today - timedelta(days=1)).isoformat()
@@ -0,0 +1,315 @@
+import os
+import json
+import uuid
+import random
+import string
+import itertools
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+# Files per directory at 1x, the size of the real data/ tree
+BASE_COUNTS = {
+    'swarms': 25,
+    'services': 4,
+    'collaborations': 22,
+    'messages': 258,
+    'specifications': 12,
+    'missions': 3,
+    'news': 29,
+    'thoughts': 11,
+    'deliverables': 9,
+    'validations': 1,
+}
+SCALES = {'1x': 1, '10x': 10, '1000x': 1000}
+# Default end of the generated timeline, fixed so runs are reproducible
+DEFAULT_END = datetime(2025, 2, 20, 12, 0, 0)
+TIMELINE_DAYS = 30
+
+SWARM_STEMS = [
+    'kinos', 'xforge', 'kinkong', 'deskmate', 'swarmventures', 'carehive', 'aialley', 'robinhoodagent',
+    'playwise', 'studiokin', 'logicatlas', 'talentkin', 'mentor', 'syntheticsouls', 'propertykin',
+    'duoai', 'kinmeme', 'ecosystem', 'ubc', 'screenplay', 'wealthhive', 'bookkin', 'travelaid', 'commerce',
+    'educaia'
+]
+WORDS = (
+    "agent swarm compute token liquidity integration roadmap milestone deployment review feedback "
+    "specification deliverable pipeline latency model training dataset dashboard marketplace launch "
+    "partnership revenue treasury wallet solana contract audit prototype release sprint blocker update "
+    "design api endpoint webhook schema migration analytics retention onboarding community holders"
+).split()
+# Sprinkled into text so the data is not pure ASCII, as in the real tree
+ACCENTS = ['café', 'naïve', 'déjà vu', '→', '✅', '🚀', '📈', '—']
+BASE58 = ''.join(c for c in string.digits + string.ascii_letters if c not in '0OIl')
+
+
+class SyntheticData:
+    """Deterministic generator for a data/ tree shaped like the real one"""
+
+    def __init__(self, scale=1, seed=42, end=DEFAULT_END):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.end = end
+        self.start = end - timedelta(days=TIMELINE_DAYS)
+        self.counts = {name: count * scale for name, count in BASE_COUNTS.items()}
+
+    def sentence(self, words=12):
+        text = ' '.join(self.rng.choice(WORDS) for _ in range(self.rng.randint(words // 2, words)))
+        if self.rng.random() < 0.2:
+            text += ' ' + self.rng.choice(ACCENTS)
+        return text[0].upper() + text[1:] + '.'
+
+    def paragraph(self, sentences=4):
+        return ' '.join(self.sentence() for _ in range(self.rng.randint(2, sentences)))
+
+    def markdown(self, sections=6):
+        parts = [f"# {self.sentence(5).rstrip('.')}"]
+        for _ in range(self.rng.randint(3, sections)):
+            parts.append(f"## {self.sentence(4).rstrip('.')}")
+            parts.append(self.paragraph(6))
+            parts.append('\n'.join(f"- {self.sentence(8)}" for _ in range(self.rng.randint(2, 6))))
+        return '\n\n'.join(parts)
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def wallet(self):
+        return ''.join(self.rng.choice(BASE58) for _ in range(44))
+
+    def timestamp(self, fraction=None):
+        fraction = self.rng.random() if fraction is None else fraction
+        moment = self.start + (self.end - self.start) * fraction
+        return moment.strftime('%Y-%m-%dT%H:%M:%S.') + f"{moment.microsecond // 1000:03d}Z"
+
+    def swarms(self):
+        ids = []
+        for i in range(self.counts['swarms']):
+            stem = SWARM_STEMS[i % len(SWARM_STEMS)]
+            ids.append(stem if i < len(SWARM_STEMS) else f"{stem}{i // len(SWARM_STEMS)}")
+        for swarm_id in ids:
+            swarm = {
+                'swarmId': swarm_id,
+                'name': swarm_id.title(),
+                'image': f"/swarms/{swarm_id}.avif",
+                'pool': self.wallet(),
+                'weeklyRevenue': 0,
+                'totalRevenue': 0,
+                'tags': ', '.join(self.rng.sample(WORDS, 4)),
+                'swarmType': self.rng.choice(['early', 'inception', 'partner']),
+                'multiple': round(self.rng.uniform(1, 500), 6),
+                'revenueShare': self.rng.choice([5, 10, 12.5, 15, 20]),
+                'wallet': self.wallet(),
+                'shortDescription': self.sentence(16),
+                'description': self.paragraph(),
+            }
+            if self.rng.random() < 0.5:
+                swarm['telegramChatId'] = -1000000000000 - self.rng.randrange(10 ** 9)
+            yield swarm_id, swarm
+
+    def services(self, swarm_ids):
+        for i in range(self.counts['services']):
+            swarm_id = swarm_ids[i * 7 % len(swarm_ids)]
+            service_id = f"{swarm_id}-service-{i}"
+            yield service_id, {
+                'serviceId': service_id,
+                'swarmId': swarm_id,
+                'name': self.sentence(4).rstrip('.'),
+                'description': self.sentence(20),
+                'fullDescription': self.markdown(3),
+                'basePrice': self.rng.choice([50000, 120000, 250000, 1000000]),
+                'categories': json.dumps(self.rng.sample(['Trading', 'DeFi', 'Development', 'AI', 'Content'], 2)),
+            }
+
+    def collaborations(self, swarm_ids, services):
+        for i in range(self.counts['collaborations']):
+            service_id, service = services[i % len(services)]
+            provider = service['swarmId']
+            client = self.rng.choice([s for s in swarm_ids[:64] if s != provider] or swarm_ids)
+            if i == 0 and len(swarm_ids) > 1:
+                client = swarm_ids[1]  # kinos and xforge, the default recap pair, talk the most
+            collab_id = str(i + 1)
+            collab = {
+                'providerSwarmId': provider,
+                'clientSwarmId': client,
+                'serviceId': service_id,
+                'status': self.rng.choices(['active', 'paused', 'completed'], [7, 2, 1])[0],
+                'price': self.rng.choice([50000, 120000, 250000, 1000000, round(self.rng.uniform(1000, 500000), 3)]),
+                'startDate': self.timestamp(self.rng.random() * 0.3)[:10],
+                'collaborationId': collab_id,
+            }
+            if self.rng.random() < 0.5:
+                collab['telegramChatId'] = -1000000000000 - self.rng.randrange(10 ** 9)
+            yield collab_id, collab
+
+    def messages(self, swarm_ids, collabs):
+        # A few busy collaborations carry most of the traffic, as in the real data
+        cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(collabs))))
+        count = self.counts['messages']
+        for i in range(count):
+            fraction = (i + self.rng.random()) / count
+            message_id = self.uuid()
+            if self.rng.random() < 0.1:
+                # Telegram chatter addressed to a swarm, outside any collaboration
+                message = {
+                    'senderId': f"user{self.rng.randrange(1000)}",
+                    'receiverId': self.rng.choice(swarm_ids),
+                    'content': self.sentence(10),
+                }
+            else:
+                collab_id, collab = self.rng.choices(collabs, cum_weights=cum_weights)[0]
+                sender, receiver = collab['providerSwarmId'], collab['clientSwarmId']
+                if self.rng.random() < 0.5:
+                    sender, receiver = receiver, sender
+                message = {
+                    'collaborationId': collab_id,
+                    'senderId': sender,
+                    'receiverId': receiver,
+                    'content': self.paragraph(),
+                }
+            message.update({'timestamp': self.timestamp(fraction), 'messageId': message_id})
+            yield message_id, message
+
+    def specifications(self, collabs):
+        for i in range(self.counts['specifications']):
+            collab_id, _ = collabs[i % len(collabs)]
+            spec_id = str(i + 1)
+            yield spec_id, {
+                'collaborationId': collab_id,
+                'title': self.sentence(5).rstrip('.'),
+                'specificationId': spec_id,
+                'createdAt': self.timestamp()[:10],
+                'content': self.markdown(),
+            }
+
+    def missions(self, swarm_ids):
+        for i in range(self.counts['missions']):
+            created = self.timestamp()
+            mission_id = f"mission-{created[:10].replace('-', '')}-{i + 1:03d}"
+            assigned = self.rng.sample(swarm_ids, min(len(swarm_ids), self.rng.randint(2, 4)))
+            yield mission_id, {
+                'missionId': mission_id,
+                'title': self.sentence(6).rstrip('.'),
+                'description': self.paragraph(),
+                'objective': self.sentence(14),
+                'priority': self.rng.choice(['low', 'medium', 'high']),
+                'status': self.rng.choice(['planned', 'in_progress', 'completed']),
+                'createdAt': created,
+                'updatedAt': created,
+                'dueDate': self.timestamp(),
+                'assignedSwarms': assigned,
+                'leadSwarm': assigned[0],
+                'dependencies': [],
+                'features': [{'featureId': f"{mission_id}-f{n}", 'title': self.sentence(4).rstrip('.'),
+                              'description': self.sentence(12), 'status': 'pending'}
+                             for n in range(self.rng.randint(1, 4))],
+            }
+
+    def news(self, swarm_ids):
+        count = self.counts['news']
+        for i in range(count):
+            news_id = str(i + 1)
+            yield news_id, {
+                'title': self.sentence(8).rstrip('.'),
+                'content': self.paragraph(),
+                'newsId': news_id,
+                'date': self.timestamp((i + 0.5) / count)[:10],
+                'swarmId': self.rng.choice(swarm_ids),
+            }
+
+    def thoughts(self, swarm_ids):
+        for i in range(self.counts['thoughts']):
+            created = self.timestamp()
+            thought_id = f"th-{created[:10].replace('-', '')}-{i + 1:03d}"
+            yield thought_id, {
+                'thoughtId': thought_id,
+                'swarmId': self.rng.choice(swarm_ids),
+                'content': self.paragraph(6),
+                'createdAt': created,
+            }
+
+    def deliverables(self, collabs):
+        for i in range(self.counts['deliverables']):
+            collab_id, _ = collabs[i % len(collabs)]
+            deliverable_id = f"del-{i + 1}"
+            yield deliverable_id, {
+                'deliverableId': deliverable_id,
+                'collaborationId': collab_id,
+                'title': self.sentence(5).rstrip('.'),
+                'content': self.markdown(3),
+                'createdAt': self.timestamp(),
+            }
+
+    def validations(self, deliverable_ids):
+        for i in range(self.counts['validations']):
+            validation_id = f"val-{i + 1}"
+            yield validation_id, {
+                'validationId': validation_id,
+                'deliverableId': deliverable_ids[i % len(deliverable_ids)],
+                'status': self.rng.choice(['approved', 'changes_requested']),
+                'comments': self.paragraph(),
+                'createdAt': self.timestamp(),
+            }
+
+
+def write_files(directory, items, keep=True):
+    """Write (id, data) items as <id>.json, returning them when later steps refer to them"""
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for file_id, data in items:
+        with open(os.path.join(directory, f"{file_id}.json"), 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        if keep:
+            written.append((file_id, data))
+    return written
+
+
+def generate(root, scale=1, seed=42, end=DEFAULT_END):
+    """Write a synthetic data/ tree under root and return the file count per directory
+
+    The same scale, seed and end always produce the same files. 1x
+    matches the size of the real tree; other scales multiply every count.
+    """
+    gen = SyntheticData(scale, seed, end)
+    data_dir = os.path.join(root, 'data')
+
+    swarms = write_files(os.path.join(data_dir, 'swarms'), gen.swarms())
+    swarm_ids = [swarm_id for swarm_id, _ in swarms]
+    services = write_files(os.path.join(data_dir, 'services'), gen.services(swarm_ids))
+    collabs = write_files(os.path.join(data_dir, 'collaborations'), gen.collaborations(swarm_ids, services))
+    write_files(os.path.join(data_dir, 'messages'), gen.messages(swarm_ids, collabs), keep=False)
+    write_files(os.path.join(data_dir, 'specifications'), gen.specifications(collabs), keep=False)
+    write_files(os.path.join(data_dir, 'missions'), gen.missions(swarm_ids), keep=False)
+    write_files(os.path.join(data_dir, 'news'), gen.news(swarm_ids), keep=False)
+    write_files(os.path.join(data_dir, 'thoughts'), gen.thoughts(swarm_ids), keep=False)
+    deliverables = write_files(os.path.join(data_dir, 'deliverables'), gen.deliverables(collabs))
+    write_files(os.path.join(data_dir, 'validations'), gen.validations([d for d, _ in deliverables]), keep=False)
+
+    manifest = {'scale': scale, 'seed': seed, 'end': end.isoformat(), 'counts': gen.counts}
+    with open(os.path.join(root, 'synth_manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return gen.counts
+
+
+def parse_scale(value):
+    """Scale multiplier from '10x', '10' or a SCALES name"""
+    return SCALES.get(value) or int(value.lower().rstrip('x'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a deterministic synthetic data/ tree')
+    parser.add_argument('--scale', default='1x', help='1x, 10x, 1000x or any Nx')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', help='Last day of the timeline (YYYY-MM-DD), defaults to 2025-02-20')
+    parser.add_argument('--output', help='Root directory to write data/ into, defaults to a new temp directory')
+    args = parser.parse_args()
+
+    root = args.output or tempfile.mkdtemp(prefix=f"kinos-{args.scale}-")
+    end = datetime.fromisoformat(args.end) if args.end else DEFAULT_END
+    counts = generate(root, parse_scale(args.scale), args.seed, end)
+    print(f"Synthetic data written to {os.path.join(root, 'data')}")
+    for name, count in counts.items():
+        print(f"  {name:<16}{count:>10,}")
+
+
+if __name__ == '__main__':
+    main()
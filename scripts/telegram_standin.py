@@ -0,0 +1,235 @@
+# Local stand-in for the Telegram Bot API methods the notification scripts use
+# (getMe, sendMessage). Point them at it with
+# TELEGRAM_API_BASE_URL=http://127.0.0.1:8767/bot to load-test the watcher's
+# notifications and the recap without posting to real chats. Every accepted
+# message is recorded in arrival order and can be read back from /_messages;
+# /_stats counts requests. Bursts are limited the way Telegram limits bots:
+# about one message per second per chat, 20 per minute in a group and 30 per
+# second per bot, with 429 responses carrying parameters.retry_after.
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import Counter, defaultdict, deque
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+MAX_MESSAGE_LENGTH = 4096
+# (messages, seconds) windows, per Telegram's bot FAQ
+CHAT_LIMIT = (1, 1.0)
+GROUP_LIMIT = (20, 60.0)
+BOT_LIMIT = (30, 1.0)
+
+
+class BotApiError(Exception):
+    def __init__(self, code, description, retry_after=None):
+        super().__init__(description)
+        self.code = code
+        self.description = description
+        self.retry_after = retry_after
+
+    def body(self):
+        body = {'ok': False, 'error_code': self.code, 'description': self.description}
+        if self.retry_after is not None:
+            body['parameters'] = {'retry_after': self.retry_after}
+        return body
+
+
+def bot_user(token):
+    """A stable bot identity for a token"""
+    bot_id = int(token.split(':')[0]) if re.match(r'\d+:', token) else int(hashlib.sha1(token.encode()).hexdigest()[:8], 16)
+    return {'id': bot_id, 'is_bot': True, 'first_name': f"Standin {bot_id}", 'username': f"standin_{bot_id}_bot",
+            'can_join_groups': True, 'can_read_all_group_messages': False, 'supports_inline_queries': False}
+
+
+def chat_object(chat_id):
+    if chat_id > 0:
+        return {'id': chat_id, 'type': 'private', 'first_name': f"User {chat_id}"}
+    kind = 'supergroup' if str(chat_id).startswith('-100') else 'group'
+    return {'id': chat_id, 'type': kind, 'title': f"Chat {chat_id}"}
+
+
+class TelegramState:
+    def __init__(self, latency=0.0, jitter=0.0, limits=True):
+        self.latency = latency
+        self.jitter = jitter
+        self.limits = limits
+        self.lock = threading.Lock()
+        self.windows = defaultdict(deque)  # (scope, key) -> times of accepted messages
+        self.messages = []
+        self.next_message_id = Counter()
+        self.stats = Counter()
+        self.started = time.time()
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def _admit(self, windows, now):
+        """Seconds until every window has room, 0 when the message can go now"""
+        wait = 0.0
+        for key, (limit, period) in windows:
+            recent = self.windows[key]
+            while recent and recent[0] <= now - period:
+                recent.popleft()
+            if len(recent) >= limit:
+                wait = max(wait, recent[len(recent) - limit] + period - now)
+        return wait
+
+    def send_message(self, token, params):
+        try:
+            chat_id = int(params.get('chat_id', ''))
+        except ValueError:
+            raise BotApiError(400, 'Bad Request: chat not found')
+        text = params.get('text') or ''
+        if not text.strip():
+            raise BotApiError(400, 'Bad Request: message text is empty')
+        if len(text) > MAX_MESSAGE_LENGTH:
+            raise BotApiError(400, 'Bad Request: message is too long')
+
+        windows = [(('chat', token, chat_id), CHAT_LIMIT), (('bot', token), BOT_LIMIT)]
+        if chat_id < 0:
+            windows.append((('group', token, chat_id), GROUP_LIMIT))
+        with self.lock:
+            now = time.monotonic()
+            wait = self._admit(windows, now) if self.limits else 0
+            if wait:
+                self.stats['throttled'] += 1
+                raise BotApiError(429, f"Too Many Requests: retry after {math.ceil(wait)}", math.ceil(wait))
+            for key, _ in windows:
+                self.windows[key].append(now)
+            self.next_message_id[chat_id] += 1
+            message = {
+                'message_id': self.next_message_id[chat_id],
+                'from': bot_user(token),
+                'chat': chat_object(chat_id),
+                'date': int(time.time()),
+                'text': text,
+            }
+            self.messages.append({'bot': message['from']['username'], 'chatId': chat_id,
+                                  'messageId': message['message_id'], 'text': text,
+                                  'receivedAt': round(time.time() - self.started, 3)})
+            self.stats['sent'] += 1
+            return message
+
+    def call(self, token, method, params):
+        if method == 'getMe':
+            return bot_user(token)
+        if method == 'sendMessage':
+            return self.send_message(token, params)
+        if method in ('deleteWebhook', 'close', 'logOut'):
+            return True
+        raise BotApiError(404, 'Not Found')
+
+    def snapshot(self):
+        with self.lock:
+            return {'uptime': round(time.time() - self.started, 1), 'messages': len(self.messages),
+                    'requests': dict(self.stats)}
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, as the bot's httpx client pools connections
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _params(self, query):
+            """Parameters from the query string and a JSON or form encoded body"""
+            params = {k: v[-1] for k, v in parse_qs(query).items()}
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length) if length else b''
+            if body:
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    params.update({k: v if isinstance(v, str) else json.dumps(v) for k, v in json.loads(body).items()})
+                else:
+                    params.update({k: v[-1] for k, v in parse_qs(body.decode('utf-8'), keep_blank_values=True).items()})
+            return params
+
+        def _handle(self):
+            url = urlsplit(self.path)
+            try:
+                params = self._params(url.query)
+            except ValueError:
+                self._send_json(400, BotApiError(400, "Bad Request: can't parse request body").body())
+                return
+            if url.path == '/_stats':
+                self._send_json(200, state.snapshot())
+                return
+            if url.path == '/_messages':
+                with state.lock:
+                    messages = [m for m in state.messages
+                                if 'chat_id' not in params or str(m['chatId']) == params['chat_id']]
+                self._send_json(200, messages)
+                return
+
+            match = re.fullmatch(r'/bot([^/]+)/(\w+)', url.path)
+            if not match:
+                self._send_json(404, BotApiError(404, 'Not Found').body())
+                return
+            state.count('requests')
+            state.count(match.group(2))
+            state.delay()
+            try:
+                self._send_json(200, {'ok': True, 'result': state.call(match.group(1), match.group(2), params)})
+            except BotApiError as e:
+                state.count(f"error{e.code}")
+                self._send_json(e.code, e.body())
+
+        def do_GET(self):
+            self._handle()
+
+        def do_POST(self):
+            self._handle()
+
+    return Handler
+
+
+def start_server(host='127.0.0.1', port=8767, **state_options):
+    """Start the stand-in in a background thread and return the server"""
+    state = TelegramState(**state_options)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Telegram Bot API stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many more seconds, at random')
+    parser.add_argument('--no-limits', action='store_true', help='Accept every message without rate limiting')
+    args = parser.parse_args()
+
+    state = TelegramState(args.latency, args.jitter, not args.no_limits)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    print(f"Telegram stand-in listening on http://{args.host}:{args.port}/bot<token>/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped stand-in\n{json.dumps(state.snapshot(), indent=2)}")
+
+
+if __name__ == '__main__':
+    main()
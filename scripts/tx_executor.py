@@ -0,0 +1,166 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from solders.signature import Signature
+from bootstrap import lazy_import
+from tx_packer import sign_transaction
+
+solana_core = lazy_import('solana.rpc.core')
+
+# getSignatureStatuses accepts at most 256 signatures per call
+SIGNATURE_STATUS_LIMIT = 256
+COMMITMENT_RANK = {'processed': 0, 'confirmed': 1, 'finalized': 2}
+
+
+class TxExecutor:
+    """Sign, send and confirm many packed transactions concurrently
+
+    All transactions share one blockhash that is refreshed every
+    blockhash_refresh seconds. In-flight signatures are confirmed together
+    with one getSignatureStatuses call per poll, so funding N swarms takes
+    roughly one confirmation latency instead of N. A plan with a 'payer'
+    keypair is signed by it instead of the executor's payer.
+
+    Transfers are not idempotent, so a transaction is only re-signed (up to
+    max_attempts times) when it provably cannot land: the RPC node rejected
+    it outright, or its blockhash expired while it had no status at all.
+    Anything else, including a send that timed out and a transaction seen
+    at processed, stays in flight under its original signature.
+    """
+
+    def __init__(self, client, payer, max_in_flight=32, send_workers=8, blockhash_refresh=20.0,
+                 poll_interval=0.5, rebroadcast_interval=2.0, max_attempts=3, commitment='confirmed'):
+        self.client = client
+        self.payer = payer
+        self.max_in_flight = max_in_flight
+        self.send_workers = send_workers
+        self.blockhash_refresh = blockhash_refresh
+        self.poll_interval = poll_interval
+        self.rebroadcast_interval = rebroadcast_interval
+        self.max_attempts = max_attempts
+        self.commitment_rank = COMMITMENT_RANK[commitment]
+        self._blockhash = None  # (blockhash, last valid block height, fetched at)
+
+    def blockhash(self, force=False):
+        """Shared recent blockhash, refreshed when stale"""
+        if force or not self._blockhash or time.time() - self._blockhash[2] > self.blockhash_refresh:
+            value = self.client.get_latest_blockhash().value
+            self._blockhash = (value.blockhash, value.last_valid_block_height, time.time())
+        return self._blockhash
+
+    def _sign(self, job):
+        blockhash, last_valid, _ = self.blockhash()
+        tx = sign_transaction(job['plan']['instructions'], job['plan'].get('payer') or self.payer, blockhash)
+        job['raw'] = bytes(tx)
+        job['signature'] = str(tx.signatures[0])
+        job['lastValidBlockHeight'] = last_valid
+        job['attempts'] += 1
+
+    def _send(self, job):
+        """Send a job's signed transaction
+
+        Returns None once sent, otherwise (error, rejected). rejected means
+        the node answered with a JSON-RPC error (preflight failure, unknown
+        blockhash), so the transaction was not forwarded. Timeouts and
+        dropped connections are not rejections: the transaction may still
+        have reached the leader.
+        """
+        job['sentAt'] = time.time()
+        try:
+            self.client.send_raw_transaction(job['raw'])
+            return None
+        except Exception as e:
+            # Transport errors arrive wrapped in a SolanaRpcException with an empty message
+            return str(e) or repr(e.__cause__ or e), isinstance(e, solana_core.RPCException)
+
+    def _statuses(self, signatures):
+        statuses = {}
+        for start in range(0, len(signatures), SIGNATURE_STATUS_LIMIT):
+            chunk = signatures[start:start + SIGNATURE_STATUS_LIMIT]
+            response = self.client.get_signature_statuses([Signature.from_string(s) for s in chunk])
+            statuses.update(zip(chunk, response.value))
+        return statuses
+
+    def execute(self, plans, on_result=None):
+        """Run packed transaction plans to completion
+
+        Returns one result per plan, in order, with 'labels', 'signature',
+        'status' ('confirmed' or 'failed'), 'error' and 'attempts'.
+        on_result is called with each result as soon as it is final.
+        """
+        jobs = [{'index': i, 'plan': plan, 'attempts': 0, 'error': None} for i, plan in enumerate(plans)]
+        queue = list(jobs)
+        in_flight = {}
+        results = [None] * len(jobs)
+
+        def finish(job, status, error=None):
+            result = {
+                'labels': job['plan']['labels'],
+                'signature': job.get('signature'),
+                'status': status,
+                'error': error,
+                'attempts': job['attempts']
+            }
+            results[job['index']] = result
+            if on_result:
+                on_result(result)
+
+        def retry_or_fail(job):
+            if job['attempts'] >= self.max_attempts:
+                finish(job, 'failed', job['error'] or 'blockhash expired')
+            else:
+                queue.append(job)
+
+        with ThreadPoolExecutor(max_workers=self.send_workers) as pool:
+            while queue or in_flight:
+                # Sign and send as many new or retried transactions as the window allows
+                batch = []
+                while queue and len(in_flight) + len(batch) < self.max_in_flight:
+                    job = queue.pop(0)
+                    self._sign(job)
+                    batch.append(job)
+                for job, error in zip(batch, pool.map(self._send, batch)):
+                    if error and error[1]:
+                        job['error'] = error[0]
+                        # A stale blockhash is the usual cause, so the retry gets a fresh one
+                        if 'Blockhash not found' in error[0]:
+                            self.blockhash(force=True)
+                        retry_or_fail(job)
+                    else:
+                        # Possibly delivered: track the signature until it lands or its blockhash expires
+                        if error:
+                            job['error'] = error[0]
+                        in_flight[job['signature']] = job
+
+                if not in_flight:
+                    continue
+                time.sleep(self.poll_interval)
+
+                # Height before statuses: a transaction landing between the two calls
+                # then shows up in the statuses instead of looking expired
+                block_height = self.client.get_block_height().value
+                statuses = self._statuses(list(in_flight))
+                rebroadcast = []
+                for signature, job in list(in_flight.items()):
+                    status = statuses.get(signature)
+                    if status is not None and status.err is not None:
+                        del in_flight[signature]
+                        finish(job, 'failed', str(status.err))
+                    elif (status is not None and status.confirmation_status is not None and
+                          int(status.confirmation_status) >= self.commitment_rank):
+                        del in_flight[signature]
+                        finish(job, 'confirmed')
+                    elif status is not None:
+                        # Processed but not yet at the target commitment: it can still
+                        # confirm after its blockhash expires, so keep polling
+                        continue
+                    elif block_height > job['lastValidBlockHeight']:
+                        # Unseen and expired, so it can no longer land: re-sign with a fresh blockhash
+                        del in_flight[signature]
+                        job['error'] = 'blockhash expired'
+                        retry_or_fail(job)
+                    elif time.time() - job['sentAt'] >= self.rebroadcast_interval:
+                        rebroadcast.append(job)
+                # Resending the same signed bytes is safe, the network dedupes by signature
+                list(pool.map(self._send, rebroadcast))
+
+        return results
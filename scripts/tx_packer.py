@@ -0,0 +1,171 @@
+from solders.hash import Hash
+from solders.pubkey import Pubkey
+from solders.message import Message
+from solders.transaction import Transaction
+from solders.instruction import Instruction, AccountMeta
+from solders.compute_budget import set_compute_unit_limit
+from spl.token.instructions import TransferCheckedParams, transfer_checked, get_associated_token_address
+from spl.token.constants import TOKEN_PROGRAM_ID, ASSOCIATED_TOKEN_PROGRAM_ID
+
+# Solana limits: serialized legacy transaction size and compute units per transaction
+MAX_TX_SIZE = 1232
+MAX_COMPUTE_UNITS = 1_400_000
+
+# Conservative per-instruction compute estimates, used to set the budget
+CREATE_ATA_UNITS = 35_000
+TRANSFER_UNITS = 10_000
+SYSTEM_PROGRAM_ID = Pubkey.from_string('11111111111111111111111111111111')
+
+# getMultipleAccounts accepts at most 100 keys per call
+MULTIPLE_ACCOUNTS_LIMIT = 100
+
+# SOL costs in lamports: base fee per signature, rent-exempt deposit of a 165-byte token account
+SIGNATURE_FEE = 5000
+TOKEN_ACCOUNT_RENT = 2_039_280
+
+
+def create_ata_idempotent_ix(payer, owner, mint, token_program_id=TOKEN_PROGRAM_ID):
+    """CreateIdempotent instruction of the associated token account program
+
+    Succeeds without changes when the account already exists, so a packed
+    transaction never fails because another run created one of its accounts.
+    """
+    return Instruction(
+        program_id=ASSOCIATED_TOKEN_PROGRAM_ID,
+        accounts=[
+            AccountMeta(pubkey=payer, is_signer=True, is_writable=True),
+            AccountMeta(pubkey=get_associated_token_address(owner, mint), is_signer=False, is_writable=True),
+            AccountMeta(pubkey=owner, is_signer=False, is_writable=False),
+            AccountMeta(pubkey=mint, is_signer=False, is_writable=False),
+            AccountMeta(pubkey=SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(pubkey=token_program_id, is_signer=False, is_writable=False),
+        ],
+        data=bytes([1])
+    )
+
+
+def transfer_checked_ix(source_owner, dest_owner, mint, amount, decimals):
+    """SPL TransferChecked between the associated token accounts of two owners"""
+    return transfer_checked(TransferCheckedParams(
+        program_id=TOKEN_PROGRAM_ID,
+        source=get_associated_token_address(source_owner, mint),
+        mint=mint,
+        dest=get_associated_token_address(dest_owner, mint),
+        owner=source_owner,
+        amount=amount,
+        decimals=decimals,
+        signers=[]
+    ))
+
+
+def transaction_size(payer, instructions, signer_count=1):
+    """Serialized size in bytes of a legacy transaction with these instructions"""
+    message = Message.new_with_blockhash(instructions, payer, Hash.default())
+    # Signature count is a compact-u16, one byte below 128 signers
+    return 1 + 64 * signer_count + len(bytes(message))
+
+
+def pack_instructions(payer, items, max_size=MAX_TX_SIZE, max_units=MAX_COMPUTE_UNITS, max_amount=None):
+    """Greedily pack (instruction, compute units, label[, amount]) items into transactions
+
+    An item's instruction may be a list of instructions that must land in
+    the same transaction, e.g. creating an account and then funding it.
+    With max_amount set, the token amounts of the items in one transaction
+    never add up to more than it. Each transaction starts with a compute
+    unit limit sized to its instructions. Item order is preserved. Returns
+    a list of {'instructions', 'labels', 'computeUnits', 'amount', 'size'}
+    dicts.
+    """
+    packed = []
+    current, labels, units, amount = [], [], 0, 0
+
+    def budgeted(instructions, total_units):
+        return [set_compute_unit_limit(min(total_units, max_units))] + instructions
+
+    def close():
+        packed.append({'instructions': budgeted(current, units), 'labels': labels, 'computeUnits': units,
+                       'amount': amount, 'size': transaction_size(payer, budgeted(current, units))})
+
+    for item in items:
+        instruction, item_units, label = item[:3]
+        item_amount = item[3] if len(item) > 3 else 0
+        if max_amount is not None and item_amount > max_amount:
+            raise ValueError(f"Amount for {label} exceeds the per-transaction cap")
+        group = instruction if isinstance(instruction, list) else [instruction]
+        candidate = current + group
+        fits = (units + item_units <= max_units and
+                (max_amount is None or amount + item_amount <= max_amount) and
+                transaction_size(payer, budgeted(candidate, units + item_units)) <= max_size)
+        if not fits and current:
+            close()
+            current, labels, units, amount = [], [], 0, 0
+            candidate = list(group)
+        if transaction_size(payer, budgeted(candidate, units + item_units)) > max_size:
+            raise ValueError(f"Instruction for {label} does not fit in a transaction on its own")
+        current = candidate
+        labels.append(label)
+        units += item_units
+        amount += item_amount
+
+    if current:
+        close()
+    return packed
+
+
+def sign_transaction(instructions, payer_keypair, blockhash):
+    """Sign instructions for blockhash and return the Transaction"""
+    if isinstance(blockhash, str):
+        blockhash = Hash.from_string(blockhash)
+    message = Message.new_with_blockhash(instructions, payer_keypair.pubkey(), blockhash)
+    return Transaction([payer_keypair], message, blockhash)
+
+
+def fetch_accounts(client, addresses, chunk_size=MULTIPLE_ACCOUNTS_LIMIT):
+    """Map each address to its account (None if missing), 100 per getMultipleAccounts call"""
+    accounts = {}
+    addresses = [a if isinstance(a, Pubkey) else Pubkey.from_string(str(a)) for a in addresses]
+    for start in range(0, len(addresses), chunk_size):
+        chunk = addresses[start:start + chunk_size]
+        response = client.get_multiple_accounts(chunk)
+        for address, account in zip(chunk, response.value):
+            accounts[str(address)] = account
+    return accounts
+
+
+def fetch_lamports(client, addresses):
+    """Map each address to its SOL balance in lamports, 0 for missing accounts"""
+    return {address: account.lamports if account is not None else 0
+            for address, account in fetch_accounts(client, addresses).items()}
+
+
+def lamports_needed(packed):
+    """SOL a payer spends on packed transactions: signature fees and rent of created token accounts"""
+    creates = sum(1 for plan in packed for ix in plan['instructions'] if ix.program_id == ASSOCIATED_TOKEN_PROGRAM_ID)
+    return len(packed) * SIGNATURE_FEE + creates * TOKEN_ACCOUNT_RENT
+
+
+def token_account_amount(account):
+    """Raw token amount of an SPL token account, read from bytes 64..72 of its data"""
+    return int.from_bytes(bytes(account.data)[64:72], 'little')
+
+
+def fetch_existing_accounts(client, addresses, chunk_size=MULTIPLE_ACCOUNTS_LIMIT):
+    """Return the subset of addresses that exist on chain"""
+    accounts = fetch_accounts(client, addresses, chunk_size)
+    return {address for address, account in accounts.items() if account is not None}
+
+
+def plan_token_accounts(client, payer, owners, mints):
+    """Create-ATA items for every (owner, mint) pair whose account does not exist yet
+
+    Returns (items, existing count) with items ready for pack_instructions.
+    """
+    pairs = [(owner, mint) for owner in owners for mint in mints]
+    addresses = [get_associated_token_address(owner, mint) for owner, mint in pairs]
+    existing = fetch_existing_accounts(client, addresses)
+    items = []
+    for (owner, mint), address in zip(pairs, addresses):
+        if str(address) in existing:
+            continue
+        items.append((create_ata_idempotent_ix(payer, owner, mint), CREATE_ATA_UNITS, (str(owner), str(mint))))
+    return items, len(existing)
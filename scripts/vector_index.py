@@ -0,0 +1,388 @@
+import os
+import re
+import json
+import glob
+import time
+import zlib
+import argparse
+from bootstrap import lazy_import
+
+np = lazy_import('numpy')
+
+VECTOR_DIR = os.getenv('VECTOR_INDEX_DIR', 'cache/vectors')
+# Optional sentence-transformers model name; the hashing TF-IDF embedder is used without it
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL')
+HASH_DIM = 1024
+CHUNK_CHARS = 800
+RETRIEVAL_K = int(os.getenv('RETRIEVAL_K', 6))
+
+SOURCES = {
+    'data/specifications': ('specifications', 'specificationId'),
+    'data/deliverables': ('deliverables', 'deliverableId'),
+    'data/messages': ('messages', 'messageId')
+}
+
+_TOKEN_RE = re.compile(r'\w\w+')
+_model = None
+
+
+def chunk_text(text, size=CHUNK_CHARS):
+    """Split text on paragraph boundaries into chunks of roughly size characters"""
+    chunks, current = [], ''
+    for paragraph in re.split(r'\n\s*\n', text or ''):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) > size:
+            chunks.append(current)
+            current = ''
+        # A single oversized paragraph is cut at the size limit
+        while len(paragraph) > size:
+            chunks.append(paragraph[:size])
+            paragraph = paragraph[size:]
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def hash_counts(texts):
+    """Sublinear term counts hashed into HASH_DIM signed buckets, one row per text"""
+    matrix = np.zeros((len(texts), HASH_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        counts = {}
+        for token in _TOKEN_RE.findall(text.lower()):
+            h = zlib.crc32(token.encode('utf-8'))
+            bucket = h % HASH_DIM
+            counts[bucket] = counts.get(bucket, 0) + (1 if h & 0x80000000 else -1)
+        for bucket, count in counts.items():
+            if count:
+                matrix[row, bucket] = np.sign(count) * (1 + np.log(abs(count)))
+    return matrix
+
+
+def _load_model():
+    global _model
+    if _model is None:
+        # Imported lazily so the TF-IDF path has no heavy dependency
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer(EMBEDDING_MODEL, device='cpu')
+    return _model
+
+
+def embedder_name():
+    return f"model:{EMBEDDING_MODEL}" if EMBEDDING_MODEL else f"hash-tfidf:{HASH_DIM}"
+
+
+def embed_raw(texts):
+    """Raw vectors as stored on disk (term counts for TF-IDF, embeddings for a model)"""
+    if EMBEDDING_MODEL:
+        return _load_model().encode(texts, batch_size=64, normalize_embeddings=True).astype(np.float32)
+    return hash_counts(texts)
+
+
+def normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+class VectorIndex:
+    """Chunk vectors for specifications, deliverables and messages
+
+    Raw vectors live in raw.npy and chunk metadata in meta.json. For the
+    TF-IDF embedder the IDF weights are recomputed from the stored counts
+    on load, so incremental builds never need to re-read unchanged files.
+    The source directory mtimes of the last build tell when files were
+    added or removed since; in-place edits come in through update_file()
+    from the watcher or the next build.
+    """
+
+    def __init__(self, directory=VECTOR_DIR):
+        self.directory = directory
+        self.raw_path = os.path.join(directory, 'raw.npy')
+        self.meta_path = os.path.join(directory, 'meta.json')
+        self.embedder = embedder_name()
+        self.chunks = []  # {'path', 'kind', 'id', 'collaborationId', 'title', 'text'}
+        self.files = {}   # path -> mtime
+        self.dirs = {}    # source directory -> mtime at the last build
+        self.raw = np.zeros((0, 0), dtype=np.float32)
+        self._matrix = None
+        self._idf = None
+        self._columns = None
+        self._dirty = False
+        self.meta_mtime = None  # of meta.json when this instance last loaded or saved it
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('embedder') != self.embedder:
+                print(f"Vector index was built with {meta.get('embedder')}, rebuilding for {self.embedder}")
+                return
+            raw = np.load(self.raw_path)
+        except (OSError, ValueError):
+            return
+        self.chunks = meta.get('chunks', [])
+        self.files = meta.get('files', {})
+        self.dirs = meta.get('dirs', {})
+        self.raw = raw
+        self.meta_mtime = os.path.getmtime(self.meta_path)
+
+    def exists(self):
+        return len(self.chunks) > 0
+
+    def save(self):
+        """Persist the index if anything changed"""
+        if not self._dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # np.save appends .npy to names without it, so the temp name keeps the suffix
+        tmp_raw = self.raw_path[:-len('.npy')] + '.tmp.npy'
+        np.save(tmp_raw, self.raw)
+        os.replace(tmp_raw, self.raw_path)
+        tmp_meta = self.meta_path + '.tmp'
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({'embedder': self.embedder, 'files': self.files, 'dirs': self.dirs, 'chunks': self.chunks},
+                      f, ensure_ascii=False)
+        os.replace(tmp_meta, self.meta_path)
+        self.meta_mtime = os.path.getmtime(self.meta_path)
+        self._dirty = False
+
+    def saved_elsewhere(self):
+        """Whether another process saved the index since this one loaded or saved it"""
+        try:
+            return os.path.getmtime(self.meta_path) != self.meta_mtime
+        except OSError:
+            return self.meta_mtime is not None
+
+    @staticmethod
+    def _dir_mtimes():
+        return {directory: os.path.getmtime(directory) if os.path.isdir(directory) else None
+                for directory in SOURCES}
+
+    def is_stale(self):
+        """Whether files were added to or removed from a source directory since the last build"""
+        return self._dir_mtimes() != self.dirs
+
+    def build(self, full=False, save=True):
+        """Embed new and changed documents, drop deleted ones; returns (added, removed) file counts"""
+        # Taken before the scan so files added during it show up as stale next time
+        dirs = self._dir_mtimes()
+        current = {}
+        for directory in SOURCES:
+            for path in glob.glob(f"{directory}/*.json"):
+                current[path.replace('\\', '/')] = os.path.getmtime(path)
+
+        stale = {p for p, mtime in self.files.items() if full or current.get(p) != mtime}
+        removed = len([p for p in self.files if p not in current])
+        changed = [p for p, mtime in current.items() if full or self.files.get(p) != mtime]
+        if dirs != self.dirs:
+            self.dirs = dirs
+            self._dirty = True
+        if stale or changed:
+            self._replace(stale, changed, current)
+        if save:
+            self.save()
+        return len(changed), removed
+
+    def update_file(self, path, deleted=False):
+        """Re-embed or drop a single file, e.g. from a watcher event; returns whether the index changed"""
+        path = path.replace('\\', '/')
+        if os.path.dirname(path) not in SOURCES:
+            return False
+        mtime = None if deleted or not os.path.exists(path) else os.path.getmtime(path)
+        if mtime == self.files.get(path):
+            return False
+        self._replace({path} if path in self.files else set(), [path] if mtime else [], {path: mtime})
+        return True
+
+    def _replace(self, stale, changed, mtimes):
+        """Drop the chunks of stale paths and embed the changed ones"""
+        keep = [i for i, chunk in enumerate(self.chunks) if chunk['path'] not in stale]
+        chunks = [self.chunks[i] for i in keep]
+        raw = [self.raw[keep]] if keep else []
+        files = {p: m for p, m in self.files.items() if p not in stale}
+
+        new_chunks = []
+        for path in changed:
+            kind, id_field = SOURCES[os.path.dirname(path)]
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Skipping {path}: {e}")
+                continue
+            files[path] = mtimes[path]
+            title = data.get('title') or ''
+            for text in chunk_text(data.get('content') or ''):
+                new_chunks.append({
+                    'path': path,
+                    'kind': kind,
+                    'id': data.get(id_field),
+                    'collaborationId': data.get('collaborationId'),
+                    'senderId': data.get('senderId'),
+                    'timestamp': data.get('timestamp') or data.get('createdAt'),
+                    'title': title,
+                    'text': text
+                })
+
+        if new_chunks:
+            # Titles are embedded with each chunk so short sections keep their topic
+            raw.append(embed_raw([f"{c['title']}\n{c['text']}" for c in new_chunks]))
+        self.chunks = chunks + new_chunks
+        self.raw = np.vstack(raw) if raw else np.zeros((0, 0), dtype=np.float32)
+        self.files = files
+        self._matrix = None
+        self._columns = None
+        self._dirty = True
+
+    def matrix(self):
+        """Search matrix with unit-length rows, computed once per process"""
+        if self._matrix is None:
+            if self.embedder.startswith('hash-tfidf') and len(self.raw):
+                df = np.count_nonzero(self.raw, axis=0)
+                self._idf = np.log((1 + len(self.raw)) / (1 + df)).astype(np.float32) + 1
+                self._matrix = normalize(self.raw * self._idf)
+            else:
+                self._matrix = normalize(self.raw) if len(self.raw) else self.raw
+        return self._matrix
+
+    def columns(self):
+        """Chunk kinds and collaboration ids as arrays, for masking without a Python loop"""
+        if self._columns is None:
+            self._columns = (np.array([chunk['kind'] for chunk in self.chunks], dtype=object),
+                             np.array([chunk['collaborationId'] for chunk in self.chunks], dtype=object))
+        return self._columns
+
+    def embed_queries(self, queries):
+        matrix = self.matrix()
+        vectors = embed_raw(queries)
+        if self._idf is not None:
+            vectors = vectors * self._idf
+        return normalize(vectors).astype(matrix.dtype)
+
+    def search_many(self, queries, k=5, kinds=None, collaboration_id=None, exclude=None):
+        """Top-k chunks for each query using one matrix product
+
+        exclude is an optional predicate on chunk metadata, e.g. to skip
+        messages that are already in the prompt verbatim.
+        """
+        if not self.exists() or not queries:
+            return [[] for _ in queries]
+        chunk_kinds, collaboration_ids = self.columns()
+        mask = np.ones(len(self.chunks), dtype=bool)
+        if kinds:
+            mask &= np.isin(chunk_kinds, list(kinds))
+        if collaboration_id:
+            mask &= collaboration_ids == collaboration_id
+        candidates = np.flatnonzero(mask)
+        if exclude:
+            # The predicate only runs on chunks that passed the column filters
+            candidates = np.array([i for i in candidates if not exclude(self.chunks[i])], dtype=np.intp)
+        if not len(candidates):
+            return [[] for _ in queries]
+
+        scores = self.embed_queries(queries) @ self.matrix()[candidates].T
+        k = min(k, len(candidates))
+        results = []
+        for row in scores:
+            # argpartition finds the top k in linear time, only those k are sorted
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            results.append([dict(self.chunks[candidates[i]], score=float(row[i])) for i in top if row[i] > 0])
+        return results
+
+    def search(self, query, k=5, **filters):
+        return self.search_many([query], k, **filters)[0]
+
+
+_index = None
+
+
+def get_index():
+    """Shared index for the prompt builders, or None when it has not been built
+
+    Files added or removed since the last build are embedded in memory
+    first, so new messages and specifications are never missing from the
+    results. Only the watcher and the build command write the index, and
+    a long-lived process reloads it when they have.
+    """
+    global _index
+    if _index is None or _index.saved_elsewhere():
+        _index = VectorIndex()
+    if not _index.exists():
+        return None
+    if _index.is_stale():
+        _index.build(save=False)
+    return _index
+
+
+def note_file_event(file_path, deleted=False):
+    """Apply a watcher event to the vector index if one has been built"""
+    try:
+        index = get_index()
+        if index is not None:
+            index.update_file(file_path, deleted=deleted)
+            # Also writes what get_index() embedded in memory
+            index.save()
+    except Exception as e:
+        print(f"Error updating vector index for {file_path}: {e}")
+
+
+def relevant_chunks(query, collaboration_id=None, k=5, kinds=None, exclude=None):
+    """Top-k chunks for query, or None when no vector index is available"""
+    try:
+        index = get_index()
+    except Exception as e:
+        print(f"Vector index unavailable: {e}")
+        return None
+    if index is None:
+        return None
+    return index.search(query, k, kinds=kinds, collaboration_id=collaboration_id, exclude=exclude)
+
+
+def format_chunks(chunks):
+    """Render retrieved chunks for a system prompt"""
+    lines = []
+    for chunk in chunks:
+        if chunk['kind'] == 'messages':
+            header = f"Message from {chunk.get('senderId')} ({(chunk.get('timestamp') or '')[:10]})"
+        else:
+            header = f"{chunk['kind'][:-1].capitalize()}: {chunk['title']}"
+        lines.append(f"\n{header}\n{chunk['text']}\n" + "-" * 40)
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vector index over specifications, deliverables and messages')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='Create or incrementally update the index')
+    build.add_argument('--full', action='store_true', help='Re-embed every document')
+    query = sub.add_parser('query', help='Show the chunks closest to a query')
+    query.add_argument('text')
+    query.add_argument('--collab', help='Only chunks of this collaborationId')
+    query.add_argument('--kind', action='append', choices=[kind for kind, _ in SOURCES.values()])
+    query.add_argument('-k', type=int, default=5)
+    args = parser.parse_args()
+
+    index = VectorIndex()
+    if args.command == 'build':
+        start = time.perf_counter()
+        added, removed = index.build(full=args.full)
+        print(f"Embedded {added} files, removed {removed}, {len(index.chunks)} chunks "
+              f"with {index.embedder} in {time.perf_counter() - start:.2f}s")
+        return
+
+    start = time.perf_counter()
+    hits = index.search(args.text, args.k, kinds=args.kind, collaboration_id=args.collab)
+    elapsed = (time.perf_counter() - start) * 1000
+    for hit in hits:
+        print(f"{hit['score']:.3f}  {hit['path']}  {hit['title']}")
+        print(f"       {hit['text'][:160]!r}")
+    print(f"\n{len(hits)} results in {elapsed:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,29 +1,26 @@
 import time
 import os
-import sys
 import json
 import glob
-import codecs
 import subprocess
 import logging
 from typing import Optional, Dict, Any
+from collections import OrderedDict
 from datetime import datetime
 import asyncio
-from telegram.ext import ApplicationBuilder
-from dotenv import load_dotenv
+from bootstrap import setup_console, load_env, lazy_import
 from pyairtable import Api
 from tenacity import retry, stop_after_attempt, wait_exponential
+from file_index import note_file_event
+import search_index
+import vector_index
+from message_log import MessageLog, log_enabled
+import metrics
 
-# Force UTF-8 encoding for stdin/stdout/stderr
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
-if sys.stdin.encoding != 'utf-8':
-    sys.stdin = codecs.getreader('utf-8')(sys.stdin.buffer, 'strict')
+telegram_error = lazy_import('telegram.error')
 
-# Set default encoding to UTF-8
-import locale
-locale.getpreferredencoding = lambda: 'UTF-8'
+# Force UTF-8 encoding for stdin/stdout/stderr
+setup_console()
 
 # Configure logging
 logging.basicConfig(
@@ -33,7 +30,17 @@ logging.basicConfig(
 )
 
 # Load environment variables
-load_dotenv()
+load_env()
+
+# Verbose per-event output, off by default
+WATCH_DEBUG = os.getenv('WATCH_DEBUG', '').lower() in ('1', 'true', 'yes', 'on')
+logging.getLogger().setLevel(logging.DEBUG if WATCH_DEBUG else logging.INFO)
+# httpx logs every Bot API URL, bot token included, at INFO
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+def debug(message):
+    if WATCH_DEBUG:
+        print(f"DEBUG: {message}")
 
 # Get API keys from environment variables
 AIRTABLE_API_KEY = os.getenv('AIRTABLE_API_KEY')
@@ -44,6 +51,9 @@ BASE_ID = os.getenv('AIRTABLE_BASE_ID')
 if not BASE_ID:
     raise ValueError("AIRTABLE_BASE_ID environment variable is required")
 
+# Another server to send Airtable requests to, e.g. scripts/airtable_standin.py
+AIRTABLE_ENDPOINT_URL = os.getenv('AIRTABLE_ENDPOINT_URL', 'https://api.airtable.com')
+
 def safe_read_json(file_path: str, max_retries: int = 3, retry_delay: float = 0.5) -> Dict[str, Any]:
     """Safely read and parse JSON file with improved retry logic"""
     last_error = None
@@ -106,7 +116,27 @@ def is_file_ready(file_path: str, timeout: int = 5, check_interval: float = 0.1)
     return False
 
 # Initialize Airtable API
-api = Api(AIRTABLE_API_KEY)
+api = Api(AIRTABLE_API_KEY, endpoint_url=AIRTABLE_ENDPOINT_URL)
+
+# Bot API server the bot token is appended to, e.g. scripts/telegram_standin.py for offline runs
+TELEGRAM_API_BASE_URL = os.getenv('TELEGRAM_API_BASE_URL', 'https://api.telegram.org/bot')
+TELEGRAM_SEND_ATTEMPTS = 3
+# Message file versions remembered to skip duplicate events, oldest forgotten first
+PROCESSED_MESSAGES_LIMIT = 10000
+# git diff-tree --name-status letters and the file events they become
+CHANGE_EVENTS = {'A': 'created', 'D': 'deleted'}
+
+# Data directories whose changes are synced and announced
+WATCHED_DIRS = ['messages', 'news', 'thoughts', 'specifications', 'deliverables', 'collaborations',
+                'swarms', 'services', 'missions']
+
+def event_kind(file_path):
+    """Watched data directory of a path, 'kinos' for KinOS files outside data/ and cache/, else None"""
+    kind = next((d for d in WATCHED_DIRS if f"data/{d}/" in file_path), None)
+    # Generated files such as cache/summaries/pair-kinos--xforge/ only mention the swarm
+    if kind is None and 'kinos' in file_path and not any(d in file_path for d in ('data/', 'cache/')):
+        kind = 'kinos'
+    return kind
 
 # Cache for Telegram applications and event loops
 telegram_apps: Dict[str, Any] = {}
@@ -114,11 +144,9 @@ loop = None
 
 def get_telegram_app(sender_id):
     """Get or create Telegram application for a sender"""
-    print(f"Getting telegram app for sender: {sender_id}")
     if sender_id not in telegram_apps:
         token = os.getenv(f'{sender_id.upper()}_TELEGRAM_BOT_TOKEN')
-        print(f"Looking for token: {sender_id.upper()}_TELEGRAM_BOT_TOKEN")
-        print(f"Token found: {bool(token)}")
+        debug(f"Token {sender_id.upper()}_TELEGRAM_BOT_TOKEN found: {bool(token)}")
         
         # Only default to KINOS if sender's token not found
         if not token:
@@ -134,6 +162,7 @@ def get_telegram_app(sender_id):
                 telegram_apps[sender_id] = (
                     Application.builder()
                     .token(token)
+                    .base_url(TELEGRAM_API_BASE_URL)
                     .http_version("1.1")  # Use HTTP 1.1 instead of default HTTP/2
                     .get_updates_http_version("1.1")
                     .build()
@@ -145,6 +174,19 @@ def get_telegram_app(sender_id):
                 
     return telegram_apps.get(sender_id)
 
+async def send_with_retry(bot, chat_id, text, attempts=TELEGRAM_SEND_ATTEMPTS):
+    """Send a Telegram message, waiting out flood control (429 with retry_after) between attempts"""
+    for attempt in range(attempts):
+        try:
+            return await bot.send_message(chat_id=chat_id, text=text)
+        except telegram_error.RetryAfter as e:
+            if attempt == attempts - 1:
+                raise
+            wait = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+            logging.warning(f"Telegram flood control on chat {chat_id}, retrying in {wait}s")
+            metrics.inc('watch_telegram_retries_total')
+            await asyncio.sleep(wait)
+
 class FileLock:
     def __init__(self):
         self._locks = {}
@@ -165,8 +207,27 @@ class RepositoryChangeHandler:
         super().__init__()
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
-        self.processed_messages = set()  # Track processed messages
+        self.processed_messages = OrderedDict()  # (path, mtime) of processed message files, as an LRU
         self.file_lock = FileLock()
+        self.message_log = MessageLog()  # used when MESSAGE_STORE=log
+        self.trace = None  # stage timings of the event being handled
+
+    @staticmethod
+    def _message_key(file_path):
+        try:
+            return file_path, os.path.getmtime(file_path)
+        except OSError:
+            return file_path, None
+
+    def _forget_message(self, file_path):
+        for key in [key for key in self.processed_messages if key[0] == file_path]:
+            del self.processed_messages[key]
+
+    def _remember_message(self, key):
+        self.processed_messages[key] = None
+        self.processed_messages.move_to_end(key)
+        while len(self.processed_messages) > PROCESSED_MESSAGES_LIMIT:
+            self.processed_messages.popitem(last=False)
 
     def on_created(self, event):
         if event.is_directory:
@@ -224,75 +285,111 @@ class RepositoryChangeHandler:
             # Read the file with retry mechanism
             data = safe_read_json(file_path)
             
-            # Get existing records
-            existing_records = table.all()
-            existing_ids = {record['fields'].get(id_field): record['id'] 
-                          for record in existing_records 
-                          if id_field in record['fields']}
-            
             # Get record ID from data
             record_id = data.get(id_field)
             if not record_id:
                 print(f"Warning: Missing {id_field} in {file_path}")
                 return
-                
-            # Update or create record
-            if record_id in existing_ids:
-                table.update(existing_ids[record_id], data)
-                print(f"Updated {id_field}: {record_id} in Airtable")
-            else:
-                table.create(data)
-                print(f"Created new {id_field}: {record_id} in Airtable")
+
+            with metrics.span('watch_airtable', trace=self.trace):
+                # Get existing records
+                existing_records = table.all()
+                existing_ids = {record['fields'].get(id_field): record['id']
+                              for record in existing_records
+                              if id_field in record['fields']}
+
+                # Update or create record
+                if record_id in existing_ids:
+                    table.update(existing_ids[record_id], data)
+                    action = 'updated'
+                else:
+                    table.create(data)
+                    action = 'created'
+            metrics.inc('watch_airtable_pushes_total', action=action)
+            print(f"{action.capitalize()} {id_field}: {record_id} in Airtable")
                 
         except Exception as e:
             print(f"Error pushing to Airtable: {e}")
 
     async def _handle_file_event(self, event_type, file_path):
+        """Process one file event, logging its stage timings as one JSON line"""
         # Convert path to use forward slashes and normalize structure
         file_path = file_path.replace('\\', '/')
         if file_path.startswith('./'):
             file_path = file_path[2:]
-        
-        # Add debug logging
-        print(f"Detected {event_type} event for: {file_path}")
-        print(f"DEBUG: Processing file: {file_path}")
-        print(f"DEBUG: Event type: {event_type}")
+        debug(f"Detected {event_type} event for: {file_path}")
 
         # Skip non-relevant files early
         if any(skip in file_path for skip in ['.git', '.aider', '.tmp']):
+            metrics.inc('watch_events_skipped_total', reason='ignored')
             return
-            
+
         # Only process certain file types
-        if not any(f"data/{d}" in file_path for d in ['messages', 'news', 'thoughts', 'specifications',
-                                                       'deliverables', 'collaborations', 'swarms', 'services',
-                                                       'missions']) and 'kinos' not in file_path:
-            print(f"Skipping non-data file: {file_path}")
+        kind = event_kind(file_path)
+        if kind is None:
+            debug(f"Skipping non-data file: {file_path}")
+            metrics.inc('watch_events_skipped_total', reason='ignored')
+            return
+
+        metrics.inc('watch_events_total', type=event_type, kind=kind)
+        self.trace = metrics.Trace('file_event', type=event_type, path=file_path)
+        try:
+            await self._process_file_event(event_type, file_path)
+        except Exception as e:
+            metrics.inc('errors_total', stage='watch_event')
+            print(f"Error handling {event_type} event for {file_path}: {e}")
+        finally:
+            record = self.trace.record()
+            self.trace = None
+            metrics.observe('watch_event_seconds', record['total'], kind=kind)
+            logging.info(json.dumps(record, ensure_ascii=False))
+
+    async def _process_file_event(self, event_type, file_path):
+        # Keep the on-disk file indexes in step with the data directories
+        if event_type == 'deleted':
+            note_file_event(file_path, deleted=True)
+            search_index.note_file_event(file_path, deleted=True)
+            vector_index.note_file_event(file_path, deleted=True)
+            if 'data/messages' in file_path:
+                self._forget_message(file_path)
+                if log_enabled():
+                    self.message_log.remove_file(file_path)
             return
             
         # Wait for file to be ready with increased timeout for larger files
         timeout = 10 if any(x in file_path for x in ['specifications', 'deliverables', 'thoughts']) else 5
         max_attempts = 3
         
-        for attempt in range(max_attempts):
-            if is_file_ready(file_path, timeout=timeout):
-                print(f"File is ready after attempt {attempt + 1}: {file_path}")
-                break
-            if attempt == max_attempts - 1:
-                print(f"File not ready after {max_attempts} attempts: {file_path}")
-                return
-            await asyncio.sleep(1)  # Wait between attempts
-        
-        logging.info(f"Processing {event_type} event for file: {file_path}")
+        with metrics.span('watch_file_ready', trace=self.trace):
+            for attempt in range(max_attempts):
+                if is_file_ready(file_path, timeout=timeout):
+                    debug(f"File is ready after attempt {attempt + 1}: {file_path}")
+                    break
+                if attempt == max_attempts - 1:
+                    print(f"File not ready after {max_attempts} attempts: {file_path}")
+                    metrics.inc('watch_events_skipped_total', reason='not_ready')
+                    return
+                await asyncio.sleep(1)  # Wait between attempts
+
+        logging.debug(f"Processing {event_type} event for file: {file_path}")
+        note_file_event(file_path)
+        search_index.note_file_event(file_path)
+        vector_index.note_file_event(file_path)
 
-        # Check if this is a message file we've already processed
-        if 'data/messages' in file_path and file_path in self.processed_messages:
-            logging.info(f"Skipping already processed message: {file_path}")
+        # Check if this version of a message file has already been processed;
+        # an edited message has a new mtime and is processed again
+        message_key = self._message_key(file_path) if 'data/messages' in file_path else None
+        if message_key in self.processed_messages:
+            self.processed_messages.move_to_end(message_key)
+            logging.debug(f"Skipping already processed message: {file_path}")
+            metrics.inc('watch_dedup_hits_total')
             return
-            
+
         try:
             # Git push after any file change
-            print("Pushing changes to git...")
-            subprocess.run(["git", "push"], check=True)
+            debug("Pushing changes to git...")
+            with metrics.span('watch_git_push', trace=self.trace):
+                subprocess.run(["git", "push"], check=True)
             
             # Push to Airtable if file is created or modified
             if event_type in ['created', 'modified'] and file_path.endswith('.json'):
@@ -301,24 +398,27 @@ class RepositoryChangeHandler:
             print(f"Error pushing to git: {e}")
             
         # Only process new JSON files for notifications, regardless of event type
-        if file_path.endswith('.json') and file_path not in self.processed_messages:
+        if file_path.endswith('.json') and message_key not in self.processed_messages:
             # Handle messages
             if 'data/messages' in file_path:
-                print(f"DEBUG: Processing message file")
                 try:
                     data = safe_read_json(file_path)
-                    print(f"DEBUG: Message data loaded: {data.get('messageId')}")
+                    debug(f"Message data loaded: {data.get('messageId')}")
                     if 'content' in data and 'senderId' in data and 'messageId' in data:
-                        print(f"DEBUG: Required fields present")
-                        self.processed_messages.add(file_path)
+                        self._remember_message(message_key)
                         current_time = time.time()
                         if hasattr(self, 'last_message_time'):
                             time_since_last = current_time - self.last_message_time
                             if time_since_last < 2:
-                                await asyncio.sleep(2 - time_since_last)
+                                with metrics.span('watch_pacing', trace=self.trace):
+                                    await asyncio.sleep(2 - time_since_last)
+                    
+                        if log_enabled():
+                            self.message_log.append_file(file_path, data)
                     
                         message = f"{data['content']}"
-                        await self._send_telegram_message(message, data['senderId'])
+                        await self._send_telegram_message(message, data['senderId'],
+                                                          collab_id=data.get('collaborationId', ''))
                         self.last_message_time = time.time()
                         print(f"Processed new message {data['messageId']}")
                 except Exception as e:
@@ -427,37 +527,31 @@ class RepositoryChangeHandler:
                 except Exception as e:
                     print(f"Error processing mission file {file_path}: {e}")
 
-    async def _send_telegram_message(self, message, sender_id):
+    async def _send_telegram_message(self, message, sender_id, collab_id=None):
         try:
-            print(f"DEBUG: Starting Telegram send process")
-            print(f"DEBUG: Sender ID: {sender_id}")
-            print(f"DEBUG: Message: {message[:100]}...")  # First 100 chars
-            
-            # Check environment variables
-            main_chat = os.getenv('MAIN_TELEGRAM_CHAT_ID')
-            bot_token = os.getenv(f'{sender_id.upper()}_TELEGRAM_BOT_TOKEN')
-            print(f"DEBUG: Main chat ID exists: {bool(main_chat)}")
-            print(f"DEBUG: Bot token exists for {sender_id}: {bool(bot_token)}")
-            
+            debug(f"Sending from {sender_id}: {message[:100]}...")  # First 100 chars
+
             # Rate limiting
             current_time = time.time()
             if hasattr(self, '_last_message_time'):
                 time_since_last = current_time - self._last_message_time
                 if time_since_last < 3:
-                    await asyncio.sleep(3 - time_since_last)
+                    with metrics.span('watch_pacing', trace=self.trace):
+                        await asyncio.sleep(3 - time_since_last)
             self._last_message_time = current_time
 
             logging.info(f"Sending message from {sender_id}")
             
-            # Get message data to find collaboration
-            message_files = glob.glob('data/messages/*.json')
-            collab_id = None
-            for msg_file in message_files:
-                with open(msg_file, 'r', encoding='utf-8') as f:
-                    msg_data = json.load(f)
-                    if msg_data.get('senderId') == sender_id and msg_data.get('content') == message:
-                        collab_id = msg_data.get('collaborationId')
-                        break
+            # Get message data to find collaboration, unless the caller already knows it
+            message_files = []
+            if collab_id is None:
+                message_files = glob.glob('data/messages/*.json')
+                for msg_file in message_files:
+                    with open(msg_file, 'r', encoding='utf-8') as f:
+                        msg_data = json.load(f)
+                        if msg_data.get('senderId') == sender_id and msg_data.get('content') == message:
+                            collab_id = msg_data.get('collaborationId')
+                            break
 
             # For thoughts, always use the sender's telegram chat
             if 'data/thoughts' in message_files[0] if message_files else False:
@@ -491,46 +585,55 @@ class RepositoryChangeHandler:
                     chat_id = int(os.getenv('MAIN_TELEGRAM_CHAT_ID'))
                     logging.info(f"Using main chat ID for message from {sender_id}")
             
-            print(f"DEBUG: Using chat ID: {chat_id}")
-            
+            debug(f"Using chat ID: {chat_id}")
+
             # Get app
             app = get_telegram_app(sender_id)
-            print(f"DEBUG: Telegram app created: {bool(app)}")
-            
+
             if app and chat_id:
-                print(f"DEBUG: Attempting to send message...")
-                await app.bot.send_message(chat_id=chat_id, text=message)
-                print(f"DEBUG: Message sent successfully")
+                with metrics.span('watch_telegram_send', trace=self.trace):
+                    await send_with_retry(app.bot, chat_id, message)
+                metrics.inc('watch_notifications_total', result='sent')
+                debug("Message sent successfully")
             else:
-                print(f"DEBUG: Failed to send - Missing {'app' if not app else 'chat_id'}")
-                print(f"DEBUG: Sender: {sender_id}")
-                print(f"DEBUG: Chat ID: {chat_id}")
+                metrics.inc('watch_notifications_total', result='skipped')
+                print(f"Failed to send from {sender_id} to chat {chat_id}: missing {'app' if not app else 'chat_id'}")
         except Exception as e:
+            metrics.inc('watch_notifications_total', result='failed')
             print(f"Error sending Telegram message: {e}")
             print(f"Sender: {sender_id}")
             print(f"Chat ID: {chat_id if 'chat_id' in locals() else 'Not found'}")
 
 def get_latest_changes():
-    """Get files changed in the latest commit"""
+    """Get (event type, path) for the files changed in the latest commit"""
     try:
         # Get the latest commit hash
         result = subprocess.run(["git", "log", "-1", "--format=%H"], 
                               capture_output=True, text=True, check=True)
         latest_commit = result.stdout.strip()
 
-        # Get the files changed in this commit
-        result = subprocess.run(["git", "diff-tree", "--no-commit-id", "--name-only", "-r", latest_commit],
+        # Get the files changed in this commit, with A(dded), M(odified) or D(eleted)
+        result = subprocess.run(["git", "diff-tree", "--no-commit-id", "--name-status", "-r", latest_commit],
                               capture_output=True, text=True, check=True)
-        changed_files = result.stdout.strip().split('\n')
-        
-        return [f for f in changed_files if f and not any(skip in f for skip in ['.git', '.aider', '.tmp'])]
+        changes = []
+        for line in result.stdout.strip().split('\n'):
+            if not line:
+                continue
+            status, path = line.split('\t', 1)
+            if any(skip in path for skip in ['.git', '.aider', '.tmp']):
+                continue
+            changes.append((CHANGE_EVENTS.get(status[0], 'modified'), path))
+        return changes
     except subprocess.CalledProcessError as e:
         print(f"Error getting git changes: {e}")
         return []
 
 def main():
     last_commit = None
-    
+    # One handler for the whole run so its event loop and processed-message set carry across commits
+    event_handler = RepositoryChangeHandler()
+    metrics.start()
+
     while True:
         try:
             # Get current commit
@@ -540,16 +643,16 @@ def main():
             
             # If commit changed
             if current_commit != last_commit:
-                changed_files = get_latest_changes()
+                changes = get_latest_changes()
                 print(f"Processing changes from commit {current_commit[:8]}")
                 
-                for file_path in changed_files:
-                    if os.path.exists(file_path):
-                        print(f"Processing changed file: {file_path}")
-                        # Process the file using existing handlers
-                        event_handler = RepositoryChangeHandler()
+                for event_type, file_path in changes:
+                    # Deletions are applied to the indexes and the message log, other
+                    # changes only while the file is still there
+                    if event_type == 'deleted' or os.path.exists(file_path):
+                        print(f"Processing {event_type} file: {file_path}")
                         event_handler.loop.run_until_complete(
-                            event_handler._handle_file_event("modified", file_path)
+                            event_handler._handle_file_event(event_type, file_path)
                         )
                 
                 last_commit = current_commit
@@ -558,6 +661,7 @@ def main():
             
         except KeyboardInterrupt:
             print("\nStopped watching repository")
+            metrics.dump()
             break
         except Exception as e:
             print(f"Error in main loop: {e}")
@@ -0,0 +1,364 @@
+import os
+import json
+import argparse
+from datetime import datetime
+from solders.pubkey import Pubkey
+from spl.token.instructions import get_associated_token_address
+from bootstrap import setup_console, load_env, lazy_import
+from file_index import FileIndex
+from keystore import load_hot_wallet
+from distribution_engine import COMPUTE_DECIMALS, to_base_units, format_amount
+from distribution_ledger import iso_week, parse_week
+from balance_monitor import MAX_TX_AMOUNT, load_hot_wallets, compute_mint, fetch_balances, invalidate
+from tx_packer import (create_ata_idempotent_ix, transfer_checked_ix, fetch_accounts, fetch_lamports,
+                       lamports_needed, pack_instructions, CREATE_ATA_UNITS, TRANSFER_UNITS)
+from tx_executor import TxExecutor
+
+# Force UTF-8 encoding
+setup_console()
+
+load_env()
+
+solana_rpc = lazy_import('solana.rpc.api')
+
+PAYMENTS_LOG = 'data/ledger/payments.jsonl'
+COLLAB_FIELDS = ('collaborationId', 'clientSwarmId', 'providerSwarmId', 'status', 'price')
+
+def load_active_collaborations():
+    """Active collaborations from the collaborations index"""
+    # Money moves on these, so every file is parsed again rather than trusting mtimes
+    index = FileIndex('data/collaborations', COLLAB_FIELDS).refresh(full=True)
+    collabs = [fields for _, fields in index.items() if fields.get('status') == 'active']
+    return sorted(collabs, key=lambda c: str(c.get('collaborationId')))
+
+def validate_payments(collabs, wallets):
+    """Split collaborations into payments and rejections
+
+    A payment is only allowed between two different swarms that both have a
+    hot wallet, so every receiver is on the whitelist of swarm wallets.
+    """
+    payments, rejected = [], []
+    for collab in collabs:
+        client, provider = collab.get('clientSwarmId'), collab.get('providerSwarmId')
+        reason = None
+        if client not in wallets:
+            reason = f"client {client} has no hot wallet"
+        elif provider not in wallets:
+            reason = f"provider {provider} is not a whitelisted swarm wallet"
+        elif client == provider or wallets[client] == wallets[provider]:
+            reason = "client and provider are the same wallet"
+        elif not collab.get('price') or collab['price'] <= 0:
+            reason = "no price"
+        if reason:
+            rejected.append({'collaborationId': collab.get('collaborationId'), 'reason': reason})
+            continue
+        payments.append({
+            'collaborationId': collab['collaborationId'],
+            'clientSwarmId': client,
+            'providerSwarmId': provider,
+            'amount': to_base_units(collab['price'])
+        })
+    return payments, rejected
+
+def net_settlements(week, payments, cap):
+    """Net the payments between each pair of swarms into one settlement
+
+    Payments in opposite directions cancel out, so each pair settles only
+    its difference in a single transfer. Settlements above cap base units
+    exceed the autonomous per-tx limit and are returned separately, held
+    for manual approval. Returns (settlements, held).
+    """
+    pairs = {}
+    for payment in payments:
+        a, b = sorted((payment['clientSwarmId'], payment['providerSwarmId']))
+        pair = pairs.setdefault((a, b), {'balance': 0, 'collaborations': []})
+        # Positive balance: a owes b
+        pair['balance'] += payment['amount'] if payment['clientSwarmId'] == a else -payment['amount']
+        pair['collaborations'].append(payment)
+
+    settlements, held = [], []
+    for (a, b), pair in sorted(pairs.items()):
+        sender, receiver = (a, b) if pair['balance'] >= 0 else (b, a)
+        amount = abs(pair['balance'])
+        (held if amount > cap else settlements).append({
+            'settlementId': f"{week}:{a}:{b}",
+            'from': sender,
+            'to': receiver,
+            'amount': amount,
+            'transfers': [amount] if amount else [],
+            'collaborations': pair['collaborations']
+        })
+    return settlements, held
+
+class PaymentLog:
+    """Append-only log of weekly settlements and their transfers
+
+    A 'planned' entry is written for each settlement before anything is sent,
+    and a 'transfer' entry with the signature and outcome as soon as each of
+    its transfers is final. Transfers without an outcome after a crash are
+    reported as unresolved instead of being paid twice. Settlements above
+    the per-tx cap get a 'held' entry and are left for manual approval.
+    """
+
+    def __init__(self, path=PAYMENTS_LOG):
+        self.path = path
+        self.entries = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            pass
+
+    def append(self, entries):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        timestamp = datetime.utcnow().isoformat() + 'Z'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                entry = {**entry, 'timestamp': timestamp}
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                self.entries.append(entry)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def week_state(self, week):
+        """Planned settlements of week with the latest outcome of each transfer"""
+        state = {}
+        for entry in self.entries:
+            if entry.get('week') != week:
+                continue
+            if entry['event'] == 'planned':
+                state[entry['settlementId']] = {'planned': entry, 'outcomes': {}}
+            elif entry['event'] == 'transfer' and entry['settlementId'] in state:
+                state[entry['settlementId']]['outcomes'][entry['index']] = entry['status']
+        return state
+
+    def rejected(self, week):
+        return {(e['collaborationId'], e['reason']) for e in self.entries
+                if e.get('week') == week and e['event'] == 'rejected'}
+
+    def held(self, week):
+        return {(e['settlementId'], e['amount']) for e in self.entries
+                if e.get('week') == week and e['event'] == 'held'}
+
+def settlement_status(settlement_state):
+    """'settled', 'failed' (safe to retry) or 'unresolved' (no outcome recorded)"""
+    transfers = settlement_state['planned']['transfers']
+    outcomes = settlement_state['outcomes']
+    if any(index not in outcomes for index in range(len(transfers))):
+        return 'unresolved'
+    if all(status == 'confirmed' for status in outcomes.values()):
+        return 'settled'
+    return 'failed'
+
+def plan_week(week, log, retry_unresolved=False):
+    """Settlements still to pay for week: new ones plus failed transfers of earlier runs
+
+    Returns (new settlements, retries, rejections, held settlements, unresolved
+    settlement ids). Each retry is (planned settlement entry, transfer indices
+    to send again).
+    """
+    wallets = load_hot_wallets()
+    payments, rejected = validate_payments(load_active_collaborations(), wallets)
+    state = log.week_state(week)
+
+    covered = {c['collaborationId'] for s in state.values() for c in s['planned']['collaborations']}
+    retries, unresolved = [], []
+    for settlement_id, settlement_state in state.items():
+        status = settlement_status(settlement_state)
+        if status == 'unresolved' and not retry_unresolved:
+            unresolved.append(settlement_id)
+        elif status != 'settled':
+            outcomes = settlement_state['outcomes']
+            indices = [i for i in range(len(settlement_state['planned']['transfers'])) if outcomes.get(i) != 'confirmed']
+            retries.append((settlement_state['planned'], indices))
+
+    new_payments = [p for p in payments if p['collaborationId'] not in covered]
+    settlements, held = net_settlements(week, new_payments, to_base_units(MAX_TX_AMOUNT))
+    # Collaborations activated after a pair already settled this week get a second settlement
+    for settlement in settlements:
+        base_id, number = settlement['settlementId'], 2
+        while settlement['settlementId'] in state:
+            settlement['settlementId'] = f"{base_id}:{number}"
+            number += 1
+    return settlements, retries, rejected, held, unresolved
+
+def transfer_items(transfers, wallets, existing_accounts, mint):
+    """Packer items per paying swarm for (settlement, index, amount) transfers"""
+    items = {}
+    for settlement, index, amount in transfers:
+        sender = Pubkey.from_string(wallets[settlement['from']])
+        receiver = Pubkey.from_string(wallets[settlement['to']])
+        instructions = [transfer_checked_ix(sender, receiver, mint, amount, COMPUTE_DECIMALS)]
+        units = TRANSFER_UNITS
+        # Transfers land in any order, so each one creates a missing receiving account
+        if str(get_associated_token_address(receiver, mint)) not in existing_accounts:
+            instructions.insert(0, create_ata_idempotent_ix(sender, receiver, mint))
+            units += CREATE_ATA_UNITS
+        items.setdefault(settlement['from'], []).append(
+            (instructions, units, (settlement['settlementId'], index), amount))
+    return items
+
+def run_week(client, week, log, settlements, retries):
+    """Pay planned settlements and retries from the hot wallets as one pipelined batch"""
+    wallets = load_hot_wallets()
+    mint = compute_mint()
+    by_id = {}
+    transfers = []
+    for settlement in settlements:
+        by_id[settlement['settlementId']] = settlement
+        transfers += [(settlement, i, amount) for i, amount in enumerate(settlement['transfers'])]
+    for settlement, indices in retries:
+        by_id[settlement['settlementId']] = settlement
+        transfers += [(settlement, i, settlement['transfers'][i]) for i in indices]
+
+    # Each paying swarm must hold enough COMPUTE and have a usable key
+    outflow = {}
+    for settlement, _, amount in transfers:
+        outflow[settlement['from']] = outflow.get(settlement['from'], 0) + amount
+    balances = fetch_balances(client, {swarm_id: wallets[swarm_id] for swarm_id in outflow}, mint, ttl=0)
+    payers, skipped = {}, set()
+    for swarm_id, amount in outflow.items():
+        if balances[swarm_id]['amount'] < amount:
+            print(f"Low balance: {swarm_id} holds {format_amount(balances[swarm_id]['amount'])} COMPUTE, "
+                  f"needs {format_amount(amount)}")
+            skipped.add(swarm_id)
+            continue
+        try:
+            payers[swarm_id] = load_hot_wallet(swarm_id)
+        except Exception as e:
+            print(f"Error loading hot wallet of {swarm_id}: {e}")
+            skipped.add(swarm_id)
+
+    transfers = [t for t in transfers if t[0]['from'] not in skipped]
+    receivers = {str(get_associated_token_address(Pubkey.from_string(wallets[s['to']]), mint))
+                 for s, _, _ in transfers}
+    existing = {address for address, account in fetch_accounts(client, receivers).items() if account is not None}
+
+    plans = {}
+    for swarm_id, items in transfer_items(transfers, wallets, existing, mint).items():
+        plans[swarm_id] = pack_instructions(payers[swarm_id].pubkey(), items, max_amount=to_base_units(MAX_TX_AMOUNT))
+    # Fees and the rent of receiving accounts it creates come out of each payer's SOL
+    lamports = fetch_lamports(client, [str(payers[swarm_id].pubkey()) for swarm_id in plans])
+    for swarm_id, packed_plans in list(plans.items()):
+        needed, balance = lamports_needed(packed_plans), lamports[str(payers[swarm_id].pubkey())]
+        if balance < needed:
+            print(f"Low SOL: {swarm_id} holds {balance / 1e9:.6f} SOL, needs {needed / 1e9:.6f} for fees and rent")
+            skipped.add(swarm_id)
+            del plans[swarm_id]
+
+    transfers = [t for t in transfers if t[0]['from'] not in skipped]
+    settlements = [s for s in settlements if s['from'] not in skipped or not s['transfers']]
+    log.append([{
+        'event': 'planned',
+        'week': week,
+        'settlementId': s['settlementId'],
+        'from': s['from'],
+        'to': s['to'],
+        'fromWallet': wallets[s['from']],
+        'toWallet': wallets[s['to']],
+        'amount': s['amount'],
+        'transfers': s['transfers'],
+        'collaborations': s['collaborations'],
+        'decimals': COMPUTE_DECIMALS
+    } for s in settlements])
+    if not transfers:
+        return []
+
+    packed = []
+    for swarm_id, packed_plans in plans.items():
+        for plan in packed_plans:
+            plan['payer'] = payers[swarm_id]
+            packed.append(plan)
+    print(f"\nSending {len(transfers)} transfers in {len(packed)} transactions...")
+
+    def record(result):
+        entries = []
+        for settlement_id, index in result['labels']:
+            settlement = by_id[settlement_id]
+            entries.append({
+                'event': 'transfer',
+                'week': week,
+                'settlementId': settlement_id,
+                'index': index,
+                'from': settlement['from'],
+                'to': settlement['to'],
+                'amount': settlement['transfers'][index],
+                'signature': result['signature'],
+                'status': result['status'],
+                'attempts': result['attempts'],
+                'error': result['error']
+            })
+        log.append(entries)
+        ids = ', '.join(f"{settlement_id}#{index}" for settlement_id, index in result['labels'])
+        if result['status'] == 'confirmed':
+            print(f"Paid {ids}: {result['signature']}")
+        else:
+            print(f"Error paying {ids}: {result['error']}")
+
+    results = TxExecutor(client, None).execute(packed, on_result=record)
+    invalidate(get_associated_token_address(Pubkey.from_string(wallets[swarm_id]), mint) for swarm_id in payers)
+    invalidate(receivers)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Settle weekly collaboration payments from hot wallets')
+    parser.add_argument('--week', help='ISO week (2025-W07) or a date in it, defaults to the current week')
+    parser.add_argument('--dry-run', action='store_true', help='Show the settlements without paying')
+    parser.add_argument('--retry-unresolved', action='store_true',
+                        help='Resend transfers that have no recorded outcome (check them on chain first)')
+    args = parser.parse_args()
+    week = parse_week(args.week) if args.week else iso_week()
+
+    log = PaymentLog()
+    settlements, retries, rejected, held, unresolved = plan_week(week, log, args.retry_unresolved)
+
+    payments = [c for s in settlements for c in s['collaborations']]
+    gross = sum(p['amount'] for p in payments)
+    net = sum(s['amount'] for s in settlements)
+    transfer_count = sum(len(s['transfers']) for s in settlements)
+    print(f"Week {week}: {len(payments)} payments totalling {format_amount(gross)} COMPUTE")
+    print(f"Netted into {len(settlements)} settlements, {format_amount(net)} COMPUTE in {transfer_count} transfers")
+    for settlement in settlements:
+        ids = ', '.join(str(c['collaborationId']) for c in settlement['collaborations'])
+        print(f"  {settlement['from']:<18} -> {settlement['to']:<18} {format_amount(settlement['amount']):>14} "
+              f"(collaborations {ids})")
+    for settlement, indices in retries:
+        print(f"  Retrying {len(indices)} transfers of {settlement['settlementId']}")
+    for settlement_id in unresolved:
+        print(f"  Unresolved: {settlement_id} has transfers without a recorded outcome")
+    for rejection in rejected:
+        print(f"  Rejected collaboration {rejection['collaborationId']}: {rejection['reason']}")
+    for settlement in held:
+        print(f"  Held {settlement['settlementId']}: {format_amount(settlement['amount'])} COMPUTE is above the "
+              f"{MAX_TX_AMOUNT:,} COMPUTE per-tx cap, needs manual approval")
+
+    if args.dry_run:
+        return
+
+    known = log.rejected(week)
+    new_rejections = [r for r in rejected if (r['collaborationId'], r['reason']) not in known]
+    if new_rejections:
+        log.append([{'event': 'rejected', 'week': week, **r} for r in new_rejections])
+    known = log.held(week)
+    new_held = [s for s in held if (s['settlementId'], s['amount']) not in known]
+    if new_held:
+        log.append([{'event': 'held', 'week': week, 'settlementId': s['settlementId'], 'from': s['from'],
+                     'to': s['to'], 'amount': s['amount'],
+                     'collaborations': [c['collaborationId'] for c in s['collaborations']]} for s in new_held])
+
+    if not settlements and not retries:
+        print("Nothing to pay")
+        return
+
+    helius_url = os.getenv('NEXT_PUBLIC_HELIUS_RPC_URL')
+    if not helius_url:
+        print("Error: NEXT_PUBLIC_HELIUS_RPC_URL not found in environment variables")
+        return
+
+    results = run_week(solana_rpc.Client(helius_url), week, log, settlements, retries)
+    confirmed = sum(len(r['labels']) for r in results if r['status'] == 'confirmed')
+    sent = sum(len(r['labels']) for r in results)
+    print(f"\n{confirmed}/{sent} transfers confirmed, log in {PAYMENTS_LOG}")
+
+if __name__ == "__main__":
+    main()
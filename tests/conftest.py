@@ -0,0 +1,18 @@
+import os
+import sys
+import importlib
+import pytest
+
+# The scripts import their siblings by name, as when run from scripts/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    pytest.importorskip('telegram')
+    pytest.importorskip('pyairtable')
+    # The watcher checks its Airtable settings and opens its log file on import
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('AIRTABLE_API_KEY', 'test-key')
+    monkeypatch.setenv('AIRTABLE_BASE_ID', 'test-base')
+    return importlib.import_module('watch_changes')
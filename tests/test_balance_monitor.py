@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip('solana')
+
+from distribution_engine import to_base_units
+from balance_monitor import plan_refills
+
+
+def balance(amount, exists=True):
+    return {'wallet': '11111111111111111111111111111111', 'amount': to_base_units(amount), 'exists': exists}
+
+
+def test_refills_above_the_per_tx_cap_are_held_not_split():
+    balances = {'full': balance(600_000), 'low': balance(400_000), 'empty': balance(0, exists=False)}
+    refills, held = plan_refills(balances, threshold=500_000, max_balance=1_400_000, max_tx_amount=1_000_000)
+
+    assert [(r['swarmId'], r['amount']) for r in refills] == [('low', to_base_units(1_000_000))]
+    assert [(r['swarmId'], r['amount'], r['createAccount']) for r in held] == [
+        ('empty', to_base_units(1_400_000), True)]
+    assert all('transfers' not in r for r in refills + held)
@@ -0,0 +1,83 @@
+import os
+import glob
+import json
+import importlib
+import pytest
+
+pytest.importorskip('anthropic')
+
+import anthropic_standin
+
+COLLABORATIONS = {
+    'collab-a': ('swarm-client-a', 'swarm-provider-a'),
+    'collab-b': ('swarm-client-b', 'swarm-provider-b'),
+    'collab-c': ('swarm-client-c', 'swarm-provider-c'),
+}
+
+
+@pytest.fixture
+def batch_generate(tmp_path, monkeypatch):
+    server = anthropic_standin.start_server(port=0, processing_delay=0.2)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('ANTHROPIC_BASE_URL', f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setenv('ANTHROPIC_API_KEY', 'test-key')
+    monkeypatch.delenv('MESSAGE_STORE', raising=False)
+    monkeypatch.delenv('LLM_CACHE', raising=False)
+    for directory in ('collaborations', 'messages', 'specifications'):
+        os.makedirs(f"data/{directory}")
+    for collab_id, (client_id, provider_id) in COLLABORATIONS.items():
+        with open(f"data/collaborations/{collab_id}.json", 'w', encoding='utf-8') as f:
+            json.dump({'collaborationId': collab_id, 'clientSwarmId': client_id, 'providerSwarmId': provider_id,
+                       'status': 'active', 'description': f"Work for {client_id}"}, f)
+    module = importlib.import_module('batch_generate')
+    yield module, server
+    server.shutdown()
+    server.server_close()
+
+
+def expected_text(job):
+    return anthropic_standin.fake_message(job['params'])['content'][0]['text']
+
+
+def load_all(pattern):
+    documents = []
+    for path in glob.glob(pattern):
+        with open(path, 'r', encoding='utf-8') as f:
+            documents.append(json.load(f))
+    return documents
+
+
+def test_specifications_are_written_for_their_own_collaboration(batch_generate):
+    module, server = batch_generate
+    jobs = module.build_specification_jobs(module.load_collaboration_ids('active'), 'API design')
+    assert [job['custom_id'] for job in jobs] == [f"spec-{c}" for c in sorted(COLLABORATIONS)]
+
+    written = module.run_batch(jobs, no_cache=True, poll_interval=0.05, commit=False)
+
+    assert len(written) == len(COLLABORATIONS)
+    batch, = server.state.batches.values()
+    assert [r['custom_id'] for r in batch['requests']] == [job['custom_id'] for job in jobs]
+    specs = {spec['collaborationId']: spec for spec in load_all('data/specifications/*.json')}
+    assert sorted(specs) == sorted(COLLABORATIONS)
+    # Results arrive in reverse order, so only custom_id matching puts each text in place
+    for job in jobs:
+        spec = specs[job['collaborationId']]
+        assert spec['title'] == 'API design'
+        assert spec['content'] == expected_text(job)
+    assert len({spec['content'] for spec in specs.values()}) == len(COLLABORATIONS)
+    assert not os.listdir(module.BATCH_STATE_DIR)
+
+
+def test_messages_are_written_between_the_collaboration_parties(batch_generate):
+    module, _ = batch_generate
+    jobs = module.build_conversation_jobs(['collab-b', 'collab-a'], 'Status update')
+
+    module.run_batch(jobs, no_cache=True, poll_interval=0.05, commit=False)
+
+    messages = {m['collaborationId']: m for m in load_all('data/messages/*.json')}
+    assert sorted(messages) == ['collab-a', 'collab-b']
+    for job in jobs:
+        message = messages[job['collaborationId']]
+        client_id, provider_id = COLLABORATIONS[job['collaborationId']]
+        assert (message['senderId'], message['receiverId']) == (provider_id, client_id)
+        assert message['content'] == expected_text(job)
@@ -0,0 +1,78 @@
+import random
+import pytest
+
+pytest.importorskip('numpy')
+
+import check_encoding
+
+TEXT = 'héllo “quoted” – 日本語 😀 done\n'.encode('utf-8')
+
+
+def scan(tmp_path, data, chunk_size=None, monkeypatch=None):
+    if chunk_size:
+        monkeypatch.setattr(check_encoding, 'CHUNK_SIZE', chunk_size)
+    path = tmp_path / 'sample.json'
+    path.write_bytes(data)
+    summary = check_encoding.scan_file(str(path), max_offsets=100)
+    del summary['path']
+    return summary
+
+
+def test_multibyte_sequences_split_across_chunks(tmp_path, monkeypatch):
+    data = TEXT * 3
+    whole = scan(tmp_path, data)
+    assert (whole['invalid'], whole['control'], whole['mojibake']) == (0, 0, 0)
+    assert whole['nonAscii'] == sum(1 for byte in data if byte >= 0xC0)
+    # Every chunk size puts a boundary inside some 2, 3 and 4-byte sequence
+    for chunk_size in range(1, 12):
+        assert scan(tmp_path, data, chunk_size, monkeypatch) == whole
+
+
+@pytest.mark.parametrize('data, offsets', [
+    (b'a\x80b', [1]),                     # continuation byte without a lead
+    (b'\xc0\xaf', [0]),                   # overlong '/'
+    (b'\xe0\x80\xaf', [0]),               # overlong 3-byte form
+    (b'\xed\xa0\x80', [0]),               # UTF-16 surrogate
+    (b'\xf4\x90\x80\x80', [0]),           # above U+10FFFF
+    (b'\xf8\x88\x80\x80\x80', [0, 4]),    # 5-byte form, read as a 4-byte lead
+    (b'ab\xe2\x82', [2]),                 # cut off by the end of the file
+    (b'\xe2\x82x', [2]),                  # cut off by the next character
+])
+def test_invalid_sequences(tmp_path, monkeypatch, data, offsets):
+    summary = scan(tmp_path, data)
+    assert summary['offsets'].get('invalid') == offsets
+    for chunk_size in range(1, len(data) + 1):
+        assert scan(tmp_path, data, chunk_size, monkeypatch) == summary
+
+
+def test_bom(tmp_path):
+    assert scan(tmp_path, b'\xef\xbb\xbf{}')['bom'] == 'utf-8'
+    assert scan(tmp_path, b'\xef\xbb\xbf{}')['invalid'] == 0
+    assert scan(tmp_path, b'\xff\xfe{\x00}\x00')['bom'] == 'utf-16-le'
+    assert scan(tmp_path, b'{}')['bom'] is None
+
+
+def test_controls_and_mojibake(tmp_path):
+    summary = scan(tmp_path, b'a\x01b\tc\r\nd\x7f' + '\x85'.encode('utf-8'))
+    assert summary['offsets']['control'] == [1, 8, 9]
+
+    # UTF-8 decoded as cp1252 and encoded again
+    doubled = ('café ’').encode('utf-8').decode('cp1252').encode('utf-8')
+    summary = scan(tmp_path, doubled)
+    assert summary['mojibake'] == 2 and summary['invalid'] == 0
+    assert scan(tmp_path, 'café ’ Ã'.encode('utf-8'))['mojibake'] == 0
+
+
+def test_agrees_with_the_python_decoder(tmp_path, monkeypatch):
+    pieces = [b'a', b'\n', b'\x80', b'\xbf', b'\xc2', b'\xc3\xa9', b'\xe2\x82\xac', b'\xed\x9f\xbf', b'\xed\xa0',
+              b'\xf0\x9f\x98\x80', b'\xf4\x8f\xbf\xbf', b'\xf4\x90', b'\xe0\xa0', b'\xe0\x9f', b'\xff']
+    rng = random.Random(46)
+    for _ in range(300):
+        data = b''.join(rng.choice(pieces) for _ in range(rng.randint(1, 12)))
+        try:
+            data.decode('utf-8')
+            valid = True
+        except UnicodeDecodeError:
+            valid = False
+        chunk_size = rng.randint(1, 8)
+        assert (scan(tmp_path, data, chunk_size, monkeypatch)['invalid'] == 0) == valid, data
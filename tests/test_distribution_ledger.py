@@ -0,0 +1,62 @@
+import os
+import json
+
+from distribution_engine import COMPUTE_DECIMALS
+from distribution_ledger import DistributionLedger
+
+
+def distribution(week, provider, collaboration, net):
+    return {'type': 'distribution', 'week': week, 'providerSwarmId': provider,
+            'collaborationId': collaboration, 'net': net}
+
+
+def write_ledger(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
+
+
+def test_cache_is_rebuilt_when_the_covered_prefix_changes(tmp_path):
+    path, cache_path = str(tmp_path / 'distributions.jsonl'), str(tmp_path / 'revenue.json')
+    write_ledger(path, [distribution('2025-W07', 'alpha', 'c1', 100)])
+    assert DistributionLedger(path, cache_path).total_revenue('alpha') == 100
+
+    # Same length and a longer tail, so only the prefix hash can tell
+    write_ledger(path, [distribution('2025-W07', 'alpha', 'c1', 200),
+                        distribution('2025-W08', 'alpha', 'c2', 5)])
+    ledger = DistributionLedger(path, cache_path)
+    assert ledger.total_revenue('alpha') == 205
+    assert ledger.weekly_revenue('alpha', '2025-W07') == 200
+
+
+def test_cache_resumes_after_appends(tmp_path):
+    path, cache_path = str(tmp_path / 'distributions.jsonl'), str(tmp_path / 'revenue.json')
+    write_ledger(path, [distribution('2025-W07', 'alpha', 'c1', 100)])
+    DistributionLedger(path, cache_path)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(distribution('2025-W08', 'alpha', 'c1', 50)) + '\n')
+
+    ledger = DistributionLedger(path, cache_path)
+    assert ledger.total_revenue('alpha') == 150
+    assert ledger.is_recorded('2025-W08', 'alpha')
+    with open(cache_path, encoding='utf-8') as f:
+        assert json.load(f)['offset'] == os.path.getsize(path)
+
+
+def test_swarm_fields_are_whole_tokens(tmp_path):
+    path, cache_path = str(tmp_path / 'distributions.jsonl'), str(tmp_path / 'revenue.json')
+    # 1.5 and 2.75 $COMPUTE in base units: the fractions add up to one more whole token
+    whole = 10 ** COMPUTE_DECIMALS
+    write_ledger(path, [distribution('2025-W07', 'alpha', 'c1', whole * 3 // 2),
+                        distribution('2025-W08', 'alpha', 'c1', whole * 11 // 4)])
+    fields = DistributionLedger(path, cache_path).swarm_fields('alpha', '2025-W08')
+    assert fields == {'weeklyRevenue': 2, 'totalRevenue': 4}
+    assert all(type(value) is int for value in fields.values())
+
+
+def test_recorded_weeks_survive_the_cache(tmp_path):
+    path, cache_path = str(tmp_path / 'distributions.jsonl'), str(tmp_path / 'revenue.json')
+    write_ledger(path, [distribution('2025-W07', 'alpha', 'c1', 100), distribution('2025-W07', 'beta', 'c2', 50)])
+    for ledger in (DistributionLedger(path, cache_path), DistributionLedger(path, cache_path)):
+        assert ledger.is_recorded('2025-W07', 'alpha') and ledger.is_recorded('2025-W07', 'beta')
+        assert not ledger.is_recorded('2025-W08', 'alpha')
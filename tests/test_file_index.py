@@ -0,0 +1,55 @@
+import os
+import json
+import time
+import pytest
+
+import file_index
+from file_index import FileIndex
+
+
+@pytest.fixture
+def news(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(file_index, 'INDEX_DIR', tmp_path / 'cache' / 'index')
+    os.makedirs('data/news')
+    for i, day in enumerate(['2025-01-03', '2025-01-01', '2025-01-05', '2025-01-02', '2025-01-05']):
+        write(f"n{i}", day)
+    return tmp_path
+
+
+def write(name, day):
+    with open(f"data/news/{name}.json", 'w', encoding='utf-8') as f:
+        json.dump({'newsId': name, 'date': day}, f)
+
+
+def test_top_k_orders_by_field_then_path(news):
+    index = FileIndex('data/news', ['date']).refresh()
+    assert index.top_k('date', 3) == ['data/news/n4.json', 'data/news/n2.json', 'data/news/n0.json']
+    assert index.top_k('date', 2, reverse=False) == ['data/news/n1.json', 'data/news/n3.json']
+    assert index.top_k('date', 0) == []
+    assert len(index.sorted_paths('date')) == 5
+
+
+def test_top_k_follows_file_events(news):
+    index = FileIndex('data/news', ['date']).refresh()
+    assert index.top_k('date', 1) == ['data/news/n4.json']
+
+    time.sleep(0.05)
+    write('n1', '2025-02-01')
+    os.utime('data/news/n1.json', (time.time() + 5, time.time() + 5))
+    index.update_file('data/news/n1.json')
+    os.remove('data/news/n4.json')
+    index.remove_file('data/news/n4.json')
+
+    assert index.top_k('date', 2) == ['data/news/n1.json', 'data/news/n2.json']
+    assert index.sorted_paths('date') == FileIndex('data/news', ['date']).refresh(full=True).sorted_paths('date')
+
+
+def test_refresh_sees_files_rewritten_in_place(news):
+    FileIndex('data/news', ['date']).refresh()
+    dir_mtime = os.stat('data/news').st_mtime
+    write('n1', '2025-03-01')
+    os.utime('data/news/n1.json', (time.time() + 5, time.time() + 5))
+    os.utime('data/news', (dir_mtime, dir_mtime))
+
+    assert FileIndex('data/news', ['date']).refresh().top_k('date', 1) == ['data/news/n1.json']
@@ -0,0 +1,40 @@
+import os
+import glob
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip('tkinter')
+
+import gui
+
+
+def test_only_the_newest_session_logs_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(gui, 'OUTPUT_LOG_DIR', str(tmp_path))
+    names = [f"session_20250101_00000{i}.log" for i in range(5)]
+    for name in names:
+        (tmp_path / name).write_text(name)
+    (tmp_path / 'notes.txt').write_text('not a session log')
+
+    gui.prune_output_logs(2)
+
+    assert sorted(os.listdir(tmp_path)) == ['notes.txt'] + names[3:]
+
+
+def test_cleared_output_is_not_saved(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    log_path = str(tmp_path / 'session.log')
+    console = SimpleNamespace(delete=lambda *args: None)
+    window = SimpleNamespace(output_text=console, output_log_path=log_path, output_log_start=0,
+                             output_log=open(log_path, 'a', encoding='utf-8'),
+                             status_var=SimpleNamespace(set=lambda text: None))
+    try:
+        window.output_log.write('before clear\n')
+        gui.ScriptGUI.clear_output(window)
+        window.output_log.write('after clear é\n')
+        gui.ScriptGUI.save_output(window)
+    finally:
+        window.output_log.close()
+
+    saved, = glob.glob('output_*.log')
+    with open(saved, encoding='utf-8') as f:
+        assert f.read() == 'after clear é\n'
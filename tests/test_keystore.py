@@ -0,0 +1,58 @@
+import os
+import time
+import threading
+import pytest
+
+pytest.importorskip('cryptography')
+
+import keystore
+
+if not keystore.agent_supported():
+    pytest.skip('the key agent needs Unix sockets', allow_module_level=True)
+
+
+@pytest.fixture
+def secrets(monkeypatch):
+    monkeypatch.setenv('WALLET_SALT', 'salt')
+    monkeypatch.setenv('WALLET_SECRET_1', 'first')
+    monkeypatch.setenv('WALLET_SECRET_2', 'second')
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch, secrets):
+    socket_dir = tmp_path / 'run'
+    monkeypatch.setattr(keystore, 'AGENT_SOCKET', str(socket_dir / 'agent.sock'))
+    monkeypatch.setattr(keystore, 'AGENT_MODE', 'on')
+    thread = threading.Thread(target=keystore.run_agent, args=(30,), daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            keystore._request(b'PING')
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield socket_dir
+    try:
+        keystore._request(b'STOP')
+    except OSError:
+        pass
+    thread.join(5)
+
+
+def test_agent_serves_the_derived_key_from_a_private_directory(agent):
+    assert oct(os.stat(agent).st_mode & 0o777) == '0o700'
+    assert keystore.key_from_agent() == keystore.derive_key()
+
+
+def test_agent_key_is_refused_when_the_secrets_differ(agent, monkeypatch):
+    monkeypatch.setenv('WALLET_SECRET_2', 'rotated')
+    assert keystore.key_from_agent() is None
+
+
+def test_agent_key_is_refused_from_a_shared_directory(agent):
+    os.chmod(agent, 0o755)
+    try:
+        assert keystore.key_from_agent() is None
+    finally:
+        os.chmod(agent, 0o700)
@@ -0,0 +1,49 @@
+import os
+import time
+import pytest
+
+import llm_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, 'CACHE_DIR', tmp_path / 'llm')
+    monkeypatch.setattr(llm_cache, 'CACHE_TTL', 3600)
+    monkeypatch.setattr(llm_cache, '_puts_since_evict', 0)
+    return llm_cache
+
+
+def age(path, stored_ago, used_ago):
+    now = time.time()
+    os.utime(path, (now - used_ago, now - stored_ago))
+
+
+def test_ttl_counts_from_storage_even_for_entries_in_use(cache):
+    cache.put_cached('aa01', 'old')
+    cache.put_cached('aa02', 'fresh')
+    age(cache._entry_path('aa01'), stored_ago=7200, used_ago=0)
+
+    assert cache.get_cached('aa01') is None
+    assert not cache._entry_path('aa01').exists()
+    # A hit marks the entry used without extending its life
+    stored = cache._entry_path('aa02').stat().st_mtime
+    assert cache.get_cached('aa02') == 'fresh'
+    assert cache._entry_path('aa02').stat().st_mtime == stored
+
+
+def test_eviction_runs_every_interval_and_drops_least_recently_used(cache, monkeypatch):
+    monkeypatch.setattr(cache, 'EVICT_INTERVAL', 3)
+    monkeypatch.setattr(cache, 'CACHE_MAX_BYTES', 1)
+    scans = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, 'evict', lambda: scans.append(evict()))
+
+    for i in range(5):
+        cache.put_cached(f"bb{i:02d}", 'x' * 10)
+    assert len(scans) == 1
+    assert sorted(p.stem for p in cache.CACHE_DIR.glob('*/*.json')) == ['bb03', 'bb04']
+
+    for key, used_ago in (('bb03', 10), ('bb04', 100)):
+        age(cache._entry_path(key), stored_ago=100, used_ago=used_ago)
+    assert evict(max_bytes=cache._entry_path('bb03').stat().st_size) == 1
+    assert [p.stem for p in cache.CACHE_DIR.glob('*/*.json')] == ['bb03']
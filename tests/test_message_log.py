@@ -0,0 +1,77 @@
+import os
+import json
+import time
+import pytest
+
+from message_log import MessageLog
+
+
+@pytest.fixture
+def messages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data/messages')
+    return tmp_path
+
+
+def write_message(message_id, collaboration_id, content, timestamp):
+    with open(f"data/messages/{message_id}.json", 'w', encoding='utf-8') as f:
+        json.dump({'messageId': message_id, 'collaborationId': collaboration_id, 'senderId': 'alpha',
+                   'content': content, 'timestamp': timestamp}, f)
+
+
+def contents(messages):
+    return [message['content'] for message in messages]
+
+
+def test_first_read_imports_existing_messages(messages):
+    write_message('m1', 'c1', 'hello', '2025-01-01T00:00:00Z')
+    write_message('m2', 'c1', 'again', '2025-01-02T00:00:00Z')
+    write_message('m3', 'c2', 'elsewhere', '2025-01-01T00:00:00Z')
+
+    assert contents(MessageLog('cache/message_log').sync().read_collaboration('c1')) == ['hello', 'again']
+
+
+def test_sync_picks_up_new_and_deleted_files(messages):
+    write_message('m1', 'c1', 'hello', '2025-01-01T00:00:00Z')
+    write_message('m2', 'c1', 'again', '2025-01-02T00:00:00Z')
+    MessageLog('cache/message_log').sync()
+
+    os.remove('data/messages/m1.json')
+    write_message('m3', 'c1', 'later', '2025-01-03T00:00:00Z')
+    log = MessageLog('cache/message_log').sync()
+    assert contents(log.read_collaboration('c1')) == ['again', 'later']
+    assert log.get('m1') is None
+
+
+def test_renamed_file_keeps_its_message(messages):
+    write_message('m1', 'c1', 'hello', '2025-01-01T00:00:00Z')
+    log = MessageLog('cache/message_log').sync()
+
+    os.rename('data/messages/m1.json', 'data/messages/renamed.json')
+    log.sync()
+    assert contents(log.read_collaboration('c1')) == ['hello']
+
+
+def test_sync_picks_up_files_rewritten_in_place(messages):
+    write_message('m1', 'c1', 'hello', '2025-01-01T00:00:00Z')
+    log = MessageLog('cache/message_log').sync()
+    dir_mtime = os.stat('data/messages').st_mtime
+
+    write_message('m1', 'c1', 'edited', '2025-01-01T00:00:00Z')
+    os.utime('data/messages/m1.json', (time.time() + 5, time.time() + 5))
+    os.utime('data/messages', (dir_mtime, dir_mtime))
+    assert contents(log.sync().read_collaboration('c1')) == ['edited']
+
+
+def test_writers_keep_each_others_entries(messages):
+    write_message('m1', 'c1', 'hello', '2025-01-01T00:00:00Z')
+    write_message('m2', 'c1', 'again', '2025-01-02T00:00:00Z')
+    # Both loaded before either writes, as in the watcher and a generator
+    watcher, generator = MessageLog('cache/message_log'), MessageLog('cache/message_log')
+    for log, message_id in ((watcher, 'm1'), (generator, 'm2')):
+        with open(f"data/messages/{message_id}.json", encoding='utf-8') as f:
+            log.append_file(f"data/messages/{message_id}.json", json.load(f))
+
+    log = MessageLog('cache/message_log')
+    assert sorted(log.index) == ['m1', 'm2']
+    assert sorted(log.sources) == ['m1.json', 'm2.json']
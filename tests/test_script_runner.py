@@ -0,0 +1,35 @@
+import os
+import sys
+import queue
+import pytest
+
+import script_runner
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(script_runner, '_context', None)
+    script = tmp_path / 'show_index_dir.py'
+    script.write_text("import file_index\nprint(file_index.INDEX_DIR, id(file_index))\n")
+    saved = {name: sys.modules[name] for name, _ in script_runner._script_modules()}
+
+    def run(**env):
+        events = queue.Queue()
+        code = script_runner._run(1, str(script), [], events, {**os.environ, **env})
+        output = ''
+        while not events.empty():
+            output += events.get()[2]
+        assert code == 0
+        return output.split()
+
+    yield run
+    sys.modules.update(saved)
+
+
+def test_sibling_modules_stay_warm_until_the_environment_changes(run):
+    first = run(FILE_INDEX_DIR='cache/one')
+    assert run(FILE_INDEX_DIR='cache/one') == first
+    # Module constants follow the new environment instead of keeping the first run's
+    second = run(FILE_INDEX_DIR='cache/two')
+    assert second[0] == 'cache/two' and second[1] != first[1]
@@ -0,0 +1,55 @@
+import os
+import json
+import time
+import pytest
+
+import search_index
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for directory in ('collaborations', 'messages'):
+        os.makedirs(f"data/{directory}")
+    write('data/collaborations/c1.json', {'collaborationId': 'c1', 'clientSwarmId': 'alpha',
+                                          'providerSwarmId': 'beta'})
+    write('data/messages/m1.json', {'messageId': 'm1', 'collaborationId': 'c1', 'senderId': 'beta',
+                                    'content': 'rocket telemetry', 'timestamp': '2025-01-01T00:00:00Z'})
+    return tmp_path
+
+
+def write(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def build():
+    return search_index.build_index(db_path='cache/search.db')
+
+
+def test_collaboration_parties_follow_edits(data):
+    assert search_index.load_collaboration_parties() == {'c1': ['alpha', 'beta']}
+    time.sleep(0.05)
+    write('data/collaborations/c1.json', {'collaborationId': 'c1', 'clientSwarmId': 'gamma',
+                                          'providerSwarmId': 'beta'})
+    os.utime('data/collaborations/c1.json', (time.time() + 5, time.time() + 5))
+    assert search_index.load_collaboration_parties() == {'c1': ['gamma', 'beta']}
+
+
+def test_unreadable_files_are_skipped_until_they_change(data, capsys):
+    with open('data/messages/broken.json', 'w', encoding='utf-8') as f:
+        f.write('{"messageId": ')
+    assert build() == (1, 0)
+    assert 'broken.json' in capsys.readouterr().out
+
+    assert build() == (0, 0)
+    assert 'broken.json' not in capsys.readouterr().out
+
+    write('data/messages/broken.json', {'messageId': 'm2', 'collaborationId': 'c1', 'senderId': 'alpha',
+                                        'content': 'fixed now', 'timestamp': '2025-01-02T00:00:00Z'})
+    os.utime('data/messages/broken.json', (time.time() + 5, time.time() + 5))
+    assert build() == (1, 0)
+    conn = search_index.connect('cache/search.db')
+    assert conn.execute("SELECT COUNT(*) FROM failed").fetchone()[0] == 0
+    assert conn.execute("SELECT swarms FROM docs WHERE doc_id = 'm2'").fetchone()[0] == ' alpha beta '
+    conn.close()
@@ -0,0 +1,58 @@
+import os
+import json
+import time
+from types import SimpleNamespace
+import pytest
+
+import summary_store
+
+
+class FakeClient:
+    def __init__(self):
+        self.prompts = []
+        self.messages = self
+
+    def create(self, **params):
+        self.prompts.append(params['messages'][0]['content'])
+        return SimpleNamespace(content=[SimpleNamespace(text=f"summary {len(self.prompts)}")])
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('LLM_CACHE', raising=False)
+    monkeypatch.setattr(summary_store, 'SUMMARY_DIR', 'cache/summaries')
+    monkeypatch.setattr(summary_store, 'RECAP_STATE_FILE', 'cache/summaries/recaps.json')
+    os.makedirs('data/messages')
+    write_message('m1', 'first draft', '2025-01-01T09:00:00Z')
+    write_message('m2', 'looks good', '2025-01-01T10:00:00Z')
+    return summary_store
+
+
+def write_message(message_id, content, timestamp):
+    with open(f"data/messages/{message_id}.json", 'w', encoding='utf-8') as f:
+        json.dump({'messageId': message_id, 'collaborationId': 'c1', 'senderId': 'alpha', 'receiverId': 'beta',
+                   'content': content, 'timestamp': timestamp}, f)
+
+
+def summarize(store, client):
+    return store.daily_summaries(client, {'alpha'}, '2025-01-01', '2025-01-01')
+
+
+def test_edited_messages_make_the_summary_stale(store):
+    client = FakeClient()
+    assert [s['summary'] for s in summarize(store, client)] == ['summary 1']
+    assert [s['summary'] for s in summarize(store, client)] == ['summary 1']
+
+    # Same message count, new content
+    write_message('m2', 'needs another pass', '2025-01-01T10:00:00Z')
+    os.utime('data/messages/m2.json', (time.time() + 5, time.time() + 5))
+    assert [s['summary'] for s in summarize(store, client)] == ['summary 2']
+    assert 'needs another pass' in client.prompts[-1]
+    assert not [name for name in os.listdir('cache/summaries/collab-c1') if name.endswith('.tmp')]
+
+
+def test_last_recap_round_trips(store):
+    assert store.get_last_recap({'alpha', 'beta'}) is None
+    store.set_last_recap({'beta', 'alpha'}, '2025-01-02T00:00:00Z')
+    assert store.get_last_recap({'alpha', 'beta'}) == '2025-01-02T00:00:00Z'
@@ -0,0 +1,65 @@
+import json
+import asyncio
+import urllib.request
+import pytest
+
+pytest.importorskip('telegram')
+pytest.importorskip('pyairtable')
+
+from telegram import Bot
+import metrics
+import telegram_standin
+
+TOKEN = '123456:standin-token'
+CHATS = (-1001, 2002)
+
+
+@pytest.fixture
+def standin():
+    server = telegram_standin.start_server(port=0)
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def retries():
+    return metrics.REGISTRY.counters.get(('watch_telegram_retries_total', ()), 0)
+
+
+def sent_texts(base_url, chat_id):
+    with urllib.request.urlopen(f"{base_url}/_messages?chat_id={chat_id}") as response:
+        return [message['text'] for message in json.load(response)]
+
+
+def test_burst_waits_out_flood_control_in_order(watcher, standin):
+    server, base_url = standin
+    before = retries()
+
+    async def burst(bot, chat_id):
+        for i in range(3):
+            await watcher.send_with_retry(bot, chat_id, f"{chat_id} message {i}")
+
+    async def main():
+        async with Bot(TOKEN, base_url=f"{base_url}/bot") as bot:
+            await asyncio.gather(*(burst(bot, chat_id) for chat_id in CHATS))
+
+    asyncio.run(main())
+
+    for chat_id in CHATS:
+        assert sent_texts(base_url, chat_id) == [f"{chat_id} message {i}" for i in range(3)]
+    # One message per second per chat: the 2nd and 3rd of each burst are throttled once
+    assert server.state.stats['throttled'] == 4
+    assert retries() - before == 4
+
+
+def test_gives_up_after_the_last_attempt(watcher, standin):
+    server, base_url = standin
+
+    async def main():
+        async with Bot(TOKEN, base_url=f"{base_url}/bot") as bot:
+            await watcher.send_with_retry(bot, CHATS[1], 'first')
+            with pytest.raises(watcher.telegram_error.RetryAfter):
+                await watcher.send_with_retry(bot, CHATS[1], 'second', attempts=1)
+
+    asyncio.run(main())
+    assert sent_texts(base_url, CHATS[1]) == ['first']
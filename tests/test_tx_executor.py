@@ -0,0 +1,76 @@
+import pytest
+
+pytest.importorskip('solana')
+
+from solana.rpc.api import Client
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+import rpc_standin
+from tx_packer import pack_instructions, transfer_checked_ix, TRANSFER_UNITS
+from tx_executor import TxExecutor
+
+MINT = Pubkey.from_string('So11111111111111111111111111111111111111112')
+
+
+def chain(**options):
+    server = rpc_standin.start_server(port=0, **options)
+    client = Client(f"http://127.0.0.1:{server.server_address[1]}")
+    return server, client
+
+
+def transfer_plans(state, payer, count, amount=1000):
+    recipients = [Keypair().pubkey() for _ in range(count)]
+    state.set_token_balance(str(payer.pubkey()), str(MINT), amount * count)
+    for recipient in recipients:
+        state.set_token_balance(str(recipient), str(MINT), 0)
+    # One transfer per transaction, so every transaction is its own payment
+    items = [(transfer_checked_ix(payer.pubkey(), r, MINT, amount, 6), TRANSFER_UNITS, str(r), amount)
+             for r in recipients]
+    return recipients, pack_instructions(payer.pubkey(), items, max_amount=amount)
+
+
+def balances(state, owners):
+    address = {rpc_standin.associated_token_address(str(o), str(MINT)): str(o) for o in owners}
+    return {address[a]: account['amount'] for a, account in state.accounts.items() if a in address}
+
+
+def test_lost_send_replies_are_not_paid_twice():
+    server, client = chain(slot_time=0.02, confirm_delay=0.2, lose_reply_every=1)
+    try:
+        payer = Keypair()
+        recipients, plans = transfer_plans(server.state, payer, 6)
+        # A fresh blockhash per signing, so a re-signed transfer would get a new signature
+        results = TxExecutor(client, payer, poll_interval=0.1, blockhash_refresh=0).execute(plans)
+        assert [r['status'] for r in results] == ['confirmed'] * 6
+        assert all(r['attempts'] == 1 for r in results)
+        assert set(balances(server.state, recipients).values()) == {1000}
+    finally:
+        server.shutdown()
+
+
+def test_processed_transaction_outliving_its_blockhash_is_not_resigned():
+    # 150 blocks of 5 ms expire the blockhash long before the 2 s confirmation
+    server, client = chain(slot_time=0.005, confirm_delay=2.0)
+    try:
+        payer = Keypair()
+        recipients, plans = transfer_plans(server.state, payer, 3)
+        results = TxExecutor(client, payer, poll_interval=0.1, blockhash_refresh=0.05).execute(plans)
+        assert [r['status'] for r in results] == ['confirmed'] * 3
+        assert all(r['attempts'] == 1 for r in results)
+        assert set(balances(server.state, recipients).values()) == {1000}
+    finally:
+        server.shutdown()
+
+
+def test_dropped_transaction_is_resigned_after_expiry():
+    server, client = chain(slot_time=0.005, confirm_delay=0.1, drop_every=2)
+    try:
+        payer = Keypair()
+        recipients, plans = transfer_plans(server.state, payer, 4)
+        results = TxExecutor(client, payer, poll_interval=0.1, blockhash_refresh=0.05,
+                             rebroadcast_interval=60).execute(plans)
+        assert [r['status'] for r in results] == ['confirmed'] * 4
+        assert max(r['attempts'] for r in results) >= 2
+        assert set(balances(server.state, recipients).values()) == {1000}
+    finally:
+        server.shutdown()
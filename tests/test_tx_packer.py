@@ -0,0 +1,106 @@
+import os
+import json
+import pytest
+
+pytest.importorskip('solana')
+
+from solana.rpc.api import Client
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from spl.token.instructions import get_associated_token_address
+import rpc_standin
+from tx_packer import (pack_instructions, create_ata_idempotent_ix, transfer_checked_ix, transaction_size,
+                       plan_token_accounts, MAX_TX_SIZE, MAX_COMPUTE_UNITS, CREATE_ATA_UNITS, TRANSFER_UNITS)
+
+MINT = Pubkey.from_string('So11111111111111111111111111111111111111112')
+
+
+def create_items(payer, count, mint=MINT):
+    owners = [Keypair().pubkey() for _ in range(count)]
+    return [(create_ata_idempotent_ix(payer, owner, mint), CREATE_ATA_UNITS, str(owner)) for owner in owners]
+
+
+def test_packs_up_to_the_transaction_size_limit():
+    payer = Keypair().pubkey()
+    items = create_items(payer, 40)
+    packed = pack_instructions(payer, items)
+
+    assert len(packed) > 1
+    assert [label for tx in packed for label in tx['labels']] == [item[2] for item in items]
+    for tx in packed:
+        assert tx['size'] == transaction_size(payer, tx['instructions']) <= MAX_TX_SIZE
+        assert tx['computeUnits'] == CREATE_ATA_UNITS * len(tx['labels'])
+    # Greedy: every transaction but the last would overflow with the next item in it
+    position = 0
+    for tx in packed[:-1]:
+        position += len(tx['labels'])
+        assert transaction_size(payer, tx['instructions'] + [items[position][0]]) > MAX_TX_SIZE
+
+
+def test_splits_on_compute_units_before_size():
+    payer = Keypair().pubkey()
+    items = [(ix, 600_000, label) for ix, _, label in create_items(payer, 5)]
+    packed = pack_instructions(payer, items)
+
+    assert [len(tx['labels']) for tx in packed] == [2, 2, 1]
+    assert all(tx['computeUnits'] <= MAX_COMPUTE_UNITS for tx in packed)
+
+
+def test_amount_cap_and_instruction_groups():
+    payer = Keypair().pubkey()
+    owners = [Keypair().pubkey() for _ in range(4)]
+    # Each item creates an account and funds it, the two must share a transaction
+    items = [([create_ata_idempotent_ix(payer, owner, MINT), transfer_checked_ix(payer, owner, MINT, 400, 6)],
+              CREATE_ATA_UNITS + TRANSFER_UNITS, str(owner), 400) for owner in owners]
+    packed = pack_instructions(payer, items, max_amount=1000)
+
+    assert [tx['amount'] for tx in packed] == [800, 800]
+    for tx in packed:
+        # Compute budget, then a create and a transfer per item
+        assert len(tx['instructions']) == 1 + 2 * len(tx['labels'])
+    with pytest.raises(ValueError):
+        pack_instructions(payer, items, max_amount=300)
+
+
+def test_item_too_large_for_any_transaction():
+    payer = Keypair().pubkey()
+    group = [ix for ix, _, _ in create_items(payer, 30)]
+    with pytest.raises(ValueError):
+        pack_instructions(payer, [(group, CREATE_ATA_UNITS * 30, 'everything')])
+
+
+def test_create_token_accounts_against_the_standin(tmp_path, monkeypatch):
+    server = rpc_standin.start_server(port=0, slot_time=0.02, confirm_delay=0.1)
+    try:
+        import create_token_accounts
+        treasury = Keypair()
+        owners = [Keypair().pubkey() for _ in range(15)]
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('NEXT_PUBLIC_HELIUS_RPC_URL', f"http://127.0.0.1:{server.server_address[1]}")
+        monkeypatch.setattr(create_token_accounts, 'load_treasury_wallet', lambda: treasury)
+        os.makedirs('data/swarms')
+        for i, owner in enumerate(owners):
+            with open(f"data/swarms/swarm-{i}.json", 'w', encoding='utf-8') as f:
+                json.dump({'swarmId': f"swarm-{i}", 'hotWallet': str(owner)}, f)
+        mints = [create_token_accounts.COMPUTE_TOKEN, create_token_accounts.UBC_TOKEN]
+        # One account exists already and must be left alone
+        server.state.set_token_balance(str(owners[0]), mints[0], 5)
+
+        create_token_accounts.create_token_accounts()
+
+        expected = {str(get_associated_token_address(owner, Pubkey.from_string(mint)))
+                    for owner in owners for mint in mints}
+        assert expected <= set(server.state.accounts)
+        assert server.state.accounts[rpc_standin.associated_token_address(str(owners[0]), mints[0])]['amount'] == 5
+        # 29 creates need several transactions, but far fewer than one each
+        sends = server.state.requests['sendTransaction']
+        assert 1 < sends < 29
+
+        create_token_accounts.create_token_accounts()
+        assert server.state.requests['sendTransaction'] == sends
+
+        items, existing = plan_token_accounts(Client(f"http://127.0.0.1:{server.server_address[1]}"),
+                                              treasury.pubkey(), owners, [Pubkey.from_string(m) for m in mints])
+        assert (items, existing) == ([], 30)
+    finally:
+        server.shutdown()
@@ -0,0 +1,50 @@
+import os
+import json
+import pytest
+
+pytest.importorskip('numpy')
+
+import vector_index
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(vector_index, 'EMBEDDING_MODEL', None)
+    monkeypatch.setattr(vector_index, '_index', None)
+    for directory in vector_index.SOURCES:
+        os.makedirs(directory)
+    return tmp_path
+
+
+def write_message(message_id, collaboration_id, content):
+    with open(f"data/messages/{message_id}.json", 'w', encoding='utf-8') as f:
+        json.dump({'messageId': message_id, 'collaborationId': collaboration_id, 'content': content}, f)
+
+
+def ids(chunks):
+    return [chunk['id'] for chunk in chunks]
+
+
+def test_messages_written_after_the_build_are_retrieved(data):
+    for i in range(6):
+        write_message(f"m{i}", 'c1' if i % 2 else 'c2', f"rocket fuel note {i}")
+    vector_index.VectorIndex(vector_index.VECTOR_DIR).build()
+    assert vector_index.relevant_chunks('rocket fuel', collaboration_id='c1', k=10) is not None
+
+    write_message('late', 'c1', 'zebra stripes and bananas')
+    assert ids(vector_index.relevant_chunks('zebra bananas', collaboration_id='c1', k=1)) == ['late']
+
+
+def test_filters_and_watcher_events(data):
+    for i in range(6):
+        write_message(f"m{i}", 'c1' if i % 2 else 'c2', f"rocket fuel note {i}")
+    vector_index.VectorIndex(vector_index.VECTOR_DIR).build()
+
+    hits = vector_index.relevant_chunks('rocket fuel', collaboration_id='c1', k=10, kinds=['messages'],
+                                        exclude=lambda chunk: chunk['id'] == 'm1')
+    assert sorted(ids(hits)) == ['m3', 'm5']
+
+    os.remove('data/messages/m3.json')
+    vector_index.note_file_event('data/messages/m3.json', deleted=True)
+    assert 'data/messages/m3.json' not in vector_index.VectorIndex(vector_index.VECTOR_DIR).files
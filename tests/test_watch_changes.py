@@ -0,0 +1,71 @@
+import os
+import json
+import time
+import subprocess
+
+from message_log import MessageLog
+
+
+def test_processed_messages_follow_edits_and_stay_bounded(watcher, monkeypatch):
+    handler = watcher.RepositoryChangeHandler()
+    os.makedirs('data/messages')
+    path = 'data/messages/m1.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{}')
+
+    first = handler._message_key(path)
+    handler._remember_message(first)
+    assert handler._message_key(path) in handler.processed_messages
+    # An edit gives the file a new mtime, so the new version is not a duplicate
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    assert handler._message_key(path) not in handler.processed_messages
+
+    monkeypatch.setattr(watcher, 'PROCESSED_MESSAGES_LIMIT', 3)
+    for i in range(5):
+        handler._remember_message((f"data/messages/m{i + 2}.json", 1.0))
+    assert list(handler.processed_messages) == [(f"data/messages/m{i}.json", 1.0) for i in (4, 5, 6)]
+    handler.loop.close()
+
+
+def test_deleted_message_leaves_the_lru_and_the_message_log(watcher, monkeypatch):
+    monkeypatch.setenv('MESSAGE_STORE', 'log')
+    handler = watcher.RepositoryChangeHandler()
+    os.makedirs('data/messages')
+    path = 'data/messages/m1.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'messageId': 'm1', 'collaborationId': 'c1', 'senderId': 'alpha', 'content': 'hi'}, f)
+    with open(path, encoding='utf-8') as f:
+        handler.message_log.append_file(path, json.load(f))
+    handler._remember_message(handler._message_key(path))
+
+    os.remove(path)
+    handler.loop.run_until_complete(handler._process_file_event('deleted', path))
+    handler.loop.close()
+
+    assert not handler.processed_messages
+    assert handler.message_log.get('m1') is None
+    assert MessageLog().get('m1') is None
+
+
+def test_deletions_come_from_the_latest_commit(watcher):
+    def git(*args):
+        subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args], check=True, capture_output=True)
+
+    git('init', '-q')
+    os.makedirs('data/messages')
+    for name in ('m1', 'm2'):
+        with open(f"data/messages/{name}.json", 'w', encoding='utf-8') as f:
+            f.write('{}')
+    git('add', '-A')
+    git('commit', '-q', '-m', 'add')
+    os.remove('data/messages/m1.json')
+    with open('data/messages/m2.json', 'w', encoding='utf-8') as f:
+        f.write('{"edited": true}')
+    with open('data/messages/m3.json', 'w', encoding='utf-8') as f:
+        f.write('{}')
+    git('add', '-A')
+    git('commit', '-q', '-m', 'change')
+
+    assert sorted(watcher.get_latest_changes()) == [('created', 'data/messages/m3.json'),
+                                                    ('deleted', 'data/messages/m1.json'),
+                                                    ('modified', 'data/messages/m2.json')]
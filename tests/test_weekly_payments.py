@@ -0,0 +1,81 @@
+import os
+import json
+import pytest
+
+pytest.importorskip('solana')
+
+from solana.rpc.api import Client
+from solders.keypair import Keypair
+import rpc_standin
+import weekly_payments
+from distribution_engine import to_base_units
+
+WEEK = '2025-W07'
+
+
+@pytest.fixture
+def swarms(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for directory in ('collaborations', 'swarms'):
+        os.makedirs(f"data/{directory}")
+    keys = {swarm_id: Keypair() for swarm_id in ('alpha', 'beta', 'gamma')}
+    for swarm_id, keypair in keys.items():
+        write(f"data/swarms/{swarm_id}.json", {'swarmId': swarm_id, 'hotWallet': str(keypair.pubkey())})
+    monkeypatch.setattr(weekly_payments, 'load_hot_wallet', lambda swarm_id: keys[swarm_id])
+    return keys
+
+
+def write(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def collaboration(collab_id, client, provider, price, status='active'):
+    write(f"data/collaborations/{collab_id}.json", {'collaborationId': collab_id, 'clientSwarmId': client,
+                                                    'providerSwarmId': provider, 'status': status, 'price': price})
+
+
+def test_settlements_above_the_cap_are_held_not_split():
+    payments = [{'collaborationId': 'c1', 'clientSwarmId': 'alpha', 'providerSwarmId': 'beta', 'amount': 900},
+                {'collaborationId': 'c2', 'clientSwarmId': 'beta', 'providerSwarmId': 'alpha', 'amount': 200},
+                {'collaborationId': 'c3', 'clientSwarmId': 'alpha', 'providerSwarmId': 'gamma', 'amount': 1500}]
+    settlements, held = weekly_payments.net_settlements(WEEK, payments, cap=1000)
+
+    assert [(s['from'], s['to'], s['transfers']) for s in settlements] == [('alpha', 'beta', [700])]
+    assert [(s['from'], s['to'], s['amount']) for s in held] == [('alpha', 'gamma', 1500)]
+
+
+def test_collaborations_rewritten_in_place_are_read_fresh(swarms):
+    collaboration('c1', 'alpha', 'beta', 100)
+    assert [c['price'] for c in weekly_payments.load_active_collaborations()] == [100]
+
+    stat = os.stat('data/collaborations/c1.json')
+    collaboration('c1', 'alpha', 'beta', 999, status='paused')
+    # Same size and mtime, as a rewrite within one mtime tick can leave them
+    os.utime('data/collaborations/c1.json', ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert weekly_payments.load_active_collaborations() == []
+
+
+def test_payers_without_sol_for_fees_and_rent_are_skipped(swarms):
+    server = rpc_standin.start_server(port=0, slot_time=0.02, confirm_delay=0.05)
+    try:
+        mint = str(weekly_payments.compute_mint())
+        for swarm_id in ('alpha', 'gamma'):
+            server.state.set_token_balance(str(swarms[swarm_id].pubkey()), mint, to_base_units(1000))
+        # alpha can pay fees and the rent of beta's new token account, gamma has no SOL
+        server.state.set_lamports(str(swarms['alpha'].pubkey()), 10_000_000)
+        collaboration('c1', 'alpha', 'beta', 100)
+        collaboration('c2', 'gamma', 'beta', 50)
+        log = weekly_payments.PaymentLog('data/ledger/payments.jsonl')
+        settlements, retries, rejected, held, unresolved = weekly_payments.plan_week(WEEK, log)
+        assert len(settlements) == 2 and not (retries or rejected or held or unresolved)
+
+        results = weekly_payments.run_week(Client(f"http://127.0.0.1:{server.server_address[1]}"),
+                                           WEEK, log, settlements, retries)
+
+        assert [(r['status'], r['labels']) for r in results] == [('confirmed', [(f"{WEEK}:alpha:beta", 0)])]
+        assert [e['settlementId'] for e in log.entries if e['event'] == 'planned'] == [f"{WEEK}:alpha:beta"]
+        beta_account = rpc_standin.associated_token_address(str(swarms['beta'].pubkey()), mint)
+        assert server.state.accounts[beta_account]['amount'] == to_base_units(100)
+    finally:
+        server.shutdown()